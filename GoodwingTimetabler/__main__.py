@@ -1,3 +1,12 @@
-from app import run_app, run_test
+import os
+import sys
 
-run_app()
\ No newline at end of file
+# Make the sibling packages (app, csp, util) importable with "python -m GoodwingTimetabler"
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        from app import run_cli
+        sys.exit(run_cli(sys.argv[1:]))
+    from app import run_app
+    run_app()
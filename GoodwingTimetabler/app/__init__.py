@@ -1 +1,12 @@
-from .main import run_app, run_test
\ No newline at end of file
+# The entry points are imported on first use, so that the command line doesn't load the solver to parse its arguments
+_ENTRY_POINTS = {'run_app': 'main', 'run_test': 'main', 'run_cli': 'cli'}
+
+
+def __getattr__(name):
+    if name in _ENTRY_POINTS:
+        if _ENTRY_POINTS[name] == 'cli':
+            from . import cli as module
+        else:
+            from . import main as module
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
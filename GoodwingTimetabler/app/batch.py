@@ -0,0 +1,267 @@
+import contextlib
+import glob
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List
+
+
+def discover_instances(patterns: List[str]) -> List[str]:
+    """
+    Expands a list of instance directories or glob patterns.\n
+    Only directories containing a University.xlsx file are kept, in a stable order.\n
+    Parameters:\n
+    - patterns : [str] | Directories or glob patterns (e.g. "./Departments/*")
+    """
+    instances = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for path in matches:
+            path = os.path.normpath(path)
+            if not os.path.isfile(os.path.join(path, 'University.xlsx')):
+                print(f"Skipping {path}: no University.xlsx found")
+                continue
+            if path not in instances:
+                instances.append(path)
+    return instances
+
+
+def _output_dirs(instances: List[str], output_root: str = None) -> Dict[str, str]:
+    """Maps each instance to its output folder, de-duplicating instance names under output_root."""
+    if output_root is None:
+        return {instance: os.path.join(instance, 'Outputs') for instance in instances}
+
+    outputs = {}
+    used_names = set()
+    for instance in instances:
+        name = os.path.basename(os.path.abspath(instance))
+        unique_name, suffix = name, 2
+        while unique_name in used_names:
+            unique_name = f"{name}_{suffix}"
+            suffix += 1
+        used_names.add(unique_name)
+        outputs[instance] = os.path.join(output_root, unique_name)
+    return outputs
+
+
+def solve_instance(job: dict) -> dict:
+    """
+    Solves a single instance without any user interaction (runs inside a pool worker).\n
+    The console output of the solver is redirected to solve.log in the instance output folder.\n
+    Parameters:\n
+    - job : dict | instance, output_dir, time_limit and num_workers entries, plus the optional telemetry,
+      profile_build, cprofile, checkpoint, checkpoint_interval, resume, stop_when, phased, polish, phase_budgets,
+      model_cache, cache_size, build_workers, compiled_instance, visual, outputs, output_workers, plot, reject_invalid and incremental options
+    """
+    from csp import generateUniv2, CSP, SolverTelemetry, ModelCache, validate, violation_counts
+    from ortools.sat.python import cp_model
+    from app.main import outputSchedulesFromCSP
+    from app.outputs import DEFAULT_ARTEFACTS
+
+    instance, output_dir = job['instance'], job['output_dir']
+    os.makedirs(output_dir, exist_ok=True)
+
+    result = {
+        'instance': instance,
+        'output_dir': output_dir,
+        'status': 'ERROR',
+        'objective': None,
+        'best_bound': None,
+        'solutions': 0,
+        'courses': 0,
+        'violations': None,
+        'stop_reason': None,
+        'phases': [],
+        'timings': {},
+        'error': None,
+    }
+    start = time.time()
+    with open(os.path.join(output_dir, 'solve.log'), 'w', encoding='utf-8') as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            load_start = time.time()
+            university = generateUniv2(os.path.join(instance, ''), compiled=job.get('compiled_instance', False))
+            result['timings']['load'] = round(time.time() - load_start, 3)
+
+            model_cache = ModelCache(job['model_cache'], job['cache_size']) if job.get('model_cache') else None
+            telemetry = SolverTelemetry(os.path.join(output_dir, 'telemetry.jsonl') if job.get('telemetry') else None)
+            scheduler = CSP(university, max_time=job['time_limit'], num_workers=job['num_workers'], interactive=False,
+                            telemetry=telemetry, show_progress=False,
+                            profile=job.get('profile_build', False),
+                            profile_dir=os.path.join(output_dir, 'profiles') if job.get('cprofile') else None,
+                            checkpoint_path=os.path.join(output_dir, 'checkpoint.json') if job.get('checkpoint') else None,
+                            checkpoint_interval=job.get('checkpoint_interval', 5.0),
+                            resume=job.get('resume', False),
+                            stop_rule=job.get('stop_when'),
+                            phased=job.get('phased', False),
+                            polish=job.get('polish'),
+                            phase_budgets=job.get('phase_budgets'),
+                            model_cache=model_cache,
+                            build_workers=job.get('build_workers', 1),
+                            report='report' not in job.get('outputs', ()))
+            result['timings']['build'] = round(scheduler.build_time, 3)
+            result['model_cache_hit'] = scheduler.model_cache_hit
+            if job.get('profile_build'):
+                scheduler.build_profiler.to_json(os.path.join(output_dir, 'build_profile.json'))
+                scheduler.build_profiler.to_html(os.path.join(output_dir, 'build_profile.html'))
+            result['timings']['solve'] = round(scheduler.solve_time, 3)
+            result['status'] = scheduler.solver.StatusName(scheduler.status)
+            result['solutions'] = scheduler.solution_count
+            result['stop_reason'] = scheduler.stop_reason
+            if scheduler.phased:
+                result['phases'] = scheduler.phase_stats
+
+            if scheduler.status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                result['objective'] = scheduler.solver.ObjectiveValue()
+                result['best_bound'] = scheduler.solver.BestObjectiveBound()
+                result['courses'] = len(scheduler.generated_courses)
+
+                # Hard constraints checked on the published courses (positions are rows of solution.csv)
+                validation_start = time.time()
+                violations = validate(university, scheduler.solution if scheduler.solution is not None
+                                      else scheduler.generated_courses)
+                result['timings']['validation'] = round(time.time() - validation_start, 3)
+                result['violations'] = violation_counts(violations)
+                if violations:
+                    with open(os.path.join(output_dir, 'violations.json'), 'w', encoding='utf-8') as file:
+                        json.dump(violations, file, indent=2, ensure_ascii=False)
+                    print(f"{len(violations)} hard constraint violation(s), see violations.json")
+
+                if violations and job.get('reject_invalid'):
+                    result['error'] = f"Outputs not written, hard constraint violations: {result['violations']}"
+                else:
+                    output_start = time.time()
+                    output_timings = outputSchedulesFromCSP(scheduler, output_dir, job.get('visual'),
+                                                            job.get('outputs', DEFAULT_ARTEFACTS), job.get('output_workers'),
+                                                            job.get('plot'), job.get('incremental', False))
+                    result['timings']['output'] = round(time.time() - output_start, 3)
+                    result['timings']['artefacts'] = output_timings['artefacts']
+                    if output_timings['errors']:
+                        result['error'] = f"Output errors: {output_timings['errors']}"
+        except Exception as e:
+            result['error'] = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+
+    result['timings']['total'] = round(time.time() - start, 3)
+    return result
+
+
+def solve_instances(instances: List[str], time_limit: int = 600, jobs: int = 1, num_workers: int = None,
+                    output_root: str = None, summary_path: str = None, telemetry: bool = False,
+                    profile_build: bool = False, cprofile: bool = False, checkpoint: bool = False,
+                    checkpoint_interval: float = 5.0, resume: bool = False, stop_when: str = None,
+                    phased: bool = False, polish: List[str] = None, phase_budgets: List[float] = None,
+                    model_cache: str = None, cache_size: float = 2048, build_workers: int = 1,
+                    compiled_instance: bool = False, visual: dict = None, outputs: List[str] = None,
+                    output_workers: int = None, plot: dict = None, reject_invalid: bool = False,
+                    incremental: bool = False) -> List[dict]:
+    """
+    Solves many instances in parallel through a process pool and writes a JSON summary.\n
+    Parameters:\n
+    - instances : [str] | Instance directories (each containing University.xlsx)
+    - time_limit : int | Solver budget per instance, in seconds
+    - jobs : int | Number of instances solved concurrently
+    - num_workers : int | CP-SAT workers per instance (defaults to the cores left per job)
+    - output_root : str | If given, outputs go to output_root/<instance name>/ instead of <instance>/Outputs/
+    - summary_path : str | Where to write the summary JSON (defaults to summary.json in output_root or the current folder)
+    - telemetry : bool | Write the solver events of each instance to telemetry.jsonl in its output folder
+    - profile_build : bool | Write build_profile.json/.html (time, memory and size per constraint family) per instance
+    - cprofile : bool | With profile_build, also dump a cProfile file per constraint family in profiles/
+    - checkpoint : bool | Save the incumbent of each instance to checkpoint.json in its output folder during the search
+    - checkpoint_interval : float | Minimum number of seconds between two checkpoint writes
+    - resume : bool | Restart each instance from its checkpoint (if any), with the remaining time budget
+    - stop_when : str | Termination policy (see csp.parse_stop_rule), e.g. "gap<1% | stall>60s"
+    - phased : bool | Solve conflicts first, then the full objective (see CSP.solvePhases)
+    - polish : [str] | Objective families lexicographically improved after the full objective (implies phased)
+    - phase_budgets : [float] | Share of the time budget of the feasibility, optimization and polish phases
+    - model_cache : str | Folder of the model cache (None to always build the model)
+    - cache_size : float | Maximum size of the model cache, in MB
+    - build_workers : int | Processes building the per-group constraints of each instance
+    - compiled_instance : bool | Load each instance from its University.npz (written next to University.xlsx when missing or stale)
+    - visual : dict | Options of the visual timetable (dedupe_weeks, shard, entities), see ExcelScheduleManager.create_visual_timetable
+    - outputs : [str] | Artefacts written per instance (see app.outputs.OUTPUT_ARTEFACTS), by default the Excel schedules
+      and report.txt (the intelligence report, instead of solve.log)
+    - output_workers : int | Processes writing the artefacts of an instance (defaults to the cores left per job)
+    - plot : dict | dpi and format ('png' or 'svg') of the group plots of the png artefact
+    - reject_invalid : bool | Don't write the outputs of a solution violating hard constraints (see csp.validate); the
+      violations are always counted in the summary and listed in violations.json
+    - incremental : bool | Only rewrite the artefacts of the entities whose courses changed since the outputs already in
+      the output folder of each instance (see app.outputs.write_outputs)
+    """
+    jobs = max(1, min(jobs, len(instances))) if instances else 1
+    if num_workers is None:
+        num_workers = max(1, (os.cpu_count() or 1) // jobs)
+    if output_workers is None:
+        output_workers = max(1, (os.cpu_count() or 1) // jobs)
+    if outputs is None:
+        outputs = ['schedule', 'visual', 'report']
+
+    output_dirs = _output_dirs(instances, output_root)
+    batch_jobs = [{
+        'instance': instance,
+        'output_dir': output_dirs[instance],
+        'time_limit': time_limit,
+        'num_workers': num_workers,
+        'telemetry': telemetry,
+        'profile_build': profile_build,
+        'cprofile': cprofile,
+        'checkpoint': checkpoint or resume,
+        'checkpoint_interval': checkpoint_interval,
+        'resume': resume,
+        'stop_when': stop_when,
+        'phased': phased,
+        'polish': polish,
+        'phase_budgets': phase_budgets,
+        'model_cache': model_cache,
+        'cache_size': cache_size,
+        'build_workers': build_workers,
+        'compiled_instance': compiled_instance,
+        'visual': visual,
+        'outputs': outputs,
+        'output_workers': output_workers,
+        'plot': plot,
+        'reject_invalid': reject_invalid,
+        'incremental': incremental,
+    } for instance in instances]
+
+    print(f"Solving {len(batch_jobs)} instance(s), {jobs} at a time, {num_workers} solver worker(s) each, {time_limit}s budget")
+    batch_start = time.time()
+    results = {}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(solve_instance, job): job for job in batch_jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # The worker itself died (e.g. out of memory)
+                result = {'instance': job['instance'], 'output_dir': job['output_dir'], 'status': 'ERROR',
+                          'objective': None, 'best_bound': None, 'solutions': 0, 'courses': 0, 'violations': None,
+                          'stop_reason': None, 'phases': [], 'timings': {}, 'error': f"{type(e).__name__}: {e}"}
+            results[job['instance']] = result
+            violations = f" | {sum(result['violations'].values())} violation(s)" if result['violations'] else ""
+            print(f" - {result['instance']}: {result['status']} | objective: {result['objective']}{violations} | "
+                  f"{result['timings'].get('total', 0)}s")
+
+    ordered_results = [results[instance] for instance in instances]
+    summary = {
+        'time_limit': time_limit,
+        'jobs': jobs,
+        'num_workers': num_workers,
+        'stop_when': stop_when,
+        'wall_time': round(time.time() - batch_start, 3),
+        'instances': ordered_results,
+    }
+
+    if summary_path is None:
+        summary_path = os.path.join(output_root or '.', 'summary.json')
+    summary_dir = os.path.dirname(summary_path)
+    if summary_dir:
+        os.makedirs(summary_dir, exist_ok=True)
+    with open(summary_path, 'w', encoding='utf-8') as file:
+        json.dump(summary, file, indent=2)
+    print(f"Summary written to {summary_path}")
+
+    return ordered_results
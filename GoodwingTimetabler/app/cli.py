@@ -0,0 +1,154 @@
+import argparse
+import os
+from typing import List
+
+# Kept in sync with csp (not imported to keep the parser free of the solver imports)
+OBJECTIVE_FAMILIES = ('conflicts', 'balanceCoursesAcrossDays', 'balanceSubjectsAcrossWeeks', 'minimizeGaps',
+                      'minimize_campus_returns', 'minimize_late_slots')
+# Kept in sync with app.outputs (which imports openpyxl)
+OUTPUT_ARTEFACTS = ('schedule', 'visual', 'yaml', 'png', 'report', 'csv', 'parquet', 'jsonl', 'ics')
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'GoodwingTimetabler', 'models')
+
+
+def _budgets(value: str) -> List[float]:
+    try:
+        budgets = [float(share) for share in value.split(',')]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma separated numbers, got '{value}'")
+    if not 1 <= len(budgets) <= 3 or any(share <= 0 for share in budgets):
+        raise argparse.ArgumentTypeError("expected 1 to 3 positive shares")
+    return budgets
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="GoodwingTimetabler",
+        description="Goodwing Timetabler command line. Run without arguments for the interactive menu."
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    solve = subparsers.add_parser("solve", help="Solve one or many instances without any user interaction")
+    solve.add_argument("instances", nargs="+",
+                       help="Instance directories or glob patterns (each directory must contain University.xlsx)")
+    solve.add_argument("-t", "--time-limit", type=int, default=600,
+                       help="Solver time budget per instance, in seconds (default: 600)")
+    solve.add_argument("-j", "--jobs", type=int, default=1,
+                       help="Number of instances solved concurrently (default: 1)")
+    solve.add_argument("-w", "--workers", type=int, default=None,
+                       help="CP-SAT search workers per instance (default: available cores / jobs)")
+    solve.add_argument("-o", "--output-root", default=None,
+                       help="Write outputs to OUTPUT_ROOT/<instance>/ instead of <instance>/Outputs/")
+    solve.add_argument("-s", "--summary", default=None,
+                       help="Path of the summary JSON (default: summary.json in the output root or current folder)")
+    solve.add_argument("--telemetry", action="store_true",
+                       help="Write the solver events (objective, bound, gap, timings, RSS) to telemetry.jsonl per instance")
+    solve.add_argument("--profile-build", action="store_true",
+                       help="Write build_profile.json/.html: time, peak memory, variables, constraints and literals per constraint family")
+    solve.add_argument("--cprofile", action="store_true",
+                       help="With --profile-build, also dump a cProfile file per constraint family in profiles/")
+    solve.add_argument("--checkpoint", action="store_true",
+                       help="Save every improving solution to checkpoint.json in the instance output folder")
+    solve.add_argument("--checkpoint-interval", type=float, default=5.0,
+                       help="Minimum number of seconds between two checkpoint writes (default: 5)")
+    solve.add_argument("--resume", action="store_true",
+                       help="Restart from the last checkpoint of each instance with the remaining time budget (implies --checkpoint)")
+    solve.add_argument("--stop-when", default=None, metavar="POLICY",
+                       help="Stop an instance before its time limit when the policy is met, e.g. \"gap<1%% | stall>60s\". "
+                            "Rules: gap<X%%, stall>Ns (no improvement), objective<X, feasible, time>Ns; & binds tighter than |")
+    solve.add_argument("--phased", action="store_true",
+                       help="Solve in phases: room/teacher conflicts only, then the full objective starting from that solution")
+    solve.add_argument("--polish", nargs="+", default=None, metavar="FAMILY", choices=OBJECTIVE_FAMILIES,
+                       help="After the full objective, improve these objective families one after the other without "
+                            "degrading the previous phases (implies --phased). Families: " + ", ".join(OBJECTIVE_FAMILIES))
+    solve.add_argument("--phase-budgets", type=_budgets, default=None, metavar="F,O[,P]",
+                       help="Share of the time limit of the feasibility, optimization and polish phases (default: 0.25,0.75 "
+                            "or 0.2,0.6,0.2 with --polish)")
+    solve.add_argument("--model-cache", nargs="?", const=DEFAULT_CACHE_DIR, default=None, metavar="DIR",
+                       help=f"Reuse the models already built for the same instances (default folder: {DEFAULT_CACHE_DIR})")
+    solve.add_argument("--cache-size", type=float, default=2048,
+                       help="Maximum size of the model cache in MB, least recently used models are removed first (default: 2048)")
+    solve.add_argument("--build-workers", type=int, default=1,
+                       help="Processes building the per-group constraints of an instance in parallel (default: 1)")
+    solve.add_argument("--compiled-instance", action="store_true",
+                       help="Load the instances from University.npz, compiled next to University.xlsx on the first run and "
+                            "rebuilt when the workbook changes")
+    solve.add_argument("--visual-dedupe", action="store_true",
+                       help="Write each distinct week of an entity once in the visual timetable, identical weeks link to it")
+    solve.add_argument("--visual-shard", choices=["type", "entity"], default=None,
+                       help="Split the visual timetable into one workbook per entity type or per entity")
+    solve.add_argument("--visual-entities", nargs="+", default=None, metavar="ENTITY",
+                       help='Only render these entities in the visual timetable, e.g. "Group:A1" "Teacher:Lovelace_Ada" Room')
+    solve.add_argument("--outputs", nargs="+", default=None, metavar="ARTEFACT", choices=OUTPUT_ARTEFACTS,
+                       help="Artefacts written for each instance (default: schedule visual report). Artefacts: "
+                            + ", ".join(OUTPUT_ARTEFACTS))
+    solve.add_argument("--output-workers", type=int, default=None,
+                       help="Processes writing the artefacts of an instance in parallel (defaults to the cores divided by --jobs)")
+    solve.add_argument("--plot-dpi", type=int, default=300,
+                       help="Resolution of the group plots of the png artefact (default: 300)")
+    solve.add_argument("--plot-format", choices=["png", "svg"], default="png",
+                       help="File format of the group plots of the png artefact, svg being vector graphics (default: png)")
+    solve.add_argument("--reject-invalid", action="store_true",
+                       help="Don't write the outputs of a solution violating hard constraints (room, teacher or group "
+                            "double-booking, availability, lunch break, weekend, online quota, number of sessions)")
+    solve.add_argument("--incremental", action="store_true",
+                       help="Only rewrite the artefacts showing a group, teacher or room whose courses changed since the "
+                            "outputs already in the output folder (manifest.json); changes.json lists the changed entities "
+                            "and weeks")
+
+    cache_stats = subparsers.add_parser("cache-stats", help="Show the content of the model cache")
+    cache_stats.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help=f"Model cache folder (default: {DEFAULT_CACHE_DIR})")
+    cache_stats.add_argument("--clear", action="store_true", help="Remove every cached model")
+
+    return parser
+
+
+def run_cli(argv: List[str]) -> int:
+    """
+    Entry point of the headless command line.\n
+    Parameters:\n
+    - argv : [str] | Command line arguments (without the program name)
+    """
+    args = build_parser().parse_args(argv)
+
+    if args.command == "solve":
+        from .batch import discover_instances, solve_instances
+
+        if args.stop_when:
+            from csp.termination import parse_stop_rule
+            try:
+                parse_stop_rule(args.stop_when)
+            except ValueError as e:
+                print(e)
+                return 2
+
+        instances = discover_instances(args.instances)
+        if not instances:
+            print("No instance found.")
+            return 1
+        results = solve_instances(instances, args.time_limit, args.jobs, args.workers,
+                                  args.output_root, args.summary, args.telemetry,
+                                  args.profile_build, args.cprofile, args.checkpoint,
+                                  args.checkpoint_interval, args.resume, args.stop_when,
+                                  args.phased, args.polish, args.phase_budgets,
+                                  args.model_cache, args.cache_size, args.build_workers,
+                                  args.compiled_instance,
+                                  {'dedupe_weeks': args.visual_dedupe, 'shard': args.visual_shard,
+                                   'entities': args.visual_entities},
+                                  args.outputs, args.output_workers,
+                                  {'dpi': args.plot_dpi, 'format': args.plot_format}, args.reject_invalid,
+                                  args.incremental)
+        return 0 if all(r['status'] in ('OPTIMAL', 'FEASIBLE') and not (args.reject_invalid and r['violations'])
+                        for r in results) else 1
+
+    if args.command == "cache-stats":
+        from csp.modelcache import ModelCache
+
+        cache = ModelCache(args.cache_dir)
+        if args.clear:
+            cache.clear()
+            print(f"Cleared the model cache {args.cache_dir}")
+        cache.print_stats()
+        return 0
+
+    build_parser().print_help()
+    return 1
@@ -1,6 +1,7 @@
-from myTests import test_csp_solver_performance
-from csp import *
-from util import ExcelScheduleManager, init_template, create_availability_template
+import os
+from csp import generateUniv2
+from util import init_template, create_availability_template
+from .outputs import write_outputs, DEFAULT_ARTEFACTS
 
 def run_app():
     print("app running...\n\n\n")
@@ -32,24 +33,47 @@ def run_app():
 
 
 def run_test():
+    from myTests import test_csp_solver_performance  # pytest is only needed to run the tests
     test_csp_solver_performance()
 
 
-def generateScheduleUsingCSP():
+def generateScheduleUsingCSP(input_dir: str = "./Inputs/", output_dir: str = "./Outputs/", **csp_options):
+    """
+    Loads the instance from input_dir, solves it and writes the schedules to output_dir.\n
+    Parameters:\n
+    - input_dir : str | Folder containing University.xlsx
+    - output_dir : str | Folder receiving the excel/ outputs
+    - csp_options : Extra keyword arguments forwarded to CSP (max_time, num_workers, interactive...)
+    """
+    from csp import CSP  # OR-Tools is only loaded once a solve is requested
 
     # Create the university
-    my_univ = generateUniv2("./Inputs/")
+    my_univ = generateUniv2(input_dir)
     print("Univ generated successfully : ", my_univ)
     print("Generating the CSP...")
     # Instantiate and solve the CSP
-    scheduler = CSP(my_univ)
+    scheduler = CSP(my_univ, **csp_options)
 
     # Output the generated schedules
-    outputSchedulesFromCSP(scheduler)
+    outputSchedulesFromCSP(scheduler, output_dir)
 
+    return scheduler
 
-def outputSchedulesFromCSP(csp_solver: CSP):
-    # Excel output
-    excel_manager = ExcelScheduleManager(csp_solver.university, csp_solver.generated_courses)
-    excel_manager.generate_excel_schedule('./Outputs/excel/schedule.xlsx')
-    excel_manager.create_visual_timetable('./Outputs/excel/visual_timetable.xlsx')
\ No newline at end of file
+
+def outputSchedulesFromCSP(csp_solver: 'CSP', output_dir: str = "./Outputs/", visual_options: dict = None,
+                           artefacts=DEFAULT_ARTEFACTS, workers: int = None, plot_options: dict = None,
+                           incremental: bool = False) -> dict:
+    """
+    Writes the schedules of a solved CSP to output_dir (see app.outputs.write_outputs).\n
+    Parameters:\n
+    - csp_solver : CSP | Solved CSP
+    - output_dir : str | Folder receiving the outputs
+    - visual_options : dict | Keyword arguments of ExcelScheduleManager.create_visual_timetable (dedupe_weeks, shard, entities)
+    - artefacts : [str] | Artefacts to write, among OUTPUT_ARTEFACTS (schedule, visual, yaml, png, report, csv, parquet, jsonl, ics)
+    - workers : int | Processes writing the artefacts in parallel (1 to write them one after the other)
+    - plot_options : dict | dpi and format ('png' or 'svg') of the group plots
+    - incremental : bool | Only write the artefacts of the entities changed since the last outputs written to output_dir
+    Returns:\n
+    - dict | Timings of the artefacts
+    """
+    return write_outputs(csp_solver, output_dir, artefacts, visual_options, workers, plot_options, incremental)
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+
+from csp.checkpoint import atomic_write
+from util import ExcelScheduleManager
+
+MANIFEST_VERSION = 1
+# Written in the output folder: the published solution (manifest) and what changed since the previous one (change report)
+MANIFEST_FILE = 'manifest.json'
+CHANGES_FILE = 'changes.json'
+
+# Entities are keyed as in the visual timetable ("Group:A1", "Teacher:Lovelace_Ada", "Room:L101"), and keep the name of
+# their iCalendar, YAML and plot files
+DISPLAY_NAMES = {
+    'Group': lambda course: course.group.name,
+    'Teacher': lambda course: f"{course.teacher.first_name} {course.teacher.last_name}",
+    'Room': lambda course: course.room.name,
+}
+
+
+def _digest(payload) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class OutputManifest:
+    """
+    Digest of every (entity, week) of a published solution, saved next to its outputs (manifest.json).\n
+    Comparing the manifest of a new solution with the saved one gives the entities and weeks whose courses moved, so that
+    only the artefacts showing them are written again.\n
+    Parameters:\n
+    - entities : {str: dict} | "Type:name" -> display name (name) and digest of the courses of every week (weeks, from 1)
+    - settings : str | Digest of the output options and of the calendar, any change invalidates every artefact
+    """
+    def __init__(self, entities: Dict[str, dict], settings: str):
+        self.entities = entities
+        self.settings = settings
+
+    @classmethod
+    def from_courses(cls, university, courses, settings: dict = None) -> 'OutputManifest':
+        """
+        Manifest of a solution.\n
+        Parameters:\n
+        - university : University | The instance
+        - courses : [Course] | Courses of the solution
+        - settings : dict | Options the artefacts depend on (artefacts, visual and plot options)
+        """
+        start_date = university.timeslots[0].day
+        calendar = {'university': university.name, 'start': start_date, 'days': len(university.timeslots),
+                    'time_ranges': [(start.strftime('%H:%M'), end.strftime('%H:%M')) for start, end in university.time_ranges]}
+
+        # Everything an artefact shows of a course
+        rows = {}
+        for course in courses:
+            timeslot = course.timeslot
+            week = (timeslot.day - start_date).days // 7 + 1
+            row = (timeslot.day.isoformat(), timeslot.start.strftime('%H:%M'), timeslot.end.strftime('%H:%M'),
+                   course.group.name, course.subject.name, course.subject.color, course.teacher.first_name,
+                   course.teacher.last_name, course.room.name)
+            for entity_type, key in ExcelScheduleManager.VISUAL_ENTITIES.items():
+                entity = rows.setdefault(f"{entity_type}:{key(course)}", {'name': DISPLAY_NAMES[entity_type](course), 'weeks': {}})
+                entity['weeks'].setdefault(week, []).append(row)
+
+        entities = {key: {'name': entity['name'], 'weeks': {str(week): _digest(sorted(week_rows))
+                                                             for week, week_rows in sorted(entity['weeks'].items())}}
+                    for key, entity in rows.items()}
+        return cls(entities, _digest({'version': MANIFEST_VERSION, 'settings': settings or {}, 'calendar': calendar}))
+
+    @classmethod
+    def load(cls, output_dir: str) -> Optional['OutputManifest']:
+        """Manifest saved in output_dir (None if there is none or it can't be read)."""
+        try:
+            with open(os.path.join(output_dir, MANIFEST_FILE), encoding='utf-8') as file:
+                data = json.load(file)
+            if data.get('version') != MANIFEST_VERSION:
+                return None
+            return cls(data['entities'], data['settings'])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, output_dir: str):
+        data = {'version': MANIFEST_VERSION, 'settings': self.settings, 'entities': self.entities}
+        atomic_write(os.path.join(output_dir, MANIFEST_FILE), json.dumps(data, indent=1, ensure_ascii=False).encode('utf-8'))
+
+    @staticmethod
+    def discard(output_dir: str):
+        """Removes the manifest of output_dir, so that the next run writes every artefact."""
+        path = os.path.join(output_dir, MANIFEST_FILE)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def compare(self, previous: Optional['OutputManifest']) -> dict:
+        """
+        Change report between the previously published solution and this one.\n
+        Returns:\n
+        - dict | full (every artefact is written) and its reason, changes (entity, week and change: added, removed or
+          modified, by entity and week), changed (entities with a change), removed (entities without courses anymore,
+          with their display names)
+        """
+        if previous is None or previous.settings != self.settings:
+            return {'full': True, 'reason': "no previous manifest" if previous is None else "output settings changed",
+                    'changes': [], 'changed': sorted(self.entities), 'removed': {}}
+
+        changes = []
+        for key in sorted(set(self.entities) | set(previous.entities)):
+            weeks = self.entities.get(key, {}).get('weeks', {})
+            previous_weeks = previous.entities.get(key, {}).get('weeks', {})
+            for week in sorted(set(weeks) | set(previous_weeks), key=int):
+                if week not in previous_weeks:
+                    change = 'added'
+                elif week not in weeks:
+                    change = 'removed'
+                elif weeks[week] != previous_weeks[week]:
+                    change = 'modified'
+                else:
+                    continue
+                changes.append({'entity': key, 'week': int(week), 'change': change})
+        removed = {key: entity['name'] for key, entity in previous.entities.items() if key not in self.entities}
+        return {'full': False, 'reason': None, 'changes': changes,
+                'changed': list(dict.fromkeys(change['entity'] for change in changes)), 'removed': removed}
+
+    def names(self, entity_type: str) -> Dict[str, str]:
+        """"Type:name" -> display name of the entities of a type."""
+        return {key: entity['name'] for key, entity in self.entities.items() if key.partition(':')[0] == entity_type}
+
+
+def write_change_report(output_dir: str, report: dict) -> List[str]:
+    """Writes the change report to changes.json and returns its summary lines."""
+    with open(os.path.join(output_dir, CHANGES_FILE), 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
+    if report['full']:
+        return [f"Incremental outputs: every artefact written ({report['reason']})"]
+    lines = [f"Incremental outputs: {len(report['changes'])} changed (entity, week), {len(report['written'])} artefact(s) "
+             f"written, {len(report['unchanged'])} unchanged"]
+    lines += [f" - {change['entity']} week {change['week']}: {change['change']}" for change in report['changes'][:20]]
+    if len(report['changes']) > 20:
+        lines.append(f" ... and {len(report['changes']) - 20} more")
+    return lines
@@ -0,0 +1,325 @@
+import contextlib
+import io
+import os
+import re
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+from csp import SolutionFrame, ICAL_ENTITIES
+from csp.solution import ical_path
+from util import ExcelScheduleManager, ScheduleRenderer, PLOT_FORMATS, courses_to_yaml
+from .manifest import OutputManifest, write_change_report
+
+# Artefacts of the output pipeline: schedule.xlsx, visual timetable(s), YAML and PNG schedule per group,
+# the scheduling intelligence report (report.txt) and the columnar exports of the solution (solution.csv,
+# solution.parquet, solution.jsonl and one iCalendar file per group, teacher and room)
+OUTPUT_ARTEFACTS = ('schedule', 'visual', 'yaml', 'png', 'report', 'csv', 'parquet', 'jsonl', 'ics')
+# Columnar exports: file name and SolutionFrame method
+SOLUTION_EXPORTS = {'csv': ('solution.csv', 'to_csv'), 'parquet': ('solution.parquet', 'to_parquet'),
+                    'jsonl': ('solution.jsonl', 'to_jsonl')}
+DEFAULT_ARTEFACTS = ('schedule', 'visual')
+
+# University and courses of a pool worker, sent once per worker instead of once per task
+_worker_state = {}
+
+
+def _init_worker(university, courses):
+    _worker_state['university'] = university
+    _worker_state['courses'] = courses
+    _worker_state.pop('solution', None)
+
+
+def _solution_frame(university, courses) -> SolutionFrame:
+    # Built once per process and solution, shared by the columnar exports
+    cached = _worker_state.get('solution')
+    if cached is None or cached[0] is not courses:
+        cached = _worker_state['solution'] = (courses, SolutionFrame.from_courses(university, courses))
+    return cached[1]
+
+
+def _file_name(name: str) -> str:
+    return re.sub(r'[^\w.-]', '_', name)
+
+
+def plan_artefacts(courses, output_dir: str, artefacts=DEFAULT_ARTEFACTS, visual_options: dict = None,
+                   plot_options: dict = None) -> List[dict]:
+    """
+    Splits the outputs into independent tasks, which write_artefact can run in any order and any process.\n
+    Parameters:\n
+    - courses : [Course] | Courses of the solution
+    - output_dir : str | Folder receiving the outputs (excel/, yaml/, png/ and ics/ subfolders)
+    - artefacts : [str] | Artefacts to write, among OUTPUT_ARTEFACTS ('report' is not a task, see write_outputs)
+    - visual_options : dict | Keyword arguments of ExcelScheduleManager.create_visual_timetable; a sharded visual
+      timetable is written by one task per entity type
+    - plot_options : dict | dpi and format ('png' or 'svg') of the group plots
+    Returns:\n
+    - [dict] | Tasks: name (for the timings), kind, path and options
+    """
+    unknown = [artefact for artefact in artefacts if artefact not in OUTPUT_ARTEFACTS]
+    if unknown:
+        raise ValueError(f"Unknown output artefacts {unknown}, expected some of {list(OUTPUT_ARTEFACTS)}")
+
+    excel_dir = os.path.join(output_dir, 'excel')
+    tasks = []
+    if 'schedule' in artefacts:
+        tasks.append({'name': 'excel/schedule.xlsx', 'kind': 'schedule', 'path': os.path.join(excel_dir, 'schedule.xlsx')})
+
+    if 'visual' in artefacts:
+        options = dict(visual_options or {})
+        path = os.path.join(excel_dir, 'visual_timetable.xlsx')
+        if options.get('shard'):
+            # The shards of an entity type don't depend on the other types
+            for entity_type in ExcelScheduleManager.VISUAL_ENTITIES:
+                selected = [selector for selector in options.get('entities') or [entity_type]
+                            if selector.partition(':')[0] == entity_type]
+                if selected:
+                    tasks.append({'name': f"excel/visual_timetable ({entity_type.lower()}s)", 'kind': 'visual', 'path': path,
+                                  'options': {**options, 'entities': selected}})
+        else:
+            tasks.append({'name': 'excel/visual_timetable.xlsx', 'kind': 'visual', 'path': path, 'options': options})
+
+    for kind, (name, _) in SOLUTION_EXPORTS.items():
+        if kind in artefacts:
+            tasks.append({'name': name, 'kind': kind, 'path': os.path.join(output_dir, name)})
+    if 'ics' in artefacts:
+        for entity in ICAL_ENTITIES:
+            tasks.append({'name': f"ics/{entity}_*.ics", 'kind': 'ics', 'path': os.path.join(output_dir, 'ics', ''),
+                          'entity': entity})
+
+    plot_options = {'dpi': 300, 'format': 'png', **(plot_options or {})}
+    if plot_options['format'] not in PLOT_FORMATS:
+        raise ValueError(f"Unknown plot format '{plot_options['format']}', expected one of {', '.join(PLOT_FORMATS)}")
+    groups = list(dict.fromkeys(course.group.name for course in courses))
+    for kind, extension in (('yaml', 'yml'), ('png', plot_options['format'])):
+        if kind in artefacts:
+            for group in groups:
+                name = f"{kind}/{_file_name(group)}.{extension}"
+                tasks.append({'name': name, 'kind': kind, 'path': os.path.join(output_dir, name), 'group': group,
+                              'options': plot_options})
+    return tasks
+
+
+def incremental_tasks(tasks: List[dict], manifest: OutputManifest, changes: dict, output_dir: str) -> List[dict]:
+    """
+    Keeps the tasks of plan_artefacts showing an entity that changed (see OutputManifest.compare), or whose files are missing.
+
+    Per entity artefacts (YAML and plots of a group, iCalendar files, visual workbooks sharded by entity) are restricted
+    to the changed entities; artefacts showing every entity (schedule.xlsx, the columnar exports, an unsharded visual
+    timetable) are written again as soon as anything changed.
+
+    Parameters:
+
+    - tasks : [dict] | Tasks of plan_artefacts
+    - manifest : OutputManifest | Manifest of the solution to write
+    - changes : dict | Change report of manifest.compare
+    - output_dir : str | Folder receiving the outputs
+    Returns:
+
+    - [dict] | Tasks to run (copies of the restricted ones)
+    """
+    if changes['full']:
+        return list(tasks)
+    changed = set(changes['changed'])
+    selected = []
+    for task in tasks:
+        if task['kind'] in ('yaml', 'png'):
+            if f"Group:{task['group']}" in changed or not os.path.exists(task['path']):
+                selected.append(task)
+        elif task['kind'] == 'ics':
+            entity_type = task['entity'].capitalize()
+            names = [name for key, name in manifest.names(entity_type).items()
+                     if key in changed or not os.path.exists(ical_path(os.path.dirname(task['path']), task['entity'], name))]
+            if names:
+                selected.append({**task, 'names': names})
+        elif task['kind'] == 'visual' and task['options'].get('shard'):
+            options = task['options']
+            selectors = options['entities']
+            entity_type = selectors[0].partition(':')[0]
+            keys = [key for key in manifest.names(entity_type) if entity_type in selectors or key in selectors]
+            if options['shard'] == 'entity':
+                keys = [key for key in keys if key in changed or not os.path.exists(
+                    ExcelScheduleManager.visual_workbook_path(task['path'], 'entity', entity_type, key.partition(':')[2]))]
+                if keys:
+                    selected.append({**task, 'options': {**options, 'entities': keys}})
+            elif any(key.partition(':')[0] == entity_type for key in changed) or not os.path.exists(
+                    ExcelScheduleManager.visual_workbook_path(task['path'], 'type', entity_type, None)):
+                selected.append(task)
+        elif changed or not os.path.exists(task['path']):
+            selected.append(task)
+    return selected
+
+
+def remove_stale_outputs(changes: dict, output_dir: str, artefacts, visual_options: dict = None,
+                         plot_options: dict = None) -> List[str]:
+    """Removes the per entity files (YAML, plots, iCalendar, visual workbook) of the entities without courses anymore."""
+    visual_options, plot_options = visual_options or {}, {'format': 'png', **(plot_options or {})}
+    paths = []
+    for key, name in changes['removed'].items():
+        entity_type, _, visual_name = key.partition(':')
+        if 'ics' in artefacts:
+            paths.append(ical_path(os.path.join(output_dir, 'ics'), entity_type.lower(), name))
+        if entity_type == 'Group':
+            for kind, extension in (('yaml', 'yml'), ('png', plot_options['format'])):
+                if kind in artefacts:
+                    paths.append(os.path.join(output_dir, kind, f"{_file_name(name)}.{extension}"))
+        if 'visual' in artefacts and visual_options.get('shard') == 'entity':
+            paths.append(ExcelScheduleManager.visual_workbook_path(
+                os.path.join(output_dir, 'excel', 'visual_timetable.xlsx'), 'entity', entity_type, visual_name))
+    removed = [path for path in paths if os.path.exists(path)]
+    for path in removed:
+        os.remove(path)
+    return removed
+
+
+def write_artefact(task: dict, university=None, courses=None) -> dict:
+    """
+    Writes one artefact planned by plan_artefacts (runs inside a pool worker).\n
+    Parameters:\n
+    - task : dict | Task of plan_artefacts
+    - university, courses : University, [Course] | Solution to write (those sent to the worker if None)
+    Returns:\n
+    - dict | name, seconds, console output (log) and error of the task
+    """
+    if university is None:
+        university, courses = _worker_state['university'], _worker_state['courses']
+
+    start = time.time()
+    result = {'name': task['name'], 'seconds': None, 'log': '', 'error': None}
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        try:
+            os.makedirs(os.path.dirname(task['path']), exist_ok=True)
+            if task['kind'] == 'schedule':
+                ExcelScheduleManager(university, courses).generate_excel_schedule(task['path'])
+            elif task['kind'] == 'visual':
+                ExcelScheduleManager(university, courses).create_visual_timetable(task['path'], **task['options'])
+            elif task['kind'] in SOLUTION_EXPORTS:
+                getattr(_solution_frame(university, courses), SOLUTION_EXPORTS[task['kind']][1])(task['path'])
+            elif task['kind'] == 'ics':
+                _solution_frame(university, courses).to_icalendar(os.path.dirname(task['path']), task['entity'],
+                                                                  names=task.get('names'))
+            else:
+                group_courses = sorted((course for course in courses if course.group.name == task['group']),
+                                       key=lambda course: course.timeslot.index)
+                if task['kind'] == 'yaml':
+                    with open(task['path'], 'w') as file:
+                        file.write(courses_to_yaml(group_courses))
+                else:
+                    # One figure per process, reused for every group it plots
+                    renderer = _worker_state.get('renderer')
+                    if renderer is None or renderer.dpi != task['options']['dpi']:
+                        renderer = _worker_state['renderer'] = ScheduleRenderer(task['options']['dpi'])
+                    renderer.render(group_courses, task['path'], task['options']['format'])
+        except Exception as e:
+            result['error'] = f"{type(e).__name__}: {e}"
+            traceback.print_exc(file=log)
+    result['seconds'] = round(time.time() - start, 3)
+    result['log'] = log.getvalue()
+    return result
+
+
+def write_report(csp_solver: 'CSP', path: str) -> dict:
+    """Writes the scheduling intelligence report of a solved CSP to path (in this process: it reads the solver)."""
+    start = time.time()
+    with open(path, 'w', encoding='utf-8') as file, contextlib.redirect_stdout(file):
+        csp_solver.intelligenceReport()
+    return {'name': os.path.basename(path), 'seconds': round(time.time() - start, 3), 'log': '', 'error': None}
+
+
+def write_outputs(csp_solver: 'CSP', output_dir: str = "./Outputs/", artefacts=DEFAULT_ARTEFACTS,
+                  visual_options: dict = None, workers: int = None, plot_options: dict = None,
+                  incremental: bool = False) -> Dict:
+    """
+    Writes the artefacts of a solved CSP, the independent ones in parallel through a process pool.\n
+    The intelligence report is written by this process while the pool works, so the outputs take about as long as the
+    slowest artefact rather than the sum of all of them.\n
+    Parameters:\n
+    - csp_solver : CSP | Solved CSP
+    - output_dir : str | Folder receiving the outputs
+    - artefacts : [str] | Artefacts to write, among OUTPUT_ARTEFACTS
+    - visual_options : dict | Keyword arguments of ExcelScheduleManager.create_visual_timetable (dedupe_weeks, shard, entities)
+    - workers : int | Processes writing the artefacts (defaults to one per artefact, up to the number of cores; 1 to
+      write everything in this process)
+    - plot_options : dict | dpi and format ('png' or 'svg') of the group plots
+    - incremental : bool | Only write the artefacts showing an entity whose courses changed since the solution published
+      in output_dir (manifest.json), and list the changed entities and weeks in changes.json; the other files are left
+      untouched
+    Returns:\n
+    - dict | Seconds per artefact (artefacts), their errors, the wall time and the sum of the artefact times (serial),
+      plus the change report (changes) if incremental
+    """
+    university, courses = csp_solver.university, csp_solver.generated_courses
+    tasks = plan_artefacts(courses, output_dir, artefacts, visual_options, plot_options)
+    os.makedirs(output_dir, exist_ok=True)
+
+    changes, write_report_file = None, 'report' in artefacts
+    if incremental:
+        manifest = OutputManifest.from_courses(university, courses, {
+            'artefacts': sorted(artefacts), 'visual': visual_options or {}, 'plot': plot_options or {}})
+        changes = manifest.compare(OutputManifest.load(output_dir))
+        planned = [task['name'] for task in tasks] + (['report.txt'] if write_report_file else [])
+        tasks = incremental_tasks(tasks, manifest, changes, output_dir)
+        changes['deleted'] = remove_stale_outputs(changes, output_dir, artefacts, visual_options, plot_options)
+        write_report_file = write_report_file and (changes['full'] or bool(changes['changed'])
+                                                   or not os.path.exists(os.path.join(output_dir, 'report.txt')))
+        written = {task['name'] for task in tasks} | ({'report.txt'} if write_report_file else set())
+        changes['written'] = [name for name in planned if name in written]
+        changes['unchanged'] = [name for name in planned if name not in written]
+    workers = max(1, min(len(tasks), workers or os.cpu_count() or 1))
+    if getattr(csp_solver, 'solution', None) is not None:
+        # The frame of variablesToCourses serves the exports written by this process
+        _worker_state['solution'] = (courses, csp_solver.solution)
+    else:
+        # The course list of a previous call may have been edited in place since
+        _worker_state.pop('solution', None)
+
+    start = time.time()
+    pool, futures = None, []
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(university, courses))
+        futures = [pool.submit(write_artefact, task) for task in tasks]
+
+    report = write_report(csp_solver, os.path.join(output_dir, 'report.txt')) if write_report_file else None
+
+    if pool is None:
+        results = [write_artefact(task, university, courses) for task in tasks]
+    else:
+        results = []
+        with pool:
+            for task, future in zip(tasks, futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    # The worker itself died (e.g. out of memory)
+                    results.append({'name': task['name'], 'seconds': None, 'log': '', 'error': f"{type(e).__name__}: {e}"})
+    if report is not None:
+        results.append(report)
+    wall = time.time() - start
+
+    for result in results:
+        print(result['log'], end='')
+    timings = {
+        'artefacts': {result['name']: result['seconds'] for result in results},
+        'errors': {result['name']: result['error'] for result in results if result['error']},
+        'wall': round(wall, 3),
+        'serial': round(sum(result['seconds'] or 0 for result in results), 3),
+        'workers': workers,
+    }
+
+    if incremental:
+        # A failed artefact may be stale: without a manifest, the next run writes everything again
+        if timings['errors']:
+            OutputManifest.discard(output_dir)
+        else:
+            manifest.save(output_dir)
+        timings['changes'] = changes
+        for line in write_change_report(output_dir, changes):
+            print(line)
+
+    print(f"\nOutputs written in {timings['wall']}s with {workers} worker(s) ({timings['serial']}s of artefacts):")
+    for result in sorted(results, key=lambda result: -(result['seconds'] or 0)):
+        status = f"FAILED ({result['error']})" if result['error'] else f"{result['seconds']}s"
+        print(f" - {result['name']}: {status}")
+    return timings
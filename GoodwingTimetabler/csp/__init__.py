@@ -1,3 +1,36 @@
 from .objects import *
 from .instantiator import *
-from .csp import *
\ No newline at end of file
+from .profiler import BuildProfiler
+from .checkpoint import CheckpointWriter, load_checkpoint
+from .solution import SolutionFrame, SOLUTION_COLUMNS, ICAL_ENTITIES
+from .schedulematrix import ScheduleMatrix
+from .validator import validate, violation_counts, HARD_CONSTRAINTS
+from .scoring import ScheduleScorer, SCORE_FAMILIES
+from .termination import StopRule, SearchState, GapBelow, NoImprovement, ObjectiveBelow, FirstFeasible, Deadline, AllOf, AnyOf, parse_stop_rule
+
+# Names of the modules depending on OR-Tools or psutil, imported on first use (loading an instance doesn't need them)
+_LAZY = {
+    'SolverTelemetry': 'telemetry', 'TerminalRenderer': 'telemetry', 'load_telemetry': 'telemetry', 'plot_telemetry': 'telemetry',
+    'ModelCache': 'modelcache', 'instance_fingerprint': 'modelcache',
+    'CSP': 'csp', 'ScheduleIntelligence': 'csp', 'ChronometerCallback': 'csp', 'OBJECTIVE_FAMILIES': 'csp',
+}
+
+__all__ = [
+    'Timeslot', 'WeeklyAvailability', 'Person', 'Subject', 'Teacher', 'Student', 'Room', 'Group', 'Promotion', 'Course',
+    'University', 'generate_timeslots',
+    'read_workbook', 'read_availability', 'generateUniv2', 'generateUniv',
+    'BuildProfiler', 'CheckpointWriter', 'load_checkpoint', 'SolutionFrame', 'SOLUTION_COLUMNS', 'ICAL_ENTITIES',
+    'ScheduleMatrix', 'validate', 'violation_counts', 'HARD_CONSTRAINTS', 'ScheduleScorer', 'SCORE_FAMILIES',
+    'StopRule', 'SearchState', 'GapBelow', 'NoImprovement', 'ObjectiveBelow', 'FirstFeasible', 'Deadline', 'AllOf', 'AnyOf',
+    'parse_stop_rule',
+] + list(_LAZY)
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        # Plain imports (not importlib) so that packagers still find these modules
+        from . import telemetry, modelcache, csp
+        module = {'telemetry': telemetry, 'modelcache': modelcache, 'csp': csp}[_LAZY[name]]
+        globals()[name] = getattr(module, name)
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,52 @@
+from collections import defaultdict
+from typing import Hashable, Iterable, List
+
+from .profiler import constraint_kind
+
+
+def clear_constraint(constraint):
+    """Empties a ConstraintProto in place: the solver ignores it, and the other constraint indices do not move."""
+    kind = constraint_kind(constraint)
+    if kind is not None:
+        getattr(constraint, f'clear_{kind}')()
+    constraint.enforcement_literal.clear()
+
+
+class ConstraintBlocks:
+    """
+    Registry of the constraints and objective terms of an editable model, grouped by owning entity.\n
+    Owners are tuples such as ('group', name), ('teacher', index) or ('course', (group, subject, course id)).
+    A block can belong to several owners (e.g. the overlap constraints of a pair of courses); removing any of
+    them removes the block. Constraints are never deleted from the proto, only emptied, so the indices stored
+    here stay valid.\n
+    Parameters:\n
+    - model : CpModel | The model being edited
+    """
+    def __init__(self, model):
+        self.model = model
+        self.constraints = defaultdict(list)  # owner -> [(first index, end index)]
+        self.terms = defaultdict(list)  # owner -> objective terms
+
+    def add(self, owners: Iterable[Hashable], start: int, end: int = None, terms: List = ()):
+        """
+        Registers the constraints [start, end) (end defaults to the current end of the model) and objective terms.\n
+        Parameters:\n
+        - owners : [tuple] | Entities owning the block
+        - start, end : int | Range of constraint indices of the block
+        - terms : [LinearExpr] | Objective terms created by the block
+        """
+        if end is None:
+            end = len(self.model.Proto().constraints)
+        for owner in owners:
+            if end > start:
+                self.constraints[owner].append((start, end))
+            if terms:
+                self.terms[owner].extend(terms)
+
+    def remove(self, owner: Hashable) -> List:
+        """Empties every constraint of the owner and returns its objective terms (to be removed from the objective)."""
+        proto = self.model.Proto()
+        for start, end in self.constraints.pop(owner, []):
+            for index in range(start, end):
+                clear_constraint(proto.constraints[index])
+        return self.terms.pop(owner, [])
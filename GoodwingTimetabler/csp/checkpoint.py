@@ -0,0 +1,95 @@
+import datetime as dt
+import json
+import os
+import tempfile
+import time
+
+CHECKPOINT_VERSION = 1
+
+
+def atomic_write(path: str, data: bytes):
+    """
+    Replaces the content of path with data through a temporary file in the same folder, so readers
+    (and crashes) never see a partially written file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '_', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.chmod(tmp_path, 0o644)  # mkstemp creates the file readable by its owner only
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class CheckpointWriter:
+    """
+    Writes the incumbent solution to disk while the solver is running.\n
+    Writes are atomic (temporary file + rename), so a crash never leaves a truncated checkpoint,
+    and debounced: at most one write every min_interval seconds from the solution callback.\n
+    Parameters:\n
+    - path : str | Checkpoint file (JSON)
+    - min_interval : float | Minimum number of seconds between two debounced writes
+    - metadata : dict | Extra fields stored in every checkpoint (instance name, time budget...)
+    - elapsed_offset : float | Solving time already spent before this run (when resuming)
+    """
+    def __init__(self, path: str, min_interval: float = 5.0, metadata: dict = None, elapsed_offset: float = 0.0):
+        self.path = path
+        self.min_interval = min_interval
+        self.metadata = dict(metadata or {})
+        self.elapsed_offset = elapsed_offset
+        self.last_write = None
+        self.writes = 0
+
+    def due(self) -> bool:
+        """True if enough time has passed since the last write."""
+        return self.last_write is None or time.time() - self.last_write >= self.min_interval
+
+    def write(self, assignment: dict, objective: float, elapsed: float, **metadata):
+        """
+        Atomically replaces the checkpoint file.\n
+        Parameters:\n
+        - assignment : dict | 'courses' ([group, subject, course id, timeslot, room]) and 'teachers' ([group, subject, teacher]) lists
+        - objective : float | Objective value of the solution
+        - elapsed : float | Solving time of this run when the solution was found
+        - metadata : Extra fields for this write (solution count...)
+        """
+        data = {
+            'version': CHECKPOINT_VERSION,
+            'written_at': dt.datetime.now().isoformat(timespec='seconds'),
+            'objective': objective,
+            'elapsed': round(self.elapsed_offset + elapsed, 3),
+        }
+        data.update(self.metadata)
+        data.update(metadata)
+        data.update(assignment)
+
+        atomic_write(self.path, json.dumps(data, separators=(',', ':')).encode('utf-8'))
+
+        self.last_write = time.time()
+        self.writes += 1
+
+
+def load_checkpoint(path: str) -> dict:
+    """
+    Reads a checkpoint written by CheckpointWriter.\n
+    Returns None if the file does not exist or is not a valid checkpoint.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding='utf-8') as file:
+            data = json.load(file)
+    except (OSError, ValueError) as e:
+        print(f"Could not read checkpoint {path}: {e}")
+        return None
+    if data.get('version') != CHECKPOINT_VERSION or 'courses' not in data:
+        print(f"Ignoring checkpoint {path}: unsupported format")
+        return None
+    return data
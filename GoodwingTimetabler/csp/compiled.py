@@ -0,0 +1,143 @@
+import datetime as dt
+import hashlib
+import io
+import json
+import os
+from typing import Dict, Optional
+
+import numpy as np
+
+from .checkpoint import atomic_write
+from .objects import University, Room, Teacher, Subject, Group, Promotion, WeeklyAvailability
+
+# Name of the compiled instance, next to University.xlsx
+COMPILED_NAME = 'University.npz'
+
+# Bump when the content of the compiled file changes, so that older files are rebuilt
+COMPILED_VERSION = 2
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_signature(source_path: str) -> Dict:
+    """Size, modification time and SHA-256 of the source workbook."""
+    stat = os.stat(source_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': file_sha256(source_path)}
+
+
+def save_compiled(university: University, path: str, source: Dict = None):
+    """
+    Writes a university to a compiled .npz file (atomically).\n
+    The calendar, rooms, subjects and promotions are stored as small JSON metadata; the subject competences of the
+    teachers and their availability (a weekly bitmap, or a list of timeslots) as arrays.\n
+    Parameters:\n
+    - university : University | The instance
+    - path : str | Path of the .npz file
+    - source : dict | source_signature() of the workbook, taken before reading it; the file is stale once the workbook changes
+    """
+    subjects = university.subjects
+    meta = {
+        'version': COMPILED_VERSION,
+        'source': source,
+        'name': university.name,
+        'start_date': university.timeslots[0].day.isoformat(),
+        'days': university.days,
+        'time_ranges': [[start.isoformat(), end.isoformat()] for start, end in university.time_ranges],
+        'rooms': [[room.name, room.type, room.id] for room in university.rooms],
+        'subjects': [[subject.name, subject.id, subject.hours, subject.color] for subject in subjects],
+        'promotions': [[promo.name, [group.name for group in promo.groups], [subject.index for subject in promo.subjects]]
+                       for promo in university.promotions],
+        'teachers': [[teacher.first_name, teacher.last_name] for teacher in university.teachers],
+    }
+
+    # Competences in compressed sparse rows: the subjects of teacher t are subject_idx[subject_ptr[t]:subject_ptr[t + 1]]
+    # (-1 for a subject id that matched no subject)
+    teacher_subjects = [[subject.index if subject is not None else -1 for subject in teacher.subjects]
+                        for teacher in university.teachers]
+    subject_ptr = np.cumsum([0] + [len(indices) for indices in teacher_subjects], dtype=np.int64)
+    subject_idx = np.asarray([i for indices in teacher_subjects for i in indices], dtype=np.int32)
+
+    # Weekly patterns as (teachers x 7 x slots per day) bits, the other teachers as lists of timeslots (CSR as well)
+    slots_per_day = len(university.time_ranges)
+    weekly = np.zeros((len(university.teachers), 7, slots_per_day), dtype=bool)
+    is_weekly = np.zeros(len(university.teachers), dtype=bool)
+    slot_lists = []
+    for teacher in university.teachers:
+        available = teacher.available_slots
+        if isinstance(available, WeeklyAvailability) and available.slots_per_day == slots_per_day:
+            weekly[teacher.index] = available.to_array()
+            is_weekly[teacher.index] = True
+            slot_lists.append([])
+        else:
+            slot_lists.append(teacher.available_timeslots(len(university.timeslots)))
+    slot_ptr = np.cumsum([0] + [len(slots) for slots in slot_lists], dtype=np.int64)
+    slot_idx = np.asarray([slot for slots in slot_lists for slot in slots], dtype=np.int32)
+
+    buffer = io.BytesIO()
+    np.savez(buffer, meta=np.array(json.dumps(meta)), subject_ptr=subject_ptr, subject_idx=subject_idx,
+             weekly=np.packbits(weekly.reshape(len(weekly), -1), axis=1), is_weekly=is_weekly,
+             slot_ptr=slot_ptr, slot_idx=slot_idx)
+    atomic_write(path, buffer.getvalue())
+
+
+def is_fresh(meta: Dict, source_path: str) -> bool:
+    """True if the compiled file was built from the current content of source_path (or the source is gone)."""
+    if not os.path.exists(source_path):
+        return True
+    source = meta.get('source')
+    if not source:
+        return False
+    stat = os.stat(source_path)
+    if stat.st_size == source['size'] and stat.st_mtime_ns == source['mtime_ns']:
+        return True
+    # Touched (copied, checked out...) but maybe not modified
+    return stat.st_size == source['size'] and file_sha256(source_path) == source['sha256']
+
+
+def load_compiled(path: str, source_path: str = None) -> Optional[University]:
+    """
+    Rebuilds a university from a file written by save_compiled.\n
+    Parameters:\n
+    - path : str | Path of the .npz file
+    - source_path : str | Workbook the file was compiled from (no freshness check if None)
+    Returns:\n
+    - University | None if the file is missing, unreadable, of another version or older than the workbook
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            subject_ptr, subject_idx = data['subject_ptr'], data['subject_idx']
+            weekly, is_weekly = data['weekly'], data['is_weekly']
+            slot_ptr, slot_idx = data['slot_ptr'], data['slot_idx']
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Ignoring the compiled instance {path}: {e}")
+        return None
+    if meta.get('version') != COMPILED_VERSION or (source_path is not None and not is_fresh(meta, source_path)):
+        return None
+
+    time_ranges = [(dt.time.fromisoformat(start), dt.time.fromisoformat(end)) for start, end in meta['time_ranges']]
+    slots_per_day = len(time_ranges)
+    weekly = np.unpackbits(weekly, axis=1, count=7 * slots_per_day).astype(bool).reshape(-1, 7, slots_per_day)
+    slot_ptr, slot_idx = slot_ptr.tolist(), slot_idx.tolist()
+
+    rooms = [Room(name, type, id) for name, type, id in meta['rooms']]
+    subjects = [Subject(name, id, hours, color) for name, id, hours, color in meta['subjects']]
+    promotions = [Promotion(name, [Group(group) for group in groups], [subjects[i] for i in subject_ids])
+                  for name, groups, subject_ids in meta['promotions']]
+    subject_ptr, subject_idx = subject_ptr.tolist(), subject_idx.tolist()
+    teachers = [
+        Teacher(first_name, last_name,
+                [subjects[i] if i >= 0 else None for i in subject_idx[subject_ptr[t]:subject_ptr[t + 1]]],
+                WeeklyAvailability.from_array(weekly[t]) if is_weekly[t] else slot_idx[slot_ptr[t]:slot_ptr[t + 1]])
+        for t, (first_name, last_name) in enumerate(meta['teachers'])
+    ]
+    return University(meta['name'], rooms, teachers, promotions, dt.date.fromisoformat(meta['start_date']),
+                      meta['days'], time_ranges)
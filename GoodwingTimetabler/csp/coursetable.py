@@ -0,0 +1,201 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .objects import University
+
+# Integer columns of the table, in storage order
+COLUMNS = ('course_id', 'group_id', 'subject_id', 'promotion_id', 'session_no')
+
+
+class CourseTable:
+    """
+    Columnar table of the courses of the model, one row per course.\n
+    Groups and subjects are numbered per promotion (a subject taught in two promotions gets two subject ids, so
+    equal names never collide). The integer columns are NumPy arrays and the CP-SAT variables are parallel lists;
+    the row groupings used by the constraint builders are computed once, and again after an edit.
+    Removed courses keep their row (and variables) but are no longer active.\n
+    Parameters:\n
+    - university : University | The instance
+    """
+    def __init__(self, university: University):
+        self.university = university
+        self.groups = []  # group_id -> Group
+        self.group_promotion = []  # group_id -> promotion_id
+        self.subjects = []  # subject_id -> Subject
+        self.subject_promotion = []  # subject_id -> promotion_id
+        self.promotion_subjects = []  # promotion_id -> [subject_id]
+        for promotion_id, promo in enumerate(university.promotions):
+            for group in promo.groups:
+                self.groups.append(group)
+                self.group_promotion.append(promotion_id)
+            self.promotion_subjects.append(list(range(len(self.subjects), len(self.subjects) + len(promo.subjects))))
+            for subject in promo.subjects:
+                self.subjects.append(subject)
+                self.subject_promotion.append(promotion_id)
+
+        # Candidate teachers (indices in university.teachers) of every subject
+        self.candidates = [university.teachers_by_subject[subject.index] for subject in self.subjects]
+
+        self._columns = {name: [] for name in COLUMNS}
+        self._active = []
+        self.timeslot = []  # row -> IntVar
+        self.room = []  # row -> IntVar
+        self.teachers = {}  # (group_id, subject_id) -> teacher assignment IntVar
+        self._cache = {}
+
+    def __len__(self):
+        return len(self._active)
+
+    def add(self, group_id: int, subject_id: int, session_no: int, course_id: int, timeslot, room) -> int:
+        """Appends a course and returns its row."""
+        for name, value in zip(COLUMNS, (course_id, group_id, subject_id, self.group_promotion[group_id], session_no)):
+            self._columns[name].append(value)
+        self._active.append(True)
+        self.timeslot.append(timeslot)
+        self.room.append(room)
+        self._cache.clear()
+        return len(self._active) - 1
+
+    def remove(self, row: int):
+        """Deactivates a course (its row and variables are kept, so row numbers never change)."""
+        self._active[row] = False
+        self._cache.clear()
+
+    def _cached(self, name: str, compute):
+        if name not in self._cache:
+            self._cache[name] = compute()
+        return self._cache[name]
+
+    def column(self, name: str) -> np.ndarray:
+        return self._cached(name, lambda: np.asarray(self._columns[name], dtype=np.int64))
+
+    @property
+    def course_id(self) -> np.ndarray:
+        return self.column('course_id')
+
+    @property
+    def group_id(self) -> np.ndarray:
+        return self.column('group_id')
+
+    @property
+    def subject_id(self) -> np.ndarray:
+        return self.column('subject_id')
+
+    @property
+    def promotion_id(self) -> np.ndarray:
+        return self.column('promotion_id')
+
+    @property
+    def session_no(self) -> np.ndarray:
+        return self.column('session_no')
+
+    @property
+    def active(self) -> np.ndarray:
+        return self._cached('active', lambda: np.asarray(self._active, dtype=bool))
+
+    def rows(self, groups: List[int] = None) -> np.ndarray:
+        """Active rows (of the given group ids, all groups if None), in table order."""
+        mask = self.active
+        if groups is not None:
+            mask = mask & np.isin(self.group_id, groups)
+        return np.flatnonzero(mask)
+
+    def _grouping(self, *keys: str) -> Dict:
+        """Active rows split by the values of some columns, in table order."""
+        rows = self.rows()
+        if rows.size == 0:
+            return {}
+        values = np.stack([self.column(key)[rows] for key in keys], axis=1)
+        unique, inverse = np.unique(values, axis=0, return_inverse=True)
+        order = np.argsort(inverse.ravel(), kind='stable')
+        bounds = np.cumsum(np.bincount(inverse.ravel(), minlength=len(unique)))[:-1]
+        split = np.split(rows[order], bounds)
+        # Keys in order of first appearance (the instance order)
+        grouping = {tuple(int(v) for v in value) if len(keys) > 1 else int(value[0]): part
+                    for value, part in zip(unique, split)}
+        return dict(sorted(grouping.items(), key=lambda item: item[1][0]))
+
+    @property
+    def by_group(self) -> Dict[int, np.ndarray]:
+        """group_id -> active rows"""
+        return self._cached('by_group', lambda: self._grouping('group_id'))
+
+    @property
+    def by_subject(self) -> Dict[int, np.ndarray]:
+        """subject_id -> active rows (every group of the promotion)"""
+        return self._cached('by_subject', lambda: self._grouping('subject_id'))
+
+    @property
+    def by_group_subject(self) -> Dict[Tuple[int, int], np.ndarray]:
+        """(group_id, subject_id) -> active rows"""
+        return self._cached('by_group_subject', lambda: self._grouping('group_id', 'subject_id'))
+
+    @property
+    def by_teacher(self) -> Dict[int, np.ndarray]:
+        """Teacher index -> active rows the teacher can be assigned to (subject among the teacher's subjects)"""
+        def compute():
+            by_teacher = {}
+            for subject_id, rows in self.by_subject.items():
+                for teacher_idx in self.candidates[subject_id]:
+                    by_teacher.setdefault(teacher_idx, []).append(rows)
+            return {teacher_idx: np.sort(np.concatenate(parts)) for teacher_idx, parts in sorted(by_teacher.items())}
+        return self._cached('by_teacher', compute)
+
+    @property
+    def teacher_index(self) -> np.ndarray:
+        """row -> proto index of the teacher assignment variable of the course (-1 if no teacher can teach it)"""
+        def compute():
+            index = {key: var.Index() for key, var in self.teachers.items()}
+            return np.asarray([index.get(key, -1) for key in zip(self._columns['group_id'], self._columns['subject_id'])],
+                              dtype=np.int64)
+        return self._cached('teacher_index', compute)
+
+    @property
+    def timeslot_index(self) -> np.ndarray:
+        """row -> proto index of the timeslot variable"""
+        return self._cached('timeslot_index', lambda: np.asarray([var.Index() for var in self.timeslot], dtype=np.int64))
+
+    @property
+    def room_index(self) -> np.ndarray:
+        """row -> proto index of the room variable"""
+        return self._cached('room_index', lambda: np.asarray([var.Index() for var in self.room], dtype=np.int64))
+
+    @property
+    def row_by_course_id(self) -> Dict[int, int]:
+        return self._cached('row_by_course_id', lambda: {int(c): row for row, c in enumerate(self._columns['course_id'])})
+
+    def group_rows(self, groups: List[int] = None) -> List[Tuple[int, np.ndarray]]:
+        """[(group_id, active rows)] of the given group ids (all groups if None), in instance order."""
+        return [(group_id, rows) for group_id, rows in self.by_group.items() if groups is None or group_id in groups]
+
+    def teacher_var(self, row: int):
+        """Teacher assignment variable of the course at row (None if no teacher can teach the subject)."""
+        return self.teachers.get((self._columns['group_id'][row], self._columns['subject_id'][row]))
+
+    def key(self, row: int) -> Tuple[str, str, int]:
+        """(group name, subject name, course id) of a row, as stored in checkpoints."""
+        return (self.groups[self._columns['group_id'][row]].name, self.subjects[self._columns['subject_id'][row]].name,
+                self._columns['course_id'][row])
+
+    def to_index(self) -> Dict:
+        """Plain representation of the table with proto variable indices (see CSP.exportModelIndex)."""
+        return {
+            'columns': {name: list(values) for name, values in self._columns.items()},
+            'active': list(self._active),
+            'timeslot': [var.Index() for var in self.timeslot],
+            'room': [var.Index() for var in self.room],
+            'teachers': [[group_id, subject_id, var.Index()] for (group_id, subject_id), var in self.teachers.items()],
+        }
+
+    @classmethod
+    def from_index(cls, university: University, model, index: Dict) -> 'CourseTable':
+        """Rebuilds a table from to_index() on a model holding the same variables."""
+        table = cls(university)
+        var = model.get_int_var_from_proto_index
+        table._columns = {name: list(index['columns'][name]) for name in COLUMNS}
+        table._active = list(index['active'])
+        table.timeslot = [var(i) for i in index['timeslot']]
+        table.room = [var(i) for i in index['room']]
+        table.teachers = {(group_id, subject_id): var(i) for group_id, subject_id, i in index['teachers']}
+        return table
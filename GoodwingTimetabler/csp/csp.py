@@ -1,80 +1,132 @@
 from .objects import *
+from .telemetry import SolverTelemetry, TerminalRenderer, relative_gap
+from .profiler import BuildProfiler
+from .checkpoint import CheckpointWriter, load_checkpoint
+from .termination import StopRule, SearchState, FirstFeasible, parse_stop_rule
+from .modelcache import ModelCache, encode_term, decode_term
+from .blocks import ConstraintBlocks, clear_constraint
+from .coursetable import CourseTable
+from .solution import SolutionFrame
+from .schedulematrix import ScheduleMatrix, LUNCH_SLOT, LATE_SLOTS, first_appearance_counts
+from .parallelbuild import GROUP_HARD_FAMILIES, GROUP_SOFT_FAMILIES
 from ortools.sat.python import cp_model
-import yaml # Nested dictionnary pretty print purposes
+import numpy as np
 import time
-import sys
 import threading
-import psutil
 import os
+from contextlib import contextmanager, redirect_stdout
 
 # Schedule Intel imports
 from collections import defaultdict
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Union
 
 class ChronometerCallback(cp_model.CpSolverSolutionCallback):
-    def __init__(self, model, conflict_penalties, balance_penalties=None, gap_penalties=None, test=False):
+    """
+    Solution callback tracking the search and forwarding progress to a SolverTelemetry stream.\n
+    The objective comes from ObjectiveValue() and the conflict check reads a single aggregated
+    variable, so the per-solution cost does not grow with the number of penalty variables.\n
+    Parameters:\n
+    - model : CpModel | The solved model
+    - conflict_count : IntVar | Variable equal to the number of room/teacher conflicts (None if no conflicts are modelled)
+    - stop_rule : StopRule | Termination policy, evaluated on every solution (and periodically if time based)
+    - interactive : bool | Without stop_rule, ask the user whether to stop at the first conflict-free solution
+    - telemetry : SolverTelemetry | Event stream (a silent one is created if None)
+    - checkpoint : CheckpointWriter | If given, improving solutions are saved to disk (debounced)
+    - snapshot : Callable | Function building the checkpoint content from a value getter (e.g. CSP.snapshotAssignment)
+    - stop_search : Callable | Stops the solver from outside a callback (CpSolver.stop_search), used by time based rules
+    - phase : str | Name of the solve phase, added to every event (multi-phase solve)
+    - start_telemetry : bool | Start the telemetry stream (False for the phases after the first one)
+    """
+    def __init__(self, model, conflict_count=None, stop_rule: StopRule = None, interactive=True, telemetry: SolverTelemetry = None,
+                 checkpoint: CheckpointWriter = None, snapshot=None, stop_search=None, phase: str = None,
+                 start_telemetry: bool = True):
         super().__init__()
-        self.start_time = time.time()
+        self.model = model
+        self.conflict_count = conflict_count
+        self.telemetry = telemetry if telemetry is not None else SolverTelemetry()
+        self.checkpoint = checkpoint
+        self.snapshot = snapshot
+        self.stop_rule = stop_rule
+        self.stop_search = stop_search
+        self.stop_reason = None  # Description of the rule that stopped the search
+        self.phase = phase
+        self.event_fields = {'phase': phase} if phase else {}
         self.running = True
         self.paused = False
         self.pause_time = 0
-        self.accumulated_pause_time = 0
-        self.thread = threading.Thread(target=self.update_timer, daemon=True)
-        self.thread.start()
-        self.model = model
-        self.conflict_penalties = conflict_penalties
-        self.balance_penalties = balance_penalties or []
-        self.gap_penalties = gap_penalties or []
         self.found_feasible = False
         self.continue_search = True
-        self.max_cpu = 0
-        self.max_ram = 0
-        self.test = test
+        self.interactive = interactive
         self.best_objective = float('inf')  # Track best objective value
+        self.best_bound = None
+        self.last_conflicts = None
+        self.last_improvement = None  # Elapsed time of the last improving solution
         self.solution_count = 0  # Track number of solutions found
+        self.lock = threading.Lock()
+
+        if start_telemetry:
+            self.telemetry.start(
+                variables=len(model.Proto().variables),
+                constraints=len(model.Proto().constraints),
+                **self.event_fields
+            )
+        else:
+            self.telemetry.emit('phase', **self.event_fields)
+        # Time based rules (no improvement, deadline) must fire even when no solution comes in
+        self.poll_interval = None
+        if self.telemetry.heartbeat and self.telemetry.heartbeat > 0:
+            self.poll_interval = self.telemetry.heartbeat
+        if stop_rule is not None and stop_rule.time_based and stop_search is not None:
+            self.poll_interval = min(self.poll_interval or 0.5, 0.5)
+        self.thread = None
+        if self.poll_interval:
+            self.thread = threading.Thread(target=self.update_timer, daemon=True)
+            self.thread.start()
+
+    @property
+    def start_time(self):
+        return self.telemetry.start_wall
+
+    def search_state(self) -> SearchState:
+        """Current state of the search, as seen by the termination rules."""
+        has_solution = self.solution_count > 0
+        objective = self.best_objective if has_solution else None
+        return SearchState(
+            elapsed=self.telemetry.elapsed(),
+            objective=objective,
+            best_bound=self.best_bound,
+            gap=relative_gap(objective, self.best_bound),
+            solutions=self.solution_count,
+            conflicts=self.last_conflicts,
+            feasible=self.found_feasible,
+            last_improvement=self.last_improvement
+        )
+
+    def check_stop_rule(self) -> bool:
+        """Evaluates the termination policy, records why the search stops and returns True if it must."""
+        if self.stop_rule is None or not self.continue_search:
+            return False
+        with self.lock:
+            reason = self.stop_rule.explain(self.search_state()) if self.continue_search else None
+            if reason is None:
+                return False
+            self.continue_search = False
+            self.stop_reason = reason
+        print(f"\nStopping the search: termination policy '{self.stop_reason}' met")
+        return True
 
     def update_timer(self):
-        """Continuously update elapsed time every second until stopped."""
-        max_line_length = 0  # Track maximum line length
-        
+        """Emit heartbeat events and evaluate time based stop rules until stopped."""
+        last_heartbeat = 0
         while self.running:
             if not self.paused:
-                elapsed = time.time() - self.start_time - self.accumulated_pause_time
-                process = psutil.Process(os.getpid())  # Get current process
-                ram_usage = process.memory_info().rss / (1024 * 1024)  # Convert to MB
-                cpu_usage = process.cpu_percent(interval=0.1)/10  # CPU usage (%)
-                
-                if ram_usage > self.max_ram:
-                    self.max_ram = ram_usage
-                if cpu_usage > self.max_cpu:
-                    self.max_cpu = cpu_usage
-                
-                # Display with current objective value if available
-                objective_info = f"| Objective: {self.best_objective if self.best_objective != float('inf') else 'N/A'}"
-                solutions_info = f"| Solutions: {self.solution_count}"
-                
-                # Create the status line
-                status_line = f"Elapsed time: {elapsed:.2f}s | CPU: {cpu_usage:.2f}% | RAM: {ram_usage:.2f}MB | Peak CPU: {self.max_cpu:.2f}% | Max RAM: {self.max_ram:.2f}MB {objective_info} {solutions_info}"
-                
-                # Ensure line is at least as long as previous lines by padding with spaces
-                if len(status_line) < max_line_length:
-                    status_line += ' ' * (max_line_length - len(status_line))
-                else:
-                    max_line_length = len(status_line)
-                
-                # Try to use shutil to get terminal width if available
-                try:
-                    import shutil
-                    term_width = shutil.get_terminal_size().columns
-                    # Clear the entire line
-                    clear_line = '\r' + ' ' * term_width + '\r'
-                    sys.stdout.write(clear_line + status_line)
-                except (ImportError, AttributeError):
-                    # Fall back to simpler method if shutil is not available
-                    sys.stdout.write('\r' + status_line)
-                
-                sys.stdout.flush()
-            time.sleep(1)  # Update every second
+                now = time.time()
+                if self.telemetry.heartbeat and now - last_heartbeat >= self.telemetry.heartbeat:
+                    self.telemetry.emit('heartbeat', solutions=self.solution_count, **self.event_fields)
+                    last_heartbeat = now
+                if self.stop_rule is not None and self.stop_rule.time_based and self.check_stop_rule():
+                    self.stop_search()
+            time.sleep(self.poll_interval)
 
     def pause_chronometer(self):
         """Pause the chronometer."""
@@ -85,163 +137,152 @@ class ChronometerCallback(cp_model.CpSolverSolutionCallback):
     def resume_chronometer(self):
         """Resume the chronometer."""
         if self.paused:
-            self.accumulated_pause_time += time.time() - self.pause_time
+            self.telemetry.paused_time += time.time() - self.pause_time
             self.paused = False
 
     def OnSolutionCallback(self):
-        """Update elapsed time and objective value when a solution is found."""
+        """Record the new solution and decide whether to stop the search."""
         self.solution_count += 1
-        
-        # Calculate the objective value (sum of all penalties)
-        current_objective = 0
-        
-        # Sum conflict penalties
-        for penalty in self.conflict_penalties:
-            if isinstance(penalty, cp_model.IntVar):
-                current_objective += self.Value(penalty)
-            elif isinstance(penalty, cp_model.BoolVar):
-                current_objective += 1 if self.Value(penalty) else 0
-        
-        # Sum balance penalties
-        for penalty in self.balance_penalties:
-            current_objective += self.Value(penalty)
-        
-        # Sum gap penalties
-        for penalty in self.gap_penalties:
-            current_objective += self.Value(penalty)
-        
-        # Update best objective if this solution is better
+        current_objective = self.ObjectiveValue()
+        self.best_bound = self.BestObjectiveBound()
         if current_objective < self.best_objective:
             self.best_objective = current_objective
-        
-        # Check if this solution has no conflicts
-        has_conflicts = False
-        for penalty in self.conflict_penalties:
-            if isinstance(penalty, cp_model.IntVar):
-                if self.Value(penalty) > 0:
-                    has_conflicts = True
-                    break
-            elif isinstance(penalty, cp_model.BoolVar):
-                if self.Value(penalty):
-                    has_conflicts = True
-                    break
-        
-        if not has_conflicts and not self.found_feasible:
+            self.last_improvement = self.telemetry.elapsed()
+
+        conflicts = self.Value(self.conflict_count) if self.conflict_count is not None else 0
+        self.last_conflicts = conflicts
+        self.telemetry.emit(
+            'solution',
+            objective=current_objective,
+            best_bound=self.best_bound,
+            gap=relative_gap(current_objective, self.best_bound),
+            solutions=self.solution_count,
+            conflicts=conflicts,
+            **self.event_fields
+        )
+
+        if self.checkpoint is not None and self.checkpoint.due():
+            self.checkpoint.write(self.snapshot(self.Value), current_objective, self.telemetry.elapsed(),
+                                  solutions=self.solution_count, conflicts=conflicts)
+
+        first_feasible = conflicts == 0 and not self.found_feasible
+        if first_feasible:
             self.found_feasible = True
-            self.pause_chronometer()
             print(f"\nFound a feasible solution without conflicts! Objective value: {current_objective}")
-            if self.test == True:
+
+        if self.stop_rule is not None:
+            if self.check_stop_rule():
+                self.StopSearch()
+        elif first_feasible and self.interactive:
+            self.pause_chronometer()
+            time.sleep(2)
+            user_input = input("\nStop search and use this solution? (y/n): ")
+            if user_input.lower() == 'y':
                 self.continue_search = False
+                self.stop_reason = 'user'
                 self.StopSearch()
-            else:
-                time.sleep(2)
-                user_input = input("\nStop search and use this solution? (y/n): ")
-                if user_input.lower() == 'y':
-                    self.continue_search = False
-                    self.StopSearch()
-                self.resume_chronometer()
-
-    def EndSearch(self):
-        """Stop the chronometer and ensure the final time is displayed."""
+            self.resume_chronometer()
+
+    def EndSearch(self, status_name: str = None, close_telemetry: bool = True):
+        """Stop the chronometer, emit the final event and display the final time."""
         self.running = False  # Stop the loop
-        self.thread.join(timeout=1)  # Ensure the thread stops (with a small timeout)
-        elapsed = time.time() - self.start_time - self.accumulated_pause_time
+        if self.thread is not None:
+            self.thread.join(timeout=self.poll_interval + 1)  # Ensure the thread stops
+        elapsed = self.telemetry.elapsed()
+        best_objective = self.best_objective if self.solution_count else None
+        self.telemetry.emit(
+            'end',
+            status=status_name,
+            objective=best_objective,
+            best_bound=self.best_bound,
+            gap=relative_gap(best_objective, self.best_bound),
+            solutions=self.solution_count,
+            stop_reason=self.stop_reason,
+            **self.event_fields
+        )
+        if close_telemetry:
+            self.telemetry.close()
         print(f"\nTotal solving time: {elapsed:.2f}s | Final objective value: {self.best_objective}")
 
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
 class ScheduleIntelligence:
+    """
+    Analyses of a solution for the intelligence report.\n
+    The courses are laid out once in a ScheduleMatrix (groups x days x slots); the resource usage, gaps, online
+    transitions and late courses are NumPy reductions over it.\n
+    Parameters:\n
+    - generated_courses : [Course] | Courses of the solution
+    - university : University | The instance
+    """
     def __init__(self, generated_courses: List[Course], university: University):
         self.courses = generated_courses
         self.university = university
+        self.matrix = ScheduleMatrix.from_courses(university, generated_courses)
         self.intel = {
             'conflicts': {
                 'room_overlaps': [],
                 'teacher_overlaps': [],
                 'timeslot_conflicts': []
             },
+            # Number of courses per room, teacher, timeslot, subject and group
             'resource_utilization': {
-                'rooms': defaultdict(list),
-                'teachers': defaultdict(list),
-                'timeslots': defaultdict(int)
+                'rooms': {},
+                'teachers': {},
+                'timeslots': {}
             },
             'course_distribution': {
-                'by_subject': defaultdict(list),
-                'by_group': defaultdict(list)
-            }
+                'by_subject': {},
+                'by_group': {}
+            },
+            # Courses, gaps, online transitions and late courses per group
+            'penalties_by_group': {}
         }
-    
+
     def analyze_conflicts(self):
-        """Detect and log scheduling conflicts."""
-        # Sort courses by timeslot using university's timeslots list
-        timeslot_order = self.university.timeslots
+        """
+        Detect and log scheduling conflicts.\n
+        Courses are bucketed by (timeslot, room) and (timeslot, teacher), so only the courses sharing a bucket are
+        compared. Overlaps are listed in the order of a pairwise scan of the courses sorted by timeslot.
+        """
+        # Sort courses by timeslot (index in the university's timeslots list)
         sorted_courses = sorted(
-            self.courses, 
-            key=lambda x: timeslot_order.index(x.timeslot)
+            self.courses,
+            key=lambda x: x.timeslot.index
         )
-        
-        for i, course1 in enumerate(sorted_courses):
-            for course2 in sorted_courses[i+1:]:
-                # Room Overlap Detection
-                if (course1.timeslot == course2.timeslot and 
-                    course1.room == course2.room and 
-                    course1.room.name.lower() != "online" and course2.room.name.lower() != "online"):
-                    self.intel['conflicts']['room_overlaps'].append({
-                        'courses': [
-                            {'subject': course1.subject.name, 'group': course1.group.name},
-                            {'subject': course2.subject.name, 'group': course2.group.name}
-                        ],
-                        'timeslot': timeslot_order.index(course1.timeslot),
-                        'room': course1.room.name
-                    })
-                
-                # Teacher Overlap Detection
-                if (course1.timeslot == course2.timeslot and 
-                    course1.teacher == course2.teacher):
-                    self.intel['conflicts']['teacher_overlaps'].append({
-                        'courses': [
-                            {'subject': course1.subject.name, 'group': course1.group.name},
-                            {'subject': course2.subject.name, 'group': course2.group.name}
-                        ],
-                        'timeslot': timeslot_order.index(course1.timeslot),
-                        'teacher': course1.teacher.last_name
-                    })
-    
+
+        rooms, teachers = defaultdict(list), defaultdict(list)
+        for position, course in enumerate(sorted_courses):
+            if course.room.name.lower() != "online":
+                rooms[(course.timeslot, course.room)].append(position)
+            teachers[(course.timeslot, course.teacher)].append(position)
+
+        for kind, buckets in (('room', rooms), ('teacher', teachers)):
+            # Pairs of courses sharing a bucket, in (first, second) position order
+            pairs = sorted((first, second) for positions in buckets.values() if len(positions) > 1
+                           for i, first in enumerate(positions) for second in positions[i+1:])
+            overlaps = self.intel['conflicts'][f'{kind}_overlaps']
+            for first, second in pairs:
+                course1, course2 = sorted_courses[first], sorted_courses[second]
+                overlaps.append({
+                    'courses': [
+                        {'subject': course1.subject.name, 'group': course1.group.name},
+                        {'subject': course2.subject.name, 'group': course2.group.name}
+                    ],
+                    'timeslot': course1.timeslot.index,
+                    kind: course1.room.name if kind == 'room' else course1.teacher.last_name
+                })
+
     def analyze_resource_utilization(self):
-        """Analyze how resources are being used."""
-        timeslot_order = self.university.timeslots
-        
-        for course in self.courses:
-            timeslot_index = timeslot_order.index(course.timeslot)
-            
-            # Room utilization
-            self.intel['resource_utilization']['rooms'][course.room.name].append({
-                'subject': course.subject.name,
-                'group': course.group.name,
-                'timeslot': timeslot_index
-            })
-            
-            # Teacher utilization
-            self.intel['resource_utilization']['teachers'][course.teacher.last_name].append({
-                'subject': course.subject.name,
-                'group': course.group.name,
-                'timeslot': timeslot_index
-            })
-            
-            # Timeslot utilization
-            self.intel['resource_utilization']['timeslots'][timeslot_index] += 1
-            
-            # Course distribution
-            self.intel['course_distribution']['by_subject'][course.subject.name].append({
-                'group': course.group.name,
-                'timeslot': timeslot_index,
-                'room': course.room.name
-            })
-            
-            self.intel['course_distribution']['by_group'][course.group.name].append({
-                'subject': course.subject.name,
-                'timeslot': timeslot_index,
-                'room': course.room.name
-            })
-    
+        """Count the courses of every room, teacher, timeslot, subject and group."""
+        utilization = self.matrix.utilization()
+        for key in ('rooms', 'teachers', 'timeslots'):
+            self.intel['resource_utilization'][key] = utilization[key]
+        for key in ('by_subject', 'by_group'):
+            self.intel['course_distribution'][key] = utilization[key]
+        self.intel['penalties_by_group'] = self.matrix.group_penalties()
+
     def analyze_penalty_breakdown(self, solver, csp_obj):
         """
         Analyzes the breakdown of penalties in the final solution.
@@ -275,9 +316,10 @@ class ScheduleIntelligence:
         total_penalty = conflict_penalty_sum + balance_penalty_sum + gap_penalty_sum
         
         # Display breakdown
-        print(f"   - Conflict Penalties: {conflict_penalty_sum} ({(conflict_penalty_sum/total_penalty*100):.1f}% of total)")
-        print(f"   - Balance Penalties: {balance_penalty_sum} ({(balance_penalty_sum/total_penalty*100):.1f}% of total)")
-        print(f"   - Gap Penalties: {gap_penalty_sum} ({(gap_penalty_sum/total_penalty*100):.1f}% of total)")
+        share = 100 / total_penalty if total_penalty else 0
+        print(f"   - Conflict Penalties: {conflict_penalty_sum} ({conflict_penalty_sum * share:.1f}% of total)")
+        print(f"   - Balance Penalties: {balance_penalty_sum} ({balance_penalty_sum * share:.1f}% of total)")
+        print(f"   - Gap Penalties: {gap_penalty_sum} ({gap_penalty_sum * share:.1f}% of total)")
         print(f"   - Total Objective Value: {total_penalty}")
         
         # Display guidance
@@ -290,6 +332,9 @@ class ScheduleIntelligence:
         
         # Analyze late timeslots
         self.analyze_late_slots(csp_obj)
+
+        # Penalized patterns per group
+        self.analyze_group_penalties()
         
         # Print the end of the intelligence report after all analysis
         print("\n==== END OF INTELLIGENCE REPORT ====")
@@ -300,60 +345,23 @@ class ScheduleIntelligence:
         Uses exactly the same definition of gaps as the minimizeGaps function.
         Lunch break slots are not counted as gaps.
         """
-        # Group courses by day for each group
-        day_courses = defaultdict(lambda: defaultdict(list))
-        slots_per_day = len(self.university.time_ranges)
-        
-        # Define lunch break slot index (index % slots_per_day == 2)
-        lunch_slot = 2
-        
-        # Debug findings list
+        matrix = self.matrix
+        gaps = matrix.gaps(LUNCH_SLOT)
+
+        # Groups and days in order of their first course outside the lunch break
+        group_first, day_first = matrix.first_positions(matrix.slot != LUNCH_SLOT)
+        groups, days = np.nonzero(gaps.any(axis=2))
+        order = np.lexsort((day_first[groups, days], group_first[groups]))
+
+        slot_times = [f"{self.format_time(start)}-{self.format_time(end)}" for start, end in self.university.time_ranges]
         gap_findings = []
-        
-        for course in self.courses:
-            group_name = course.group.name
-            timeslot_idx = self.university.timeslots.index(course.timeslot)
-            day_idx = timeslot_idx // slots_per_day
-            slot_offset = timeslot_idx % slots_per_day
-            
-            # Skip lunch slots
-            if slot_offset == lunch_slot:
-                continue
-            
-            day_courses[group_name][day_idx].append(slot_offset)
-        
-        # Find days with gaps
-        for group_name, days in day_courses.items():
-            for day_idx, slots in days.items():
-                # Must have at least 2 scheduled courses to have gaps
-                if len(slots) >= 2:
-                    slots.sort()
-                    first_slot = min(slots)
-                    last_slot = max(slots)
-                    
-                    # Calculate the span (excluding lunch break)
-                    span = []
-                    for i in range(first_slot, last_slot + 1):
-                        if i != lunch_slot:  # Skip lunch slot
-                            span.append(i)
-                    
-                    # Calculate gaps (slots in span that aren't used)
-                    gaps = [i for i in span if i not in slots]
-                    
-                    if gaps:
-                        day_name = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"][day_idx % 7]
-                        week_num = day_idx // 7 + 1
-                        
-                        gap_times = []
-                        for gap in gaps:
-                            time_range = self.university.time_ranges[gap]
-                            start_time = time_range[0].strftime("%H:%M")
-                            end_time = time_range[1].strftime("%H:%M")
-                            gap_times.append(f"{start_time}-{end_time}")
-                        
-                        # Store finding
-                        gap_findings.append(f"Group {group_name}, Week {week_num} {day_name}: {len(gaps)} gap(s) at {', '.join(gap_times)}")
-        
+        for g, day_idx in zip(groups[order].tolist(), days[order].tolist()):
+            gap_slots = np.flatnonzero(gaps[g, day_idx]).tolist()
+            day_name = DAY_NAMES[day_idx % 7]
+            week_num = day_idx // 7 + 1
+            gap_times = [slot_times[gap] for gap in gap_slots]
+            gap_findings.append(f"Group {self.university.groups[g].name}, Week {week_num} {day_name}: {len(gap_slots)} gap(s) at {', '.join(gap_times)}")
+
         # Print findings
         if gap_findings:
             print("\n   Gaps found in schedule (but not penalized):")
@@ -368,173 +376,106 @@ class ScheduleIntelligence:
         Analyzes the final schedule to identify any remaining online-to-physical transitions.
         Adds a new section to the intelligence report with this information.
         """
-        # Find the online room
-        online_room = None
-        for room in self.university.rooms:
-            if room.name.lower() == "online":
-                online_room = room
-                break
-        
-        if not online_room:
-            print("\n5. ONLINE-PHYSICAL TRANSITIONS")
+        print("\n5. ONLINE-PHYSICAL TRANSITIONS")
+        matrix = self.matrix
+        if not matrix.online_rooms.any():
             print("   No online room found in the university instance.")
             return
-        
-        print("\n5. ONLINE-PHYSICAL TRANSITIONS")
-        
-        # Group courses by group and day
-        group_day_courses = defaultdict(lambda: defaultdict(list))
-        slots_per_day = len(self.university.time_ranges)
-        
-        for course in self.courses:
-            group_name = course.group.name
-            timeslot_idx = self.university.timeslots.index(course.timeslot)
-            day_idx = timeslot_idx // slots_per_day
-            slot_within_day = timeslot_idx % slots_per_day
-            
-            # Add to appropriate group and day, sorted by timeslot
-            group_day_courses[group_name][day_idx].append((slot_within_day, course))
-        
-        # Track transitions
-        total_transitions = 0
-        transition_details = []
-        
-        # Check each group's daily schedule for transitions
-        for group_name, days in group_day_courses.items():
-            group_transitions = 0
-            
-            for day_idx, courses in days.items():
-                # Sort courses by timeslot within the day
-                sorted_courses = sorted(courses, key=lambda x: x[0])
-                
-                # Check for transitions
-                for i in range(len(sorted_courses) - 1):
-                    current_slot, current_course = sorted_courses[i]
-                    next_slot, next_course = sorted_courses[i + 1]
-                    
-                    # Only check consecutive slots
-                    if next_slot == current_slot + 1:
-                        current_is_online = current_course.room.name.lower() == "online"
-                        next_is_online = next_course.room.name.lower() == "online"
-                        
-                        # If there's a transition
-                        if current_is_online != next_is_online:
-                            total_transitions += 1
-                            group_transitions += 1
-                            
-                            # Determine the direction
-                            direction = "Online → Physical" if current_is_online else "Physical → Online"
-                            
-                            # Get day name
-                            day_of_week = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"][day_idx % 7]
-                            week_num = day_idx // 7 + 1
-                            
-                            # Format times
-                            current_time = f"{self.format_time(current_course.timeslot.start)}-{self.format_time(current_course.timeslot.end)}"
-                            next_time = f"{self.format_time(next_course.timeslot.start)}-{self.format_time(next_course.timeslot.end)}"
-                            
-                            # Add to details
-                            transition_details.append({
-                                'group': group_name,
-                                'day': f"Week {week_num} {day_of_week}",
-                                'direction': direction,
-                                'from_course': f"{current_course.subject.name} ({current_time})",
-                                'to_course': f"{next_course.subject.name} ({next_time})"
-                            })
-            
-            if group_transitions > 0:
-                print(f"   - Group {group_name}: {group_transitions} transitions")
-        
-        print(f"   - Total transitions in schedule: {total_transitions}")
-        
-        # If there are transitions, show details
-        if transition_details:
-            print("\n   Transition Details:")
-            for i, detail in enumerate(transition_details[:10], 1):  # Show only first 10 to avoid overwhelming
-                print(f"     {i}. {detail['group']} on {detail['day']}: {detail['direction']}")
-                print(f"        From: {detail['from_course']}")
-                print(f"        To:   {detail['to_course']}")
-            
-            if len(transition_details) > 10:
-                print(f"     ... and {len(transition_details) - 10} more transitions")
-        else:
+
+        transitions = matrix.transitions()
+        per_group = transitions.sum(axis=(1, 2))
+
+        # Groups and days in order of their first course
+        group_first, day_first = matrix.first_positions()
+        for g in np.argsort(group_first, kind='stable').tolist():
+            if per_group[g] > 0:
+                print(f"   - Group {self.university.groups[g].name}: {per_group[g]} transitions")
+        print(f"   - Total transitions in schedule: {int(per_group.sum())}")
+
+        groups, days, slots = np.nonzero(transitions)
+        if not len(groups):
             print("   No transitions found - online courses are optimally grouped!")
+            return
+
+        order = np.lexsort((slots, day_first[groups, days], group_first[groups]))
+        print("\n   Transition Details:")
+        # Show only the first 10 to avoid overwhelming
+        for i, (g, day_idx, slot) in enumerate(zip(groups[order][:10].tolist(), days[order][:10].tolist(), slots[order][:10].tolist()), 1):
+            current_course = self.courses[matrix.course[g, day_idx, slot]]
+            next_course = self.courses[matrix.first_course[g, day_idx, slot + 1]]
+            direction = "Online → Physical" if matrix.online_rooms[current_course.room.index] else "Physical → Online"
+            current_time = f"{self.format_time(current_course.timeslot.start)}-{self.format_time(current_course.timeslot.end)}"
+            next_time = f"{self.format_time(next_course.timeslot.start)}-{self.format_time(next_course.timeslot.end)}"
+            print(f"     {i}. {self.university.groups[g].name} on Week {day_idx // 7 + 1} {DAY_NAMES[day_idx % 7]}: {direction}")
+            print(f"        From: {current_course.subject.name} ({current_time})")
+            print(f"        To:   {next_course.subject.name} ({next_time})")
+
+        if len(groups) > 10:
+            print(f"     ... and {len(groups) - 10} more transitions")
 
     def format_time(self, time_obj):
         """Helper method to format time objects consistently"""
         return time_obj.strftime("%H:%M")
-    
+
     def analyze_late_slots(self, csp_obj):
         """
         Analyzes the schedule to identify courses scheduled in the last two timeslots of each day.
         """
         print("\n6. LATE TIMESLOT ANALYSIS")
-        
-        # Number of timeslots per day
-        slots_per_day = len(self.university.time_ranges)
-        
-        # Identify the last two timeslots of each day
-        late_slot_offsets = [slots_per_day - 2, slots_per_day - 1]
-        
-        # Group courses by late timeslots
-        late_courses = []
-        late_by_group = defaultdict(int)
-        
-        for course in self.courses:
-            timeslot_idx = self.university.timeslots.index(course.timeslot)
-            day_idx = timeslot_idx // slots_per_day
-            slot_offset = timeslot_idx % slots_per_day
-            
-            if slot_offset in late_slot_offsets:
-                late_courses.append(course)
-                late_by_group[course.group.name] += 1
-        
-        # Get the day names and times for better readability
-        day_names = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-        
-        # Get time ranges
+        matrix = self.matrix
+        slots_per_day = matrix.slots_per_day
+
+        # Time ranges of the last two timeslots of each day
         last_slots_times = []
-        for offset in late_slot_offsets:
-            if offset < len(self.university.time_ranges):
-                time_range = self.university.time_ranges[offset]
-                start_time = time_range[0].strftime("%H:%M")
-                end_time = time_range[1].strftime("%H:%M")
-                last_slots_times.append(f"{start_time}-{end_time}")
-        
-        # Report statistics
+        for offset in range(slots_per_day - LATE_SLOTS, slots_per_day):
+            time_range = self.university.time_ranges[offset]
+            last_slots_times.append(f"{self.format_time(time_range[0])}-{self.format_time(time_range[1])}")
+
+        late = np.flatnonzero(matrix.late(LATE_SLOTS))
         total_courses = len(self.courses)
-        late_course_count = len(late_courses)
-        late_percentage = (late_course_count / total_courses * 100) if total_courses > 0 else 0
-        
+        late_percentage = (len(late) / total_courses * 100) if total_courses > 0 else 0
         print(f"   - Late timeslots: {', '.join(last_slots_times)}")
-        print(f"   - Courses in late timeslots: {late_course_count} ({late_percentage:.1f}% of all courses)")
-        
+        print(f"   - Courses in late timeslots: {len(late)} ({late_percentage:.1f}% of all courses)")
+
         # Report by group
+        late_by_group = first_appearance_counts(matrix.group[late], [group.name for group in self.university.groups])
         if late_by_group:
             print("\n   Distribution by group:")
             for group_name, count in sorted(late_by_group.items(), key=lambda x: x[1], reverse=True):
                 print(f"     - {group_name}: {count} late courses")
-        
+
         # List the first few late courses as examples
-        if late_courses:
+        if len(late):
             print("\n   Sample late courses:")
-            for i, course in enumerate(late_courses[:5]):
-                timeslot_idx = self.university.timeslots.index(course.timeslot)
-                day_idx = timeslot_idx // slots_per_day
-                day_name = day_names[day_idx % 7]
-                week_num = day_idx // 7 + 1
-                
-                time_str = f"{course.timeslot.start.strftime('%H:%M')}-{course.timeslot.end.strftime('%H:%M')}"
-                
+            for i, position in enumerate(late[:5].tolist()):
+                course = self.courses[position]
+                day_idx = int(matrix.day[position])
+                time_str = f"{self.format_time(course.timeslot.start)}-{self.format_time(course.timeslot.end)}"
                 print(f"     {i+1}. {course.subject.name} for {course.group.name}")
-                print(f"        Week {week_num} {day_name} at {time_str}")
+                print(f"        Week {day_idx // 7 + 1} {DAY_NAMES[day_idx % 7]} at {time_str}")
                 print(f"        Room: {course.room.name}, Teacher: {course.teacher.first_name} {course.teacher.last_name}")
-            
-            if len(late_courses) > 5:
-                print(f"     ... and {len(late_courses) - 5} more late courses")
+
+            if len(late) > 5:
+                print(f"     ... and {len(late) - 5} more late courses")
         else:
             print("   No courses scheduled in late timeslots!")
 
+    def analyze_group_penalties(self, top: int = 5):
+        """Lists the groups with the most gaps, online transitions and late courses."""
+        print("\n7. PENALIZED PATTERNS BY GROUP")
+        penalties = self.intel['penalties_by_group'] or self.matrix.group_penalties()
+        ranked = sorted(((name, counts) for name, counts in penalties.items()
+                         if counts['gaps'] + counts['transitions'] + counts['late']),
+                        key=lambda item: item[1]['gaps'] + item[1]['transitions'] + item[1]['late'], reverse=True)
+        if not ranked:
+            print("   No gaps, transitions or late courses in any group.")
+            return
+        for name, counts in ranked[:top]:
+            print(f"   - {name}: {counts['gaps']} gap(s), {counts['transitions']} transition(s), {counts['late']} late course(s) "
+                  f"out of {counts['courses']}")
+        if len(ranked) > top:
+            print(f"   ... and {len(ranked) - top} more groups")
+
     def generate_report(self):
         """Generate a comprehensive scheduling intelligence report."""
         print("\n==== SCHEDULING INTELLIGENCE REPORT ====")
@@ -558,20 +499,20 @@ class ScheduleIntelligence:
         print("   Top 3 Most Used Rooms:")
         room_usage = sorted(
             self.intel['resource_utilization']['rooms'].items(), 
-            key=lambda x: len(x[1]), 
+            key=lambda x: x[1], 
             reverse=True
         )[:3]
-        for room, courses in room_usage:
-            print(f"     * {room}: {len(courses)} courses")
+        for room, count in room_usage:
+            print(f"     * {room}: {count} courses")
         
         print("   Top 3 Most Used Teachers:")
         teacher_usage = sorted(
             self.intel['resource_utilization']['teachers'].items(), 
-            key=lambda x: len(x[1]), 
+            key=lambda x: x[1], 
             reverse=True
         )[:3]
-        for teacher, courses in teacher_usage:
-            print(f"     * {teacher}: {len(courses)} courses")
+        for teacher, count in teacher_usage:
+            print(f"     * {teacher}: {count} courses")
         
         # Timeslot Distribution
         print("\n3. TIMESLOT DISTRIBUTION")
@@ -591,119 +532,381 @@ class ScheduleIntelligence:
         # The analyze_penalty_breakdown method is responsible for calling this
 
 
+# Families of the objective, in the order they are built (soft constraint methods + conflicts)
+OBJECTIVE_FAMILIES = ('conflicts', 'balanceCoursesAcrossDays', 'balanceSubjectsAcrossWeeks', 'minimizeGaps',
+                      'minimize_campus_returns', 'minimize_late_slots')
+
+
 class CSP:
-    def __init__(self, university: University, test = False):
+    """
+    CP-SAT model of the timetabling problem, built and solved on instantiation.\n
+    Parameters:\n
+    - university : University | The instance to schedule
+    - test : bool | Benchmark mode: 1200s budget and stop at the first conflict-free solution
+    - max_time : int | Solver time budget in seconds (asked on stdin if None and interactive)
+    - num_workers : int | Number of CP-SAT search workers (up to 4 by default)
+    - interactive : bool | If False, never prompt the user (batch mode)
+    - telemetry : SolverTelemetry | Where to stream solver events (a terminal status line is used if None)
+    - show_progress : bool | Render the live status line on the terminal
+    - profile : bool | Record time, memory and model size per constraint family (see build_profiler)
+    - profile_dir : str | If given with profile, a cProfile dump per constraint family is written there
+    - checkpoint_path : str | If given, the incumbent solution is saved there during the search
+    - checkpoint_interval : float | Minimum number of seconds between two checkpoint writes
+    - resume : bool | Start from the checkpoint found at checkpoint_path (as hints) with the remaining time budget
+    - stop_rule : StopRule | str | Termination policy (e.g. "gap<1% | stall>60s"), replaces the interactive prompt.
+      Defaults to stopping at the first conflict-free solution in test mode
+    - phased : bool | Solve in phases: conflicts only, then the full objective hinted from the conflict-free solution
+    - polish : [str] | Objective families (see OBJECTIVE_FAMILIES) lexicographically improved after the full objective (implies phased)
+    - phase_budgets : [float] | Share of the time budget of each phase (feasibility, optimization, polish), unused time is carried over
+    - model_cache : ModelCache | If given, the model is loaded from this cache when the instance was already built, and stored in it otherwise
+    - build_workers : int | Processes building the per-group constraint families in parallel (1 to build everything in this process)
+    - editable : bool | Record which entity owns every constraint, so that the model can be edited and solved again
+      (see update_teacher_availability, set_subject_hours and resolve). Built in this process, without the model cache
+    - report : bool | Print the scheduling intelligence report after solving. When False, call intelligenceReport() later
+      (the output pipeline writes it to report.txt while the other artefacts are generated)
+    """
+    def __init__(self, university: University, test = False, max_time: int = None, num_workers: int = None, interactive: bool = True,
+                 telemetry: SolverTelemetry = None, show_progress: bool = True, profile: bool = False, profile_dir: str = None,
+                 checkpoint_path: str = None, checkpoint_interval: float = 5.0, resume: bool = False, stop_rule: StopRule = None,
+                 phased: bool = False, polish: List[str] = None, phase_budgets: List[float] = None,
+                 model_cache: ModelCache = None, build_workers: int = 1, editable: bool = False, report: bool = True):
         self.university = university
         self.model = cp_model.CpModel()
-        self.variables = {}  # Dictionary to store variables for each course
-        self.teacher_assignments = {}  # Dictionary to store teacher assignment variables per group and subject
+        self.courses = CourseTable(university)  # Course rows with their variables, and teacher assignment variables
         self.generated_courses: List[Course] = []  # List of all generated courses
+        self.solution: SolutionFrame = None  # Columnar view of generated_courses
         self.solver = cp_model.CpSolver()
         self.chronometer = None
         self.test = test
+        self.max_time = max_time
+        self.num_workers = num_workers
+        self.interactive = interactive and not test
+        self.report = report
+        self.telemetry = telemetry if telemetry is not None else SolverTelemetry()
+        if show_progress:
+            self.telemetry.add_listener(TerminalRenderer())
+            if not self.telemetry.heartbeat:
+                self.telemetry.heartbeat = 1.0
+        self.status = cp_model.UNKNOWN
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self.resumed_from = load_checkpoint(checkpoint_path) if resume else None
+        if isinstance(stop_rule, str):
+            stop_rule = parse_stop_rule(stop_rule)
+        if stop_rule is None and test:
+            stop_rule = FirstFeasible()
+        self.stop_rule = stop_rule
+        self.polish = list(polish or [])
+        unknown_families = [family for family in self.polish if family not in OBJECTIVE_FAMILIES]
+        if unknown_families:
+            raise ValueError(f"Unknown objective families {unknown_families}, expected some of {list(OBJECTIVE_FAMILIES)}")
+        self.phased = phased or bool(self.polish)
+        self.phase_budgets = phase_budgets
+        self.phase_stats = []  # Statistics of every solve phase
+        self.solution_count = 0
+        self.stop_reason = None
+        self.build_time = 0.0
+        self.solve_time = 0.0
 
         # Store objective terms
         self.gap_penalties = []  # For storing gap penalties
         self.balance_penalties = []  # For storing balance penalties
         self.conflict_penalties = []  # For storing conflict penalties
+        self.conflict_count = None  # Number of conflicts in a solution (sum of conflict penalties)
+        self.objective_terms = {}  # Objective terms of each family of OBJECTIVE_FAMILIES
+        self.total_cost = None  # Full objective expression
+        self.conflict_constraint = None  # Index of the constraint defining conflict_count
+
+        # Incremental editing (editable models only)
+        self.blocks = ConstraintBlocks(self.model) if editable else None
+        self.teacher_courses = defaultdict(list)  # Teacher index -> [(group id, is_assigned, timeslot var)] of every course
+        self.last_solution = None  # Values of every variable in the last solution (hint of resolve)
+        if editable and (model_cache is not None or build_workers > 1):
+            print("Editable model: building in this process, without the model cache")
+            model_cache, build_workers = None, 1
+
+        self.build_profiler = BuildProfiler(self.model, enabled=profile, cprofile_dir=profile_dir)
 
-        print("Generating the variables...")
-        self.createVariables()
-        print("Created the variables.")
-        #self.printVariables()
-        print("Creating the constraints...")
-        self.createConstraints()
-        self.createSoftConstraints()
-        print("Created the constraints")
+        build_start = time.time()
+        self.model_cache_hit = False
+        cached = None
+        if model_cache is not None:
+            cache_key = model_cache.key(university, self.modelOptions())
+            cached = model_cache.load(cache_key)
+        if cached is not None:
+            with self.build_profiler.phase('loadCachedModel'):
+                self.loadCachedModel(*cached)
+            self.model_cache_hit = True
+            print(f"Loaded the model from the cache ({cache_key[:12]})")
+        else:
+            print("Generating the variables...")
+            with self.build_profiler.phase('createVariables'):
+                self.createVariables()
+            print("Created the variables.")
+            #self.printVariables()
+            print("Creating the constraints...")
+            if editable:
+                self.createEditableConstraints()
+            elif build_workers > 1 and len(self.courses.by_group) > 1:
+                self.createConstraintsParallel(build_workers)
+            else:
+                self.createConstraints()
+                self.createSoftConstraints()
+            print("Created the constraints")
+            if model_cache is not None:
+                model_cache.store(cache_key, self.model, self.exportModelIndex(),
+                                  instance=university.name, build_time=round(time.time() - build_start, 3))
+        if self.resumed_from is not None:
+            self.applyCheckpointHints(self.resumed_from)
+        self.build_time = time.time() - build_start
+        self.build_profiler.stop()
+        if profile:
+            self.build_profiler.print_summary()
         self.solveCSP()
 
     def createVariables(self):
-        overall_course_idx = 0
-        
+        courses = self.courses
+        timeslot_duration = self.university.timeslot_duration  # Assume in hours
+
         # First, create teacher assignment variables for each group-subject pair
-        for promo in self.university.promotions:
-            for group in promo.groups:
-                if group.name not in self.teacher_assignments:
-                    self.teacher_assignments[group.name] = {}
-                
-                for subject in promo.subjects:
-                    # Filter teachers who can teach this subject
-                    valid_teachers = [i for i, t in enumerate(self.university.teachers) if subject in t.subjects]
-                    
-                    if valid_teachers:  # Only create assignment if there are valid teachers
-                        # Create a single teacher variable for all courses of this subject for this group
-                        teacher_var = self.model.NewIntVarFromDomain(
-                            cp_model.Domain.FromValues(valid_teachers),
-                            f"teacher_assignment_{group.name}_{subject.name}"
-                        )
-                        self.teacher_assignments[group.name][subject.name] = teacher_var
-        
-        # Now create the course variables using the teacher assignments
-        for promo in self.university.promotions:
-            for group in promo.groups:
-                self.variables[group.name] = {}
-                for subject in promo.subjects:
-                    self.variables[group.name][subject.name] = {}
-                    
-                    # Calculate number of timeslots needed for the subject
-                    required_hours = subject.hours
-                    timeslot_duration = self.university.timeslot_duration  # Assume in hours
-                    num_courses = int(required_hours // timeslot_duration)
-                    
-                    for idx_course in range(num_courses):
-                        overall_course_idx += 1
-                        # Timeslot variable
-                        timeslot_var = self.model.new_int_var(0, len(self.university.timeslots) - 1, f"course_{overall_course_idx}_timeslot")
-                        
-                        # Room variable
-                        room_var = self.model.new_int_var(0, len(self.university.rooms) - 1, f"course_{overall_course_idx}_room")
-
-                        # Create the variable (without a separate teacher variable per course)
-                        self.variables[group.name][subject.name][overall_course_idx] = {
-                            'subject': subject.name, 
-                            'group': group.name, 
-                            'timeslot': timeslot_var, 
-                            'room': room_var
-                        }
-                    
+        for group_id, group in enumerate(courses.groups):
+            for subject_id in courses.promotion_subjects[courses.group_promotion[group_id]]:
+                # Teachers who can teach this subject
+                valid_teachers = courses.candidates[subject_id]
+                if valid_teachers:  # Only create assignment if there are valid teachers
+                    # Create a single teacher variable for all courses of this subject for this group
+                    courses.teachers[group_id, subject_id] = self.model.NewIntVarFromDomain(
+                        cp_model.Domain.FromValues(valid_teachers),
+                        f"teacher_assignment_{group.name}_{courses.subjects[subject_id].name}"
+                    )
+
+        # Now create the course variables, one row per course
+        for group_id in range(len(courses.groups)):
+            for subject_id in courses.promotion_subjects[courses.group_promotion[group_id]]:
+                # Calculate number of timeslots needed for the subject
+                num_courses = int(courses.subjects[subject_id].hours // timeslot_duration)
+                for session_no in range(num_courses):
+                    self.addCourseVariables(group_id, subject_id, session_no)
+
+    def addCourseVariables(self, group_id: int, subject_id: int, session_no: int) -> int:
+        """Creates the timeslot and room variables of a new course and returns its row."""
+        course_id = len(self.courses) + 1
+        timeslot_var = self.model.new_int_var(0, len(self.university.timeslots) - 1, f"course_{course_id}_timeslot")
+        room_var = self.model.new_int_var(0, len(self.university.rooms) - 1, f"course_{course_id}_room")
+        return self.courses.add(group_id, subject_id, session_no, course_id, timeslot_var, room_var)
+
+    def modelOptions(self) -> dict:
+        """Options changing the built model, part of the model cache key (none for now)."""
+        return {}
+
+    def exportModelIndex(self) -> dict:
+        """Maps from the Python side of the model to the proto variable indices, stored in the model cache."""
+        return {
+            'courses': self.courses.to_index(),
+            'conflict_count': self.conflict_count.Index() if self.conflict_count is not None else None,
+            'conflict_penalties': [encode_term(term) for term in self.conflict_penalties],
+            'balance_penalties': [encode_term(term) for term in self.balance_penalties],
+            'gap_penalties': [encode_term(term) for term in self.gap_penalties],
+            'objective_terms': {family: [encode_term(term) for term in terms] for family, terms in self.objective_terms.items()},
+        }
+
+    def loadCachedModel(self, model: cp_model.CpModel, index: dict):
+        """Uses a model loaded from the cache and rebuilds the Python side of it from exportModelIndex()."""
+        self.model = model
+        self.build_profiler.model = model
+        var = model.get_int_var_from_proto_index
+        self.courses = CourseTable.from_index(self.university, model, index['courses'])
+        self.conflict_count = var(index['conflict_count']) if index['conflict_count'] is not None else None
+        self.conflict_penalties = [decode_term(model, term) for term in index['conflict_penalties']]
+        self.balance_penalties = [decode_term(model, term) for term in index['balance_penalties']]
+        self.gap_penalties = [decode_term(model, term) for term in index['gap_penalties']]
+        self.objective_terms = {family: [decode_term(model, term) for term in terms]
+                                for family, terms in index['objective_terms'].items()}
+        penalties = self.balance_penalties + self.conflict_penalties + self.gap_penalties
+        self.total_cost = sum(penalties) if penalties else None
+
+    def snapshotAssignment(self, value) -> dict:
+        """
+        Compact copy of a solution, as stored in checkpoints.\n
+        Parameters:\n
+        - value : Callable | Value getter (solver.Value or the Value method of a solution callback)
+        """
+        table = self.courses
+        courses = [[*table.key(row), value(table.timeslot[row]), value(table.room[row])] for row in table.rows()]
+        teachers = [[table.groups[group_id].name, table.subjects[subject_id].name, value(teacher_var)]
+                    for (group_id, subject_id), teacher_var in table.teachers.items()]
+        return {'courses': courses, 'teachers': teachers}
+
+    def applyCheckpointHints(self, checkpoint: dict):
+        """Uses a checkpointed solution as a hint for the search. Entries not matching the model are ignored."""
+        table = self.courses
+        hinted = 0
+        for group_name, subject_name, course_id, timeslot, room in checkpoint['courses']:
+            row = table.row_by_course_id.get(course_id)
+            if row is None or not table.active[row] or table.key(row) != (group_name, subject_name, course_id):
+                continue
+            self.model.AddHint(table.timeslot[row], timeslot)
+            self.model.AddHint(table.room[row], room)
+            hinted += 1
+        teacher_vars = {(table.groups[group_id].name, table.subjects[subject_id].name): teacher_var
+                        for (group_id, subject_id), teacher_var in table.teachers.items()}
+        for group_name, subject_name, teacher in checkpoint['teachers']:
+            teacher_var = teacher_vars.get((group_name, subject_name))
+            if teacher_var is not None:
+                self.model.AddHint(teacher_var, teacher)
+        print(f"Resuming from checkpoint (objective {checkpoint['objective']}, {checkpoint['elapsed']}s spent): {hinted} courses hinted")
 
     def printVariables(self):
-        print(yaml.dump(self.variables, allow_unicode=True, default_flow_style=False))
+        table = self.courses
+        for row in table.rows():
+            group_name, subject_name, course_id = table.key(row)
+            print(f"{group_name} | {subject_name} | course {course_id} (session {table.session_no[row]}): "
+                  f"{table.timeslot[row]}, {table.room[row]}")
 
 
     def createConstraints(self):
+        phase = self.build_profiler.phase
         print(" - Room overlaps ...")
-        self.noRoomOverlap()
+        with phase('noRoomOverlap'):
+            self.noRoomOverlap()
         print(" - Max 30% online hours")
-        self.limit_online_hours()
+        with phase('limit_online_hours'):
+            self.limit_online_hours()
         print(" - Courses overlaps ...")
-        self.noMultipleCoursesOnTimeslotForGroup()
+        with phase('noMultipleCoursesOnTimeslotForGroup'):
+            self.noMultipleCoursesOnTimeslotForGroup()
         print(" - Teacher overlaps ...")
-        self.noTeacherOverlap()
+        with phase('noTeacherOverlap'):
+            self.noTeacherOverlap()
         print(" - Teacher availability ...")
-        self.teacherAvailabilityConstraint()
+        with phase('teacherAvailabilityConstraint'):
+            self.teacherAvailabilityConstraint()
         print(" - Lunch break ...")
-        self.ensureLunchBreak()
+        with phase('ensureLunchBreak'):
+            self.ensureLunchBreak()
         print(" - Weekends restrictions ...")
-        self.restrictWeekendTimeslots()
+        with phase('restrictWeekendTimeslots'):
+            self.restrictWeekendTimeslots()
+
+    def createConstraintsParallel(self, workers: int):
+        """
+        Builds the whole model with the per-group families (see parallelbuild) generated by a process pool.\n
+        Each worker builds the families of a chunk of groups over the shared variables and returns its block as text
+        format. Meanwhile, this process builds the families linking courses of different groups (room and teacher
+        overlaps). The blocks are then appended to the model in group order, with their own variables renumbered.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        from .parallelbuild import split_groups, build_group_block, shift_references, shift_term
+
+        phase = self.build_profiler.phase
+        index = self.exportModelIndex()
+        base_text = str(self.model.Proto())
+        base_size = len(self.model.Proto().variables)
+        by_group = self.courses.by_group
+        chunks = split_groups({group_id: len(rows) for group_id, rows in by_group.items()}, workers * 2)
+        print(f" - Building the constraints of {len(by_group)} groups in {len(chunks)} blocks with {workers} processes ...")
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(build_group_block, {
+                'university': self.university,
+                'base_text': base_text,
+                'base_size': base_size,
+                'courses': index['courses'],
+                'groups': chunk,
+            }) for chunk in chunks]
+
+            print(" - Room overlaps ...")
+            with phase('noRoomOverlap'):
+                self.noRoomOverlap()
+            print(" - Teacher overlaps ...")
+            with phase('noTeacherOverlap'):
+                self.noTeacherOverlap()
+
+            print(" - Merging the group blocks ...")
+            terms = {family: [] for family in GROUP_SOFT_FAMILIES}
+            with phase('groupBlocks'):
+                for future in futures:
+                    text, created, block_terms = future.result()
+                    # The block variables follow the shared ones in the block, and the current end of the model here
+                    shift = len(self.model.Proto().variables) - base_size
+                    self.model.Proto().merge_text_format(shift_references(text, base_size, shift))
+                    for family, family_terms in block_terms.items():
+                        terms[family].extend(decode_term(self.model, shift_term(term, base_size, shift))
+                                             for term in family_terms)
+
+        for family in GROUP_SOFT_FAMILIES:
+            self.objective_terms[family] = terms[family]
+            if family == 'minimizeGaps':
+                self.gap_penalties.extend(terms[family])
+            else:
+                self.balance_penalties.extend(terms[family])
+        self.createObjective()
+
+    def createEditableConstraints(self):
+        """
+        Builds the whole model with every constraint registered in self.blocks under the entity owning it:
+        the pairs of courses for room and teacher overlaps, the teachers for their availability, and the
+        groups for the per-group families (see parallelbuild), which are built one group at a time.
+        """
+        phase = self.build_profiler.phase
+        print(" - Room overlaps ...")
+        with phase('noRoomOverlap'):
+            self.noRoomOverlap()
+        print(" - Teacher overlaps ...")
+        with phase('noTeacherOverlap'):
+            self.noTeacherOverlap()
+        print(f" - Per-group constraints of {len(self.courses.by_group)} groups ...")
+        for family in GROUP_HARD_FAMILIES + GROUP_SOFT_FAMILIES:
+            with phase(family):
+                for group_id in self.courses.by_group:
+                    self.buildGroupFamily(group_id, family)
+        self.createObjective()
+
+    def buildGroupFamily(self, group_id: int, family: str):
+        """Builds a per-group constraint family for a single group, registered in self.blocks under the group."""
+        balance_start, gap_start = len(self.balance_penalties), len(self.gap_penalties)
+        start = len(self.model.Proto().constraints)
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            getattr(self, family)(groups=[group_id])
+        terms = self.balance_penalties[balance_start:] + self.gap_penalties[gap_start:]
+        if family in GROUP_SOFT_FAMILIES:
+            self.objective_terms.setdefault(family, []).extend(terms)
+        self.blocks.add([('group', group_id)], start, terms=terms)
+
+    @contextmanager
+    def softFamily(self, name: str):
+        """Profiles a soft constraint family and records the objective terms it adds in objective_terms."""
+        balance_start, gap_start = len(self.balance_penalties), len(self.gap_penalties)
+        with self.build_profiler.phase(name):
+            yield
+        self.objective_terms[name] = self.balance_penalties[balance_start:] + self.gap_penalties[gap_start:]
 
     def createSoftConstraints(self):
         print(" - Balanced courses ...")
         # Balance courses across days
-        self.balanceCoursesAcrossDays()
+        with self.softFamily('balanceCoursesAcrossDays'):
+            self.balanceCoursesAcrossDays()
         print(" - Balanced subjects ...")
         # Balance individual subjects across weeks
-        self.balanceSubjectsAcrossWeeks()
+        with self.softFamily('balanceSubjectsAcrossWeeks'):
+            self.balanceSubjectsAcrossWeeks()
         print(" - Minimizing gaps ...")
         # Minimize gaps in daily schedules
-        self.minimizeGaps()
+        with self.softFamily('minimizeGaps'):
+            self.minimizeGaps()
         print(" - Minimizing campus returns after online classes ...")
         # Minimize students having to return to campus after online classes
-        self.minimize_campus_returns()
+        with self.softFamily('minimize_campus_returns'):
+            self.minimize_campus_returns()
         print(" - Minimizing late timeslots ...")
         # Minimize use of late timeslots
-        self.minimize_late_slots()
-        
+        with self.softFamily('minimize_late_slots'):
+            self.minimize_late_slots()
+        self.createObjective()
+
+    def createObjective(self):
+        self.objective_terms['conflicts'] = list(self.conflict_penalties)
+
         # Combine different penalty types
         penalties = []
         if self.balance_penalties:
@@ -713,73 +916,218 @@ class CSP:
         if self.gap_penalties:
             penalties.extend(self.gap_penalties)
         
-        # Minimize total penalties
-        if penalties:
-            total_cost = sum(penalties)
-            self.model.Minimize(total_cost)
+        with self.build_profiler.phase('objective'):
+            # Aggregate the conflicts so the solution callback reads a single value
+            if self.conflict_penalties:
+                self.conflict_count = self.model.NewIntVar(0, len(self.conflict_penalties), 'conflict_count')
+                self.conflict_constraint = self.model.Add(self.conflict_count == sum(self.conflict_penalties)).Index()
+
+            # Minimize total penalties
+            if penalties:
+                self.total_cost = sum(penalties)
+                self.model.Minimize(self.total_cost)
+
+    def requireEditable(self):
+        if self.blocks is None:
+            raise RuntimeError("The model can only be edited when built with editable=True")
+
+    def removeBlock(self, owner: tuple):
+        """Removes the constraints of an owner from the model and its terms from the objective (see refreshObjective)."""
+        terms = self.blocks.remove(owner)
+        if not terms:
+            return
+        removed = {id(term) for term in terms}
+        self.conflict_penalties = [term for term in self.conflict_penalties if id(term) not in removed]
+        self.balance_penalties = [term for term in self.balance_penalties if id(term) not in removed]
+        self.gap_penalties = [term for term in self.gap_penalties if id(term) not in removed]
+        for family, family_terms in self.objective_terms.items():
+            self.objective_terms[family] = [term for term in family_terms if id(term) not in removed]
+
+    def rebuildGroup(self, group_id: int):
+        """Replaces the per-group constraint families of a group by new ones built from its current courses."""
+        self.removeBlock(('group', group_id))
+        for teacher_idx, courses in self.teacher_courses.items():
+            self.teacher_courses[teacher_idx] = [course for course in courses if course[0] != group_id]
+        for family in GROUP_HARD_FAMILIES + GROUP_SOFT_FAMILIES:
+            self.buildGroupFamily(group_id, family)
+
+    def refreshObjective(self):
+        """Rebuilds conflict_count and the objective from the current penalty lists, after an edit."""
+        if self.conflict_constraint is not None:
+            clear_constraint(self.model.Proto().constraints[self.conflict_constraint])
+        self.conflict_count, self.conflict_constraint, self.total_cost = None, None, None
+        self.model.ClearObjective()
+        self.createObjective()
+
+    def update_teacher_availability(self, teacher, available_slots: Union[List[int], WeeklyAvailability]):
+        """
+        Changes the availability of a teacher. Only the availability constraints of this teacher are replaced.\n
+        Parameters:\n
+        - teacher : Teacher | int | The teacher, or its index in university.teachers
+        - available_slots : [int] | WeeklyAvailability | Indices of the timeslots where the teacher is available, or a
+          weekly pattern (empty: always available)
+        """
+        self.requireEditable()
+        teacher_idx = teacher if isinstance(teacher, int) else teacher.index
+        teacher = self.university.teachers[teacher_idx]
+        if not isinstance(available_slots, WeeklyAvailability):
+            available_slots = sorted(set(available_slots))
+        teacher.available_slots = available_slots
+
+        self.removeBlock(('teacher', teacher_idx))
+        start = len(self.model.Proto().constraints)
+        for group_id, is_assigned, timeslot_var in self.teacher_courses[teacher_idx]:
+            self.postTeacherAvailability(teacher_idx, group_id, is_assigned, timeslot_var)
+        print(f"Updated the availability of {teacher.first_name} {teacher.last_name}: "
+              f"{len(self.model.Proto().constraints) - start} constraints posted")
+
+    def set_subject_hours(self, subject_name: str, hours: float):
+        """
+        Changes the number of hours of a subject (in every promotion teaching it). Courses are added or removed
+        accordingly: only their overlap constraints and the per-group families of the groups following the subject
+        are rebuilt.\n
+        Parameters:\n
+        - subject_name : str | Name of the subject
+        - hours : float | New number of hours
+        """
+        self.requireEditable()
+        table = self.courses
+        subject_ids = [subject_id for subject_id, subject in enumerate(table.subjects) if subject.name == subject_name]
+        if not subject_ids:
+            raise ValueError(f"Unknown subject '{subject_name}'")
+        num_courses = int(hours // self.university.timeslot_duration)
+        online_room_index = self.onlineRoomIndex()
+
+        added, removed = 0, 0
+        for subject_id in subject_ids:
+            table.subjects[subject_id].hours = hours
+            promotion_id = table.subject_promotion[subject_id]
+            for group_id in range(len(table.groups)):
+                if table.group_promotion[group_id] != promotion_id:
+                    continue
+                rows = table.by_group_subject.get((group_id, subject_id), np.empty(0, dtype=np.int64))
+                for row in rows[num_courses:]:
+                    self.removeBlock(('course', int(table.course_id[row])))
+                    table.remove(row)
+                    removed += 1
+                for session_no in range(len(rows), num_courses):
+                    self.addCourse(group_id, subject_id, session_no, online_room_index)
+                    added += 1
+                self.rebuildGroup(group_id)
+        self.refreshObjective()
+        print(f"Set {subject_name} to {hours}h: {added} courses added, {removed} courses removed")
+
+    def addCourse(self, group_id: int, subject_id: int, session_no: int, online_room_index: int = None):
+        """Creates the variables of a new course and its overlap constraints with every other course."""
+        table = self.courses
+        others = table.rows()
+        row = self.addCourseVariables(group_id, subject_id, session_no)
+        has_teacher = table.teacher_var(row) is not None
+        course_id = table.course_id[row]
+        for other in others:
+            suffix = f'{course_id}_{table.course_id[other]}'
+            self.postRoomOverlap(row, other, suffix, online_room_index)
+            if has_teacher and table.teacher_var(other) is not None:
+                self.postTeacherOverlap(row, other, suffix)
+
+    def resolve(self, max_time: float = None) -> List[Course]:
+        """
+        Solves the edited model again, hinted from the last solution, and returns the new courses.\n
+        Parameters:\n
+        - max_time : float | Solver time budget in seconds (the budget of the first solve if None)
+        """
+        self.requireEditable()
+        if max_time is not None:
+            self.max_time = max_time
+        if self.last_solution is not None:
+            self.model.ClearHints()
+            hint = self.model.Proto().solution_hint
+            hint.vars.extend(range(len(self.last_solution)))
+            hint.values.extend(self.last_solution)
+        self.resumed_from = None
+        self.generated_courses = []
+        self.phase_stats = []
+        self.stop_reason = None
+        return self.solveCSP()
 
     def noRoomOverlap(self):
         # First, find if there's an online room and get its index
-        online_room_index = None
-        for i, room in enumerate(self.university.rooms):
-            if room.name.lower() == "online":
-                online_room_index = i
-                break
+        online_room_index = self.onlineRoomIndex()
 
         # Get all courses
-        courses = []
-        for _, group in self.variables.items():
-            for _, subject in group.items():
-                for course_key, course in subject.items():
-                    courses.append(course)
+        rows = self.courses.rows().tolist()
 
         # Handle room overlap constraints
-        for i in range(len(courses)):
-            print(f" - - Course {i+1}/{len(courses)}", end="\r")
-            for j in range(i + 1, len(courses)):
-                same_timeslot = self.model.NewBoolVar(f'same_timeslot_{i}_{j}')
-                self.model.Add(courses[i]['timeslot'] == courses[j]['timeslot']).OnlyEnforceIf(same_timeslot)
-                self.model.Add(courses[i]['timeslot'] != courses[j]['timeslot']).OnlyEnforceIf(same_timeslot.Not())
-                
-                same_room = self.model.NewBoolVar(f'same_room_{i}_{j}')
-                self.model.Add(courses[i]['room'] == courses[j]['room']).OnlyEnforceIf(same_room)
-                self.model.Add(courses[i]['room'] != courses[j]['room']).OnlyEnforceIf(same_room.Not())
-                
-                # Only add room conflict penalty if neither course is in an online room
-                if online_room_index is not None:
-                    course1_online = self.model.NewBoolVar(f'course1_online_{i}_{j}')
-                    course2_online = self.model.NewBoolVar(f'course2_online_{i}_{j}')
-                    
-                    self.model.Add(courses[i]['room'] == online_room_index).OnlyEnforceIf(course1_online)
-                    self.model.Add(courses[i]['room'] != online_room_index).OnlyEnforceIf(course1_online.Not())
-                    self.model.Add(courses[j]['room'] == online_room_index).OnlyEnforceIf(course2_online)
-                    self.model.Add(courses[j]['room'] != online_room_index).OnlyEnforceIf(course2_online.Not())
-                    
-                    # Add conflict penalty only if neither course is online
-                    conflict_penalty = self.model.NewBoolVar(f'room_conflict_{i}_{j}')
-                    self.model.AddBoolAnd([
-                        same_timeslot, 
-                        same_room, 
-                        course1_online.Not(), 
-                        course2_online.Not()
-                    ]).OnlyEnforceIf(conflict_penalty)
-                    self.model.AddBoolOr([
-                        same_timeslot.Not(), 
-                        same_room.Not(), 
-                        course1_online, 
-                        course2_online
-                    ]).OnlyEnforceIf(conflict_penalty.Not())
-                else:
-                    # If no online room exists, use original conflict logic
-                    conflict_penalty = self.model.NewBoolVar(f'room_conflict_{i}_{j}')
-                    self.model.AddBoolAnd([same_timeslot, same_room]).OnlyEnforceIf(conflict_penalty)
-                    self.model.AddBoolOr([same_timeslot.Not(), same_room.Not()]).OnlyEnforceIf(conflict_penalty.Not())
-                
-                self.conflict_penalties.append(conflict_penalty)
+        for i in range(len(rows)):
+            print(f" - - Course {i+1}/{len(rows)}", end="\r")
+            for j in range(i + 1, len(rows)):
+                self.postRoomOverlap(rows[i], rows[j], f'{i}_{j}', online_room_index)
 
         print("")  # New line after progress indicator
 
-    def limit_online_hours(self):
+    def onlineRoomIndex(self):
+        """Index of the online room (None if courses can't take place online)."""
+        for i, room in enumerate(self.university.rooms):
+            if room.name.lower() == "online":
+                return i
+        return None
+
+    def postRoomOverlap(self, row1: int, row2: int, suffix: str, online_room_index: int = None):
+        """
+        Adds the room conflict penalty of a pair of courses.\n
+        Parameters:\n
+        - row1, row2 : int | Rows of the courses in self.courses
+        - suffix : str | Suffix of the variable names
+        - online_room_index : int | Index of the online room (online courses never conflict)
+        """
+        table = self.courses
+        start = len(self.model.Proto().constraints)
+        timeslot1, timeslot2 = table.timeslot[row1], table.timeslot[row2]
+        room1, room2 = table.room[row1], table.room[row2]
+        same_timeslot = self.model.NewBoolVar(f'same_timeslot_{suffix}')
+        self.model.Add(timeslot1 == timeslot2).OnlyEnforceIf(same_timeslot)
+        self.model.Add(timeslot1 != timeslot2).OnlyEnforceIf(same_timeslot.Not())
+        
+        same_room = self.model.NewBoolVar(f'same_room_{suffix}')
+        self.model.Add(room1 == room2).OnlyEnforceIf(same_room)
+        self.model.Add(room1 != room2).OnlyEnforceIf(same_room.Not())
+        
+        # Only add room conflict penalty if neither course is in an online room
+        if online_room_index is not None:
+            course1_online = self.model.NewBoolVar(f'course1_online_{suffix}')
+            course2_online = self.model.NewBoolVar(f'course2_online_{suffix}')
+            
+            self.model.Add(room1 == online_room_index).OnlyEnforceIf(course1_online)
+            self.model.Add(room1 != online_room_index).OnlyEnforceIf(course1_online.Not())
+            self.model.Add(room2 == online_room_index).OnlyEnforceIf(course2_online)
+            self.model.Add(room2 != online_room_index).OnlyEnforceIf(course2_online.Not())
+            
+            # Add conflict penalty only if neither course is online
+            conflict_penalty = self.model.NewBoolVar(f'room_conflict_{suffix}')
+            self.model.AddBoolAnd([
+                same_timeslot, 
+                same_room, 
+                course1_online.Not(), 
+                course2_online.Not()
+            ]).OnlyEnforceIf(conflict_penalty)
+            self.model.AddBoolOr([
+                same_timeslot.Not(), 
+                same_room.Not(), 
+                course1_online, 
+                course2_online
+            ]).OnlyEnforceIf(conflict_penalty.Not())
+        else:
+            # If no online room exists, use original conflict logic
+            conflict_penalty = self.model.NewBoolVar(f'room_conflict_{suffix}')
+            self.model.AddBoolAnd([same_timeslot, same_room]).OnlyEnforceIf(conflict_penalty)
+            self.model.AddBoolOr([same_timeslot.Not(), same_room.Not()]).OnlyEnforceIf(conflict_penalty.Not())
+        
+        self.conflict_penalties.append(conflict_penalty)
+        if self.blocks is not None:
+            self.blocks.add([('course', int(table.course_id[row1])), ('course', int(table.course_id[row2]))], start,
+                            terms=[conflict_penalty])
+
+    def limit_online_hours(self, groups: List[int] = None):
         # Identify the index of the "online" room
         online_room_index = None
         for i, room in enumerate(self.university.rooms):
@@ -793,41 +1141,38 @@ class CSP:
             return
         
         if online_room_index is not None:
-            for group_name, subjects in self.variables.items():
-                for subject_name, courses in subjects.items():
-                    total_courses = len(courses)
-                    max_online_courses = int(0.3 * total_courses)  # 30% limit
-                    
-                    # Create a boolean variable for each course being online
-                    online_vars = []
-                    for course in courses.values():
-                        is_online = self.model.NewBoolVar(f"is_online_{group_name}_{subject_name}_{id(course)}")
-                        self.model.Add(course['room'] == online_room_index).OnlyEnforceIf(is_online)
-                        self.model.Add(course['room'] != online_room_index).OnlyEnforceIf(is_online.Not())
-                        online_vars.append(is_online)
-                    
-                    # Limit the number of online courses
-                    self.model.Add(sum(online_vars) <= max_online_courses)
+            table = self.courses
+            for (group_id, subject_id), rows in table.by_group_subject.items():
+                if groups is not None and group_id not in groups:
+                    continue
+                group_name, subject_name = table.groups[group_id].name, table.subjects[subject_id].name
+                total_courses = len(rows)
+                max_online_courses = int(0.3 * total_courses)  # 30% limit
+                
+                # Create a boolean variable for each course being online
+                online_vars = []
+                for row in rows:
+                    is_online = self.model.NewBoolVar(f"is_online_{group_name}_{subject_name}_{table.course_id[row]}")
+                    self.model.Add(table.room[row] == online_room_index).OnlyEnforceIf(is_online)
+                    self.model.Add(table.room[row] != online_room_index).OnlyEnforceIf(is_online.Not())
+                    online_vars.append(is_online)
+                
+                # Limit the number of online courses
+                self.model.Add(sum(online_vars) <= max_online_courses)
             
             print(" - - Online hours limit constraint added.")
 
-    def noMultipleCoursesOnTimeslotForGroup(self):
+    def noMultipleCoursesOnTimeslotForGroup(self, groups: List[int] = None):
         total_constraints = 0
-        courses = []
-        for _, group in self.variables.items():
-            # Group is a Tuple with : (group name, corresponding items)
-            for _, subject in group.items():
-                # Subject is a Tuple with : (subject name, corresponding items)
-                for course_key, course in subject.items():
-                    courses.append(course)
-
-        for i in range(len(courses)):
-            print(f" - - Course {i+1}/{len(courses)}", end="\r")
-            for j in range(i + 1, len(courses)):
-                # Check if the groups are the same
-                if courses[i]['group'] == courses[j]['group']:
-                    # Add constraint: courses in the same group cannot share the same timeslot
-                    self.model.Add(courses[i]['timeslot'] != courses[j]['timeslot'])
+        table = self.courses
+
+        # Courses in the same group cannot share the same timeslot
+        for group_id, rows in table.group_rows(groups):
+            print(f" - - Group {table.groups[group_id].name}", end="\r")
+            rows = rows.tolist()
+            for i in range(len(rows)):
+                for j in range(i + 1, len(rows)):
+                    self.model.Add(table.timeslot[rows[i]] != table.timeslot[rows[j]])
                     total_constraints += 1
         
         print(f" - - Added {total_constraints} constraints")
@@ -836,90 +1181,109 @@ class CSP:
         """
         Modified to use the group-subject teacher assignments instead of per-course assignments
         """
-        courses = []
-        for group_name, subjects in self.variables.items():
-            for subject_name, subject_courses in subjects.items():
-                for course_id, course in subject_courses.items():
-                    # Only add if there's a teacher assignment for this group-subject
-                    if group_name in self.teacher_assignments and subject_name in self.teacher_assignments[group_name]:
-                        # Create a course entry with the teacher assignment
-                        course_entry = course.copy()
-                        course_entry['teacher'] = self.teacher_assignments[group_name][subject_name]
-                        course_entry['id'] = course_id  # Store course ID for reference
-                        courses.append(course_entry)
-
-        for i in range(len(courses)):
-            print(f" - - Course {i+1}/{len(courses)}", end="\r")
-            for j in range(i + 1, len(courses)):
-                same_timeslot = self.model.NewBoolVar(f'same_timeslot_teacher_{i}_{j}')
-                self.model.Add(courses[i]['timeslot'] == courses[j]['timeslot']).OnlyEnforceIf(same_timeslot)
-                self.model.Add(courses[i]['timeslot'] != courses[j]['timeslot']).OnlyEnforceIf(same_timeslot.Not())
-
-                same_teacher = self.model.NewBoolVar(f'same_teacher_{i}_{j}')
-                self.model.Add(courses[i]['teacher'] == courses[j]['teacher']).OnlyEnforceIf(same_teacher)
-                self.model.Add(courses[i]['teacher'] != courses[j]['teacher']).OnlyEnforceIf(same_teacher.Not())
-
-                # Add penalty when same timeslot AND same teacher
-                conflict_penalty = self.model.NewBoolVar(f'teacher_conflict_{i}_{j}')
-                self.model.AddBoolAnd([same_timeslot, same_teacher]).OnlyEnforceIf(conflict_penalty)
-                self.model.AddBoolOr([same_timeslot.Not(), same_teacher.Not()]).OnlyEnforceIf(conflict_penalty.Not())
-                
-                self.conflict_penalties.append(conflict_penalty)
+        # Only the courses with a teacher assignment for their group-subject
+        rows = self.courses.rows()
+        rows = rows[self.courses.teacher_index[rows] >= 0].tolist()
+
+        for i in range(len(rows)):
+            print(f" - - Course {i+1}/{len(rows)}", end="\r")
+            for j in range(i + 1, len(rows)):
+                self.postTeacherOverlap(rows[i], rows[j], f'{i}_{j}')
         
         print("")
 
-    def teacherAvailabilityConstraint(self):
+    def postTeacherOverlap(self, row1: int, row2: int, suffix: str):
+        """
+        Adds the teacher conflict penalty of a pair of courses (both with a teacher assignment).\n
+        Parameters:\n
+        - row1, row2 : int | Rows of the courses in self.courses
+        - suffix : str | Suffix of the variable names
+        """
+        table = self.courses
+        start = len(self.model.Proto().constraints)
+        timeslot1, timeslot2 = table.timeslot[row1], table.timeslot[row2]
+        teacher1, teacher2 = table.teacher_var(row1), table.teacher_var(row2)
+        same_timeslot = self.model.NewBoolVar(f'same_timeslot_teacher_{suffix}')
+        self.model.Add(timeslot1 == timeslot2).OnlyEnforceIf(same_timeslot)
+        self.model.Add(timeslot1 != timeslot2).OnlyEnforceIf(same_timeslot.Not())
+
+        same_teacher = self.model.NewBoolVar(f'same_teacher_{suffix}')
+        self.model.Add(teacher1 == teacher2).OnlyEnforceIf(same_teacher)
+        self.model.Add(teacher1 != teacher2).OnlyEnforceIf(same_teacher.Not())
+
+        # Add penalty when same timeslot AND same teacher
+        conflict_penalty = self.model.NewBoolVar(f'teacher_conflict_{suffix}')
+        self.model.AddBoolAnd([same_timeslot, same_teacher]).OnlyEnforceIf(conflict_penalty)
+        self.model.AddBoolOr([same_timeslot.Not(), same_teacher.Not()]).OnlyEnforceIf(conflict_penalty.Not())
+        
+        self.conflict_penalties.append(conflict_penalty)
+        if self.blocks is not None:
+            self.blocks.add([('course', int(table.course_id[row1])), ('course', int(table.course_id[row2]))], start,
+                            terms=[conflict_penalty])
+
+    def teacherAvailabilityConstraint(self, groups: List[int] = None):
         """
         Ensures teachers are only assigned to courses during their available timeslots.
         This version works with the group-subject teacher assignment model.
         """
-        courses = []
-        for group_name, subjects in self.variables.items():
-            for subject_name, subject_courses in subjects.items():
-                # Only process if there's a teacher assignment for this group-subject
-                if group_name in self.teacher_assignments and subject_name in self.teacher_assignments[group_name]:
-                    teacher_var = self.teacher_assignments[group_name][subject_name]
-                    
-                    for course_id, course in subject_courses.items():
-                        course_entry = course.copy()
-                        course_entry['teacher'] = teacher_var
-                        courses.append(course_entry)
-        
-        for k, course in enumerate(courses):
-            print(f" - - Course {k+1}/{len(courses)}", end="\r")
-            teacher_var = course['teacher']
-            timeslot_var = course['timeslot']
+        table = self.courses
+        # Only process the courses with a teacher assignment for their group-subject
+        rows = table.rows(groups)
+        rows = rows[table.teacher_index[rows] >= 0].tolist()
+        
+        for k, row in enumerate(rows):
+            print(f" - - Course {k+1}/{len(rows)}", end="\r")
+            teacher_var = table.teacher_var(row)
+            timeslot_var = table.timeslot[row]
+            group_id = int(table.group_id[row])
+            course_id = int(table.course_id[row])
             
             # For each teacher, create a boolean variable indicating if they are assigned to this course
             for teacher_idx, teacher in enumerate(self.university.teachers):
-                is_assigned = self.model.NewBoolVar(f'teacher_{teacher_idx}_assigned_to_course_{id(course)}')
+                is_assigned = self.model.NewBoolVar(f'teacher_{teacher_idx}_assigned_to_course_{course_id}')
                 self.model.Add(teacher_var == teacher_idx).OnlyEnforceIf(is_assigned)
                 self.model.Add(teacher_var != teacher_idx).OnlyEnforceIf(is_assigned.Not())
-                
+
                 # If this teacher is assigned, ensure the timeslot is one they're available for
-                if hasattr(teacher, 'available_slots') and teacher.available_slots:
-                    # For each possible timeslot
-                    for ts_idx in range(len(self.university.timeslots)):
-                        # If this timeslot is not in available_slots, create a constraint
-                        if ts_idx not in teacher.available_slots:
-                            # If this teacher is assigned, this timeslot can't be used
-                            self.model.Add(timeslot_var != ts_idx).OnlyEnforceIf(is_assigned)
-        
+                self.postTeacherAvailability(teacher_idx, group_id, is_assigned, timeslot_var)
+                if self.blocks is not None:
+                    self.teacher_courses[teacher_idx].append((group_id, is_assigned, timeslot_var))
+
         print("")
 
-    def ensureLunchBreak(self):
+    def postTeacherAvailability(self, teacher_idx: int, group_id: int, is_assigned, timeslot_var):
+        """
+        Forbids the timeslots where a teacher is unavailable to a course, if the teacher is assigned to it.\n
+        Parameters:\n
+        - teacher_idx : int | Index of the teacher in university.teachers
+        - group_id : int | Group of the course (owner of the constraints with the teacher in an editable model)
+        - is_assigned : BoolVar | True if the teacher is assigned to the course
+        - timeslot_var : IntVar | Timeslot of the course
+        """
+        teacher = self.university.teachers[teacher_idx]
+        if not (hasattr(teacher, 'available_slots') and teacher.available_slots):
+            return
+        start = len(self.model.Proto().constraints)
+        available_slots = teacher.available_slots
+        if not isinstance(available_slots, WeeklyAvailability):
+            available_slots = set(available_slots)
+        # For each possible timeslot
+        for ts_idx in range(len(self.university.timeslots)):
+            # If this timeslot is not in available_slots, create a constraint
+            if ts_idx not in available_slots:
+                # If this teacher is assigned, this timeslot can't be used
+                self.model.Add(timeslot_var != ts_idx).OnlyEnforceIf(is_assigned)
+        if self.blocks is not None:
+            self.blocks.add([('teacher', teacher_idx), ('group', group_id)], start)
+
+    def ensureLunchBreak(self, groups: List[int] = None):
         total_constraints = 0
 
         # Define the lunch break timeslot indices (11:30 -> 13:15), where index % 7 == 2
         lunch_break_timeslots = [index for index, _ in enumerate(self.university.timeslots) if index % 7 == 2]
 
         # Collect all course timeslot variables
-        all_timeslot_vars = [
-            course['timeslot']
-            for subjects in self.variables.values()
-            for subject_courses in subjects.values()
-            for course in subject_courses.values()
-        ]
+        all_timeslot_vars = [self.courses.timeslot[row] for row in self.courses.rows(groups)]
 
         # Apply forbidden assignments for each variable individually
         for var in all_timeslot_vars:
@@ -929,40 +1293,36 @@ class CSP:
         print(f" - - Excluded {len(lunch_break_timeslots)} lunch break timeslots for {len(all_timeslot_vars)} courses")
         print(f" - - Added {total_constraints} constraints")
 
-    def restrictWeekendTimeslots(self):
+    def restrictWeekendTimeslots(self, groups: List[int] = None):
         """
         Ensures no courses are scheduled during weekend slots:
         - After the 3rd timeslot on Saturday (timeslots 3-6 of each Saturday)
         - All day Sunday (timeslots 0-6 of each Sunday)
         Works for any week in the schedule.
         """
-        # Get all courses from all groups
-        all_courses = []
-        for group_courses in self.variables.values():
-            for subject_courses in group_courses.values():
-                all_courses.extend(subject_courses.values())
-        
+        table = self.courses
         # For each course, add constraints for weekend restrictions
-        for course in all_courses:
-            timeslot_var = course['timeslot']
+        for row in table.rows(groups):
+            timeslot_var = table.timeslot[row]
+            course_id = table.course_id[row]
             
             solts_per_days = int(len(self.university.time_ranges))
             # Create intermediate variables for the modulo operations
-            week_day = self.model.NewIntVar(0, 6, f'week_day_{id(course)}')  # 0-6 for days of week
-            day_slot = self.model.NewIntVar(0, solts_per_days, f'day_slot_{id(course)}')  # slots within day
+            week_day = self.model.NewIntVar(0, 6, f'week_day_{course_id}')  # 0-6 for days of week
+            day_slot = self.model.NewIntVar(0, solts_per_days, f'day_slot_{course_id}')  # slots within day
             
             # Use AddModuloEquality for both operations
             # First get the slot within the day
             self.model.AddModuloEquality(day_slot, timeslot_var, solts_per_days)
             
             # Then get the day of week (after dividing by the number of slots per day)
-            timeslot_div = self.model.NewIntVar(0, len(self.university.timeslots), f'timeslot_div_{id(course)}')
+            timeslot_div = self.model.NewIntVar(0, len(self.university.timeslots), f'timeslot_div_{course_id}')
             self.model.AddDivisionEquality(timeslot_div, timeslot_var, solts_per_days)
             self.model.AddModuloEquality(week_day, timeslot_div, solts_per_days)
             
             # Create constraints for Saturday afternoon (day 5, slots 3-6)
-            is_saturday = self.model.NewBoolVar(f'is_saturday_{id(course)}')
-            is_afternoon = self.model.NewBoolVar(f'is_afternoon_{id(course)}')
+            is_saturday = self.model.NewBoolVar(f'is_saturday_{course_id}')
+            is_afternoon = self.model.NewBoolVar(f'is_afternoon_{course_id}')
             
             self.model.Add(week_day == 5).OnlyEnforceIf(is_saturday)
             self.model.Add(week_day != 5).OnlyEnforceIf(is_saturday.Not())
@@ -971,12 +1331,12 @@ class CSP:
             self.model.Add(day_slot < 3).OnlyEnforceIf(is_afternoon.Not())
             
             # If both conditions are true, this is a Saturday afternoon slot
-            is_saturday_afternoon = self.model.NewBoolVar(f'is_saturday_afternoon_{id(course)}')
+            is_saturday_afternoon = self.model.NewBoolVar(f'is_saturday_afternoon_{course_id}')
             self.model.AddBoolAnd([is_saturday, is_afternoon]).OnlyEnforceIf(is_saturday_afternoon)
             self.model.AddBoolOr([is_saturday.Not(), is_afternoon.Not()]).OnlyEnforceIf(is_saturday_afternoon.Not())
             
             # Create constraint for Sunday (day 6)
-            is_sunday = self.model.NewBoolVar(f'is_sunday_{id(course)}')
+            is_sunday = self.model.NewBoolVar(f'is_sunday_{course_id}')
             self.model.Add(week_day == 6).OnlyEnforceIf(is_sunday)
             self.model.Add(week_day != 6).OnlyEnforceIf(is_sunday.Not())
             
@@ -984,16 +1344,16 @@ class CSP:
             self.model.Add(is_saturday_afternoon == 0)
             self.model.Add(is_sunday == 0)
 
-    def balanceCoursesAcrossDays(self):
+    def balanceCoursesAcrossDays(self, groups: List[int] = None):
+        table = self.courses
         # Process each group separately
-        for group_name, subjects in self.variables.items():
+        for group_id, rows in table.group_rows(groups):
+            group_name = table.groups[group_id].name
             # Debug
             #print(f"\nProcessing group: {group_name}")
             
             # Get all courses for this group
-            group_courses = []
-            for subject_courses in subjects.values():
-                group_courses.extend(subject_courses.values())
+            group_courses = [(table.course_id[row], table.timeslot[row]) for row in rows]
             
             # Debug
             #print(f"Found {len(group_courses)} courses for this group")
@@ -1015,10 +1375,10 @@ class CSP:
                 
                 # Count how many courses are on this day
                 course_indicators = []
-                for course in group_courses:
-                    is_on_day = self.model.NewBoolVar(f'course_on_day_{group_name}_{day}_{id(course)}')
-                    self.model.Add(course['timeslot'] >= day_start).OnlyEnforceIf(is_on_day)
-                    self.model.Add(course['timeslot'] < day_end).OnlyEnforceIf(is_on_day)
+                for course_id, timeslot_var in group_courses:
+                    is_on_day = self.model.NewBoolVar(f'course_on_day_{group_name}_{day}_{course_id}')
+                    self.model.Add(timeslot_var >= day_start).OnlyEnforceIf(is_on_day)
+                    self.model.Add(timeslot_var < day_end).OnlyEnforceIf(is_on_day)
                     course_indicators.append(is_on_day)
                 
                 self.model.Add(day_courses == sum(course_indicators))
@@ -1041,61 +1401,58 @@ class CSP:
 
     def variablesToCourses(self):
         """
-        Modified to use the group-subject teacher assignments
+        Modified to use the group-subject teacher assignments.
+        The values of every course are read at once from the solution, by variable index.
+        Also fills self.solution, the same courses as a SolutionFrame.
         """
-        for group_name, subjects in self.variables.items():
-            for subject_name, courses in subjects.items():
-                # Get the assigned teacher for this group-subject pair
-                teacher_var = None
-                if group_name in self.teacher_assignments and subject_name in self.teacher_assignments[group_name]:
-                    teacher_var = self.teacher_assignments[group_name][subject_name]
-                    assigned_teacher_index = self.solver.Value(teacher_var)
-                    assigned_teacher = self.university.teachers[assigned_teacher_index]
-                else:
-                    # Handle case where no teacher can teach this subject
-                    print(f"Warning: No teacher assignment for {subject_name} in group {group_name}")
-                    continue
-                
-                # Find the subject object
-                subject = None
-                for promo in self.university.promotions:
-                    for sub in promo.subjects:
-                        if sub.name == subject_name:
-                            subject = sub
-                            break
-                    if subject:
-                        break
-                
-                # Convert all courses for this group-subject pair
-                for course_details in courses.values():
-                    self.generated_courses.append(
-                        Course(self.university.timeslots[self.solver.Value(course_details['timeslot'])], 
-                              Group(course_details['group']), 
-                              subject, 
-                              assigned_teacher, 
-                              self.university.rooms[self.solver.Value(course_details['room'])])
-                    )
+        table = self.courses
+        solution = np.asarray(self.solver.ResponseProto().solution, dtype=np.int64)
+        rows = table.rows()
+
+        # Handle case where no teacher can teach the subject of a course
+        missing = rows[table.teacher_index[rows] < 0]
+        for group_id, subject_id in dict.fromkeys(zip(table.group_id[missing], table.subject_id[missing])):
+            print(f"Warning: No teacher assignment for {table.subjects[subject_id].name} in group {table.groups[group_id].name}")
+        rows = rows[table.teacher_index[rows] >= 0]
 
-        #for course in self.generated_courses:
-         #   print(course)                 
+        timeslots = solution[table.timeslot_index[rows]]
+        rooms = solution[table.room_index[rows]]
+        teachers = solution[table.teacher_index[rows]]
+        group_ids, subject_ids = table.group_id[rows], table.subject_id[rows]
+        # Columnar copy of the solution, for the bulk exports (indices in the university lists)
+        self.solution = SolutionFrame(self.university, timeslots,
+                                      np.array([group.index for group in table.groups], dtype=np.int32)[group_ids],
+                                      np.array([subject.index for subject in table.subjects], dtype=np.int32)[subject_ids],
+                                      teachers, rooms)
+        for timeslot, room, teacher, group_id, subject_id in zip(timeslots.tolist(), rooms.tolist(), teachers.tolist(),
+                                                                 group_ids.tolist(), subject_ids.tolist()):
+            self.generated_courses.append(
+                Course(self.university.timeslots[timeslot],
+                       table.groups[group_id],
+                       table.subjects[subject_id],
+                       self.university.teachers[teacher],
+                       self.university.rooms[room])
+            )
 
-    def balanceSubjectsAcrossWeeks(self):
+    def balanceSubjectsAcrossWeeks(self, groups: List[int] = None):
         """
         Adds soft constraints to balance subject courses across available weeks.
         This prevents having all instances of a subject clustered in a few weeks.
         """
+        table = self.courses
         # Process each group and subject separately
-        for group_name, subjects in self.variables.items():
-            for subject_name, subject_courses in subjects.items():
+        for (group_id, subject_id), rows in table.by_group_subject.items():
+            if groups is None or group_id in groups:
+                group_name, subject_name = table.groups[group_id].name, table.subjects[subject_id].name
                 # Skip subjects with too few courses
-                if len(subject_courses) < 2:
+                if len(rows) < 2:
                     continue
                     
                 # Debug
-                #print(f"\nBalancing {subject_name} for {group_name} with {len(subject_courses)} courses")
+                #print(f"\nBalancing {subject_name} for {group_name} with {len(rows)} courses")
                 
                 # Get all course variables for this subject
-                courses = list(subject_courses.values())
+                courses = [(table.course_id[row], table.timeslot[row]) for row in rows]
                 
                 # Calculate weeks in the schedule
                 timeslots_per_week = 7 * len(self.university.time_ranges)
@@ -1121,10 +1478,10 @@ class CSP:
                     
                     # Count how many courses are in this week
                     course_indicators = []
-                    for course in courses:
-                        is_in_week = self.model.NewBoolVar(f'course_in_week_{group_name}_{subject_name}_{week}_{id(course)}')
-                        self.model.Add(course['timeslot'] >= week_start).OnlyEnforceIf(is_in_week)
-                        self.model.Add(course['timeslot'] < week_end).OnlyEnforceIf(is_in_week)
+                    for course_id, timeslot_var in courses:
+                        is_in_week = self.model.NewBoolVar(f'course_in_week_{group_name}_{subject_name}_{week}_{course_id}')
+                        self.model.Add(timeslot_var >= week_start).OnlyEnforceIf(is_in_week)
+                        self.model.Add(timeslot_var < week_end).OnlyEnforceIf(is_in_week)
                         course_indicators.append(is_in_week)
                     
                     self.model.Add(week_courses == sum(course_indicators))
@@ -1144,7 +1501,7 @@ class CSP:
                     self.balance_penalties.append(above_target * 2)  # Higher weight
                     self.balance_penalties.append(below_target * 2)  # Higher weight
 
-    def minimizeGaps(self):
+    def minimizeGaps(self, groups: List[int] = None):
         """
         Add soft constraints to minimize gaps in daily schedules for each group.
         A gap is defined as one or more consecutive empty timeslots between scheduled courses on the same day,
@@ -1157,12 +1514,12 @@ class CSP:
         # Define the lunch break timeslot index within a day (11:45 -> 13:15), where slot index % slots_per_day == 2
         lunch_break_offset = 2  # Slot offset for lunch within a day
         
+        table = self.courses
         # Process each group separately
-        for group_name, subjects in self.variables.items():
+        for group_id, rows in table.group_rows(groups):
+            group_name = table.groups[group_id].name
             # Get all courses for this group
-            group_courses = []
-            for subject_courses in subjects.values():
-                group_courses.extend(subject_courses.values())
+            group_courses = [(table.course_id[row], table.timeslot[row]) for row in rows]
             
             # Calculate the number of days in the schedule
             num_days = len(self.university.timeslots) // slots_per_day
@@ -1179,10 +1536,10 @@ class CSP:
                     
                     # Check if this slot is used by any course
                     slot_course_indicators = []
-                    for course in group_courses:
-                        in_slot = self.model.NewBoolVar(f'in_slot_{group_name}_{day}_{slot_offset}_{id(course)}')
-                        self.model.Add(course['timeslot'] == absolute_slot).OnlyEnforceIf(in_slot)
-                        self.model.Add(course['timeslot'] != absolute_slot).OnlyEnforceIf(in_slot.Not())
+                    for course_id, timeslot_var in group_courses:
+                        in_slot = self.model.NewBoolVar(f'in_slot_{group_name}_{day}_{slot_offset}_{course_id}')
+                        self.model.Add(timeslot_var == absolute_slot).OnlyEnforceIf(in_slot)
+                        self.model.Add(timeslot_var != absolute_slot).OnlyEnforceIf(in_slot.Not())
                         slot_course_indicators.append(in_slot)
                     
                     if slot_course_indicators:
@@ -1288,7 +1645,7 @@ class CSP:
                         
                         self.gap_penalties.append(weighted_penalty)
 
-    def minimize_campus_returns(self):
+    def minimize_campus_returns(self, groups: List[int] = None):
         """
         Add soft constraints to minimize transitions between online and in-person classes.
         For each group, penalize schedules where students have to switch between physical and
@@ -1311,14 +1668,14 @@ class CSP:
         # Number of timeslots per day
         slots_per_day = len(self.university.time_ranges)
         
+        table = self.courses
         group_counter = 0
         # Process each group separately
-        for group_name, subjects in self.variables.items():
+        for group_id, rows in table.group_rows(groups):
+            group_name = table.groups[group_id].name
             group_counter += 1
             # Get all courses for this group
-            group_courses = []
-            for subject_courses in subjects.values():
-                group_courses.extend(subject_courses.values())
+            group_courses = [(table.course_id[row], table.timeslot[row], table.room[row]) for row in rows]
             
             # Calculate the number of days in the schedule
             num_days = len(self.university.timeslots) // slots_per_day
@@ -1345,22 +1702,22 @@ class CSP:
                     online_indicators = []
                     physical_indicators = []
                     
-                    for course in group_courses:
-                        in_slot = self.model.NewBoolVar(f'in_slot_{group_name}_{day}_{slot_offset}_{id(course)}')
-                        self.model.Add(course['timeslot'] == absolute_slot).OnlyEnforceIf(in_slot)
-                        self.model.Add(course['timeslot'] != absolute_slot).OnlyEnforceIf(in_slot.Not())
+                    for course_id, timeslot_var, room_var in group_courses:
+                        in_slot = self.model.NewBoolVar(f'in_slot_{group_name}_{day}_{slot_offset}_{course_id}')
+                        self.model.Add(timeslot_var == absolute_slot).OnlyEnforceIf(in_slot)
+                        self.model.Add(timeslot_var != absolute_slot).OnlyEnforceIf(in_slot.Not())
                         
                         # Check if course is online
-                        is_online = self.model.NewBoolVar(f'is_online_{group_name}_{day}_{slot_offset}_{id(course)}')
-                        self.model.Add(course['room'] == online_room_index).OnlyEnforceIf(is_online)
-                        self.model.Add(course['room'] != online_room_index).OnlyEnforceIf(is_online.Not())
+                        is_online = self.model.NewBoolVar(f'is_online_{group_name}_{day}_{slot_offset}_{course_id}')
+                        self.model.Add(room_var == online_room_index).OnlyEnforceIf(is_online)
+                        self.model.Add(room_var != online_room_index).OnlyEnforceIf(is_online.Not())
                         
                         # Link the two conditions
-                        is_online_course = self.model.NewBoolVar(f'is_online_course_{group_name}_{day}_{slot_offset}_{id(course)}')
+                        is_online_course = self.model.NewBoolVar(f'is_online_course_{group_name}_{day}_{slot_offset}_{course_id}')
                         self.model.AddBoolAnd([in_slot, is_online]).OnlyEnforceIf(is_online_course)
                         self.model.AddBoolOr([in_slot.Not(), is_online.Not()]).OnlyEnforceIf(is_online_course.Not())
                         
-                        is_physical_course = self.model.NewBoolVar(f'is_physical_course_{group_name}_{day}_{slot_offset}_{id(course)}')
+                        is_physical_course = self.model.NewBoolVar(f'is_physical_course_{group_name}_{day}_{slot_offset}_{course_id}')
                         self.model.AddBoolAnd([in_slot, is_online.Not()]).OnlyEnforceIf(is_physical_course)
                         self.model.AddBoolOr([in_slot.Not(), is_online]).OnlyEnforceIf(is_physical_course.Not())
                         
@@ -1408,7 +1765,7 @@ class CSP:
                     self.balance_penalties.append(transition_penalty)
         print("")
 
-    def minimize_late_slots(self):
+    def minimize_late_slots(self, groups: List[int] = None):
         """
         Add soft constraints to discourage scheduling courses in the last two timeslots
         of each day. This helps create more favorable schedules for students and teachers.
@@ -1422,20 +1779,16 @@ class CSP:
         late_slot_offsets = [slots_per_day - 2, slots_per_day - 1]
         
         # Get all courses
-        all_courses = []
-        for group_subjects in self.variables.values():
-            for subject_courses in group_subjects.values():
-                all_courses.extend(subject_courses.values())
+        table = self.courses
+        all_courses = [(table.course_id[row], table.timeslot[row]) for row in table.rows(groups)]
         
         # Calculate the number of days in the schedule
         num_days = len(self.university.timeslots) // slots_per_day
         
         # For each course, check if it's in a late slot
-        for course in all_courses:
-            timeslot_var = course['timeslot']
-            
+        for course_id, timeslot_var in all_courses:
             # Create a variable to track if this course is in a late slot
-            is_late_slot = self.model.NewBoolVar(f'is_late_slot_{id(course)}')
+            is_late_slot = self.model.NewBoolVar(f'is_late_slot_{course_id}')
             
             # Create indicators for each possible late slot
             late_indicators = []
@@ -1444,7 +1797,7 @@ class CSP:
                     slot_idx = day * slots_per_day + offset
                     
                     # Course is in this late slot
-                    in_this_slot = self.model.NewBoolVar(f'in_late_slot_{day}_{offset}_{id(course)}')
+                    in_this_slot = self.model.NewBoolVar(f'in_late_slot_{day}_{offset}_{course_id}')
                     self.model.Add(timeslot_var == slot_idx).OnlyEnforceIf(in_this_slot)
                     self.model.Add(timeslot_var != slot_idx).OnlyEnforceIf(in_this_slot.Not())
                     
@@ -1457,7 +1810,7 @@ class CSP:
                 
                 # Apply penalty for late slots
                 # Use weight of 8 - significant but less than campus returns (15) or room conflicts
-                late_penalty = self.model.NewIntVar(0, 8, f'late_slot_penalty_{id(course)}')
+                late_penalty = self.model.NewIntVar(0, 8, f'late_slot_penalty_{course_id}')
                 self.model.Add(late_penalty == 8).OnlyEnforceIf(is_late_slot)
                 self.model.Add(late_penalty == 0).OnlyEnforceIf(is_late_slot.Not())
                 
@@ -1470,14 +1823,18 @@ class CSP:
 
         # Configure solver for flexibility
         import multiprocessing
-        if int(multiprocessing.cpu_count()) >= 4:
+        if self.num_workers:
+            worknum = int(self.num_workers)
+        elif int(multiprocessing.cpu_count()) >= 4:
             worknum = 4
         else:
-            worknum = multiprocessing.cpu_count()/2
+            worknum = max(1, multiprocessing.cpu_count() // 2)
         self.solver.parameters.num_search_workers = worknum
         print(f"Using {worknum} cores")
         
-        if(self.test):
+        if self.max_time is not None:
+            max_time = self.max_time
+        elif self.test or not self.interactive:
             max_time = 1200
         else:
             try:
@@ -1486,20 +1843,49 @@ class CSP:
                 print("You didn't gave a correct integer value. Max time set to 1200 seconds.")
                 max_time = 1200
                 
+        # When resuming, only the part of the budget not spent before the interruption is used
+        elapsed_before = 0.0
+        if self.resumed_from is not None:
+            elapsed_before = self.resumed_from.get('elapsed', 0.0)
+            budget = self.resumed_from.get('time_limit', max_time)
+            max_time = max(1, budget - elapsed_before)
+            print(f"Remaining time budget: {max_time:.0f}s")
+
         self.solver.parameters.max_time_in_seconds = max_time
 
+        checkpoint = None
+        if self.checkpoint_path:
+            checkpoint = CheckpointWriter(
+                self.checkpoint_path,
+                self.checkpoint_interval,
+                metadata={
+                    'instance': self.university.name,
+                    'time_limit': elapsed_before + max_time,
+                    'timeslot_count': len(self.university.timeslots),
+                    'room_count': len(self.university.rooms),
+                    'teacher_count': len(self.university.teachers),
+                },
+                elapsed_offset=elapsed_before
+            )
+
         print(f"\nInstance generated, solving the CSP...")
-        self.chronometer = ChronometerCallback(
-            self.model, 
-            self.conflict_penalties, 
-            self.balance_penalties, 
-            self.gap_penalties, 
-            self.test
-        )
-        status = self.solver.Solve(self.model, self.chronometer)
-        self.chronometer.running = False
+        if self.phased and self.conflict_count is not None and self.total_cost is not None:
+            status = self.solvePhases(max_time, checkpoint)
+        else:
+            status = self.solvePhase('solve', max_time, stop_rule=self.stop_rule, interactive=self.interactive,
+                                     checkpoint=checkpoint)
+        self.status = status
+        self.solve_time = time.time() - start_time
+        self.solution_count = sum(stats['solutions'] for stats in self.phase_stats)
+
+        # The last solution may have been skipped by the debounce: always save the final one
+        if checkpoint is not None and status in (cp_model.FEASIBLE, cp_model.OPTIMAL):
+            checkpoint.write(self.snapshotAssignment(self.solver.Value), self.solver.ObjectiveValue(), self.solve_time,
+                             solutions=self.solution_count, status=self.solver.StatusName(status))
 
         if status == cp_model.FEASIBLE or status == cp_model.OPTIMAL:
+            if self.blocks is not None:
+                self.last_solution = list(self.solver.ResponseProto().solution)
             if status == cp_model.OPTIMAL:
                 print("\nOptimal solution found:")
             else:
@@ -1512,25 +1898,169 @@ class CSP:
             #        for _, details in course.items():
             #            print(f"{details['subject']} | Timeslot: {self.solver.Value(details['timeslot'])} | Room: {self.solver.Value(details['room'])}")
             
-            # Perform schedule intelligence analysis
-            try:
-                schedule_intel = ScheduleIntelligence(self.generated_courses, self.university)
-                schedule_intel.analyze_conflicts()
-                schedule_intel.analyze_resource_utilization()
-                schedule_intel.generate_report()
-                # Add penalty breakdown analysis
-                schedule_intel.analyze_penalty_breakdown(self.solver, self)
-            except Exception as e:
-                print(f"Error in schedule intelligence analysis: {e}")
-                import traceback
-                traceback.print_exc()
+            if self.report:
+                self.intelligenceReport()
         else:
             print("No complete solution found. Please retry giving the CSP more time !")
             print("If time limit wasn't reached, this might mean that the instance is inconsistent and that no solution can be found !")
             print(" -> You may want to modify the instance of your problem (adding more days...)")
         
         print(f"Computational time: {round((time.time()-start_time),3)} s")
-        print(f"Best objective value: {self.chronometer.best_objective}")
-        print(f"Total solutions found: {self.chronometer.solution_count}")
+        if status in (cp_model.FEASIBLE, cp_model.OPTIMAL):
+            print(f"Best objective value: {self.solver.ObjectiveValue()}")
+        print(f"Total solutions found: {self.solution_count}")
+
+        return self.generated_courses
+
+    def intelligenceReport(self):
+        """Prints the scheduling intelligence report of the last solution (conflicts, resource usage and penalty breakdown)."""
+        # Perform schedule intelligence analysis
+        try:
+            schedule_intel = ScheduleIntelligence(self.generated_courses, self.university)
+            schedule_intel.analyze_conflicts()
+            schedule_intel.analyze_resource_utilization()
+            schedule_intel.generate_report()
+            # Add penalty breakdown analysis
+            schedule_intel.analyze_penalty_breakdown(self.solver, self)
+        except Exception as e:
+            print(f"Error in schedule intelligence analysis: {e}")
+            import traceback
+            traceback.print_exc()
+
+    def solvePhase(self, name: str, time_limit: float, objective=None, stop_rule: StopRule = None, interactive: bool = False,
+                   checkpoint: CheckpointWriter = None, first: bool = True, last: bool = True):
+        """
+        Runs one search and records its statistics in phase_stats.\n
+        Parameters:\n
+        - name : str | Name of the phase
+        - time_limit : float | Time budget of the phase, in seconds
+        - objective : LinearExpr | Objective minimized during the phase (None to keep the model objective)
+        - stop_rule : StopRule | Termination policy of the phase
+        - interactive : bool | Ask the user whether to stop at the first conflict-free solution (without stop_rule)
+        - checkpoint : CheckpointWriter | Where improving solutions are saved
+        - first, last : bool | First/last phase of the solve (the telemetry stream is started/closed accordingly)
+        """
+        if objective is not None:
+            self.model.ClearObjective()
+            self.model.Minimize(objective)
+        self.solver.parameters.max_time_in_seconds = time_limit
+
+        self.chronometer = ChronometerCallback(
+            self.model,
+            self.conflict_count,
+            stop_rule,
+            interactive,
+            self.telemetry,
+            checkpoint,
+            self.snapshotAssignment,
+            self.solver.stop_search,
+            phase=name if self.phased else None,
+            start_telemetry=first
+        )
+        phase_start = time.time()
+        status = self.solver.Solve(self.model, self.chronometer)
+        self.chronometer.EndSearch(self.solver.StatusName(status), close_telemetry=last)
+        if self.chronometer.stop_reason is not None:
+            self.stop_reason = self.chronometer.stop_reason
+
+        has_solution = status in (cp_model.FEASIBLE, cp_model.OPTIMAL)
+        self.phase_stats.append({
+            'phase': name,
+            'status': self.solver.StatusName(status),
+            'objective': self.solver.ObjectiveValue() if has_solution else None,
+            'best_bound': self.solver.BestObjectiveBound() if has_solution else None,
+            'conflicts': self.solver.Value(self.conflict_count) if has_solution and self.conflict_count is not None else None,
+            'solutions': self.chronometer.solution_count,
+            'time_limit': round(time_limit, 3),
+            'time': round(time.time() - phase_start, 3),
+        })
+        return status
+
+    def hintCurrentSolution(self) -> List[int]:
+        """Replaces the solution hints by the last solution found (every variable) and returns it."""
+        solution = list(self.solver.ResponseProto().solution)
+        self.model.ClearHints()
+        hint = self.model.Proto().solution_hint
+        hint.vars.extend(range(len(solution)))
+        hint.values.extend(solution)
+        return solution
+
+    def solvePhases(self, max_time: float, checkpoint: CheckpointWriter = None):
+        """
+        Multi-phase solve. The conflicts are minimized alone first, then the full objective is minimized from that
+        solution (hinted) without allowing more conflicts, then each family of polish is minimized in turn without
+        degrading the previous phases (lexicographic). Every phase gets a share of the time budget (phase_budgets),
+        time left by a phase is shared among the next ones.\n
+        The final solution is loaded back into the solver with the full objective, so the solver values and
+        ObjectiveValue() describe it as after a single solve.
+        """
+        phases = [('feasibility', self.conflict_count, None), ('optimization', self.total_cost, self.stop_rule)]
+        for family in self.polish:
+            terms = self.objective_terms.get(family)
+            if terms:
+                phases.append((f'polish:{family}', sum(terms), None))
+
+        if self.phase_budgets:
+            budgets = list(self.phase_budgets)
+        else:
+            budgets = [0.2, 0.6, 0.2] if len(phases) > 2 else [0.25, 0.75]
+        budgets += [budgets[-1]] * (3 - len(budgets))
+        # The polish share is divided among the polished families
+        polish_phases = len(phases) - 2
+        weights = budgets[:2] + ([budgets[2] / polish_phases] * polish_phases if polish_phases else [])
+
+        deadline = time.time() + max_time
+        bound_constraints = []  # Constraints keeping the value reached by each phase
+        best_solution, best_status, last_solved = None, cp_model.UNKNOWN, None
+        for i, (name, objective, stop_rule) in enumerate(phases):
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                print(f"No time left for the {name} phase")
+                break
+            last = i == len(phases) - 1
+            time_limit = remaining if last else max(1.0, remaining * weights[i] / sum(weights[i:]))
+            print(f"\nPhase {i + 1}/{len(phases)}: {name} ({time_limit:.0f}s)")
+
+            status = self.solvePhase(
+                name, time_limit, objective, stop_rule,
+                interactive=self.interactive and name == 'optimization',
+                checkpoint=checkpoint if name == 'optimization' else None,
+                first=i == 0, last=last
+            )
+            if status not in (cp_model.FEASIBLE, cp_model.OPTIMAL):
+                continue
+
+            value = int(round(self.solver.ObjectiveValue()))
+            best_solution, last_solved = self.hintCurrentSolution(), name
+            if name == 'feasibility':
+                best_status = cp_model.FEASIBLE
+            elif name == 'optimization':
+                best_status = status
+            bound_constraints.append(self.model.Add(objective <= value).Index())
+
+        if best_solution is not None and last_solved != 'optimization':
+            # Reload the best solution with the full objective (all variables fixed to the hint)
+            self.model.ClearObjective()
+            self.model.Minimize(self.total_cost)
+            self.solver.parameters.fix_variables_to_their_hinted_value = True
+            self.solver.parameters.max_time_in_seconds = 60
+            self.solver.Solve(self.model)
+            self.solver.parameters.fix_variables_to_their_hinted_value = False
+
+        # Give the model back its single-solve form
+        for index in bound_constraints:
+            self.model.Proto().constraints[index].clear_linear()
+        self.model.ClearObjective()
+        self.model.Minimize(self.total_cost)
+        self.model.ClearHints()
+        self.printPhaseStats()
+        return best_status
 
-        return self.generated_courses
\ No newline at end of file
+    def printPhaseStats(self):
+        print(f"\n{'Phase':<40}{'Status':>10}{'Objective':>11}{'Bound':>9}{'Conflicts':>11}{'Solutions':>11}{'Time (s)':>10}")
+        for stats in self.phase_stats:
+            objective = f"{stats['objective']:g}" if stats['objective'] is not None else "-"
+            bound = f"{stats['best_bound']:g}" if stats['best_bound'] is not None else "-"
+            conflicts = stats['conflicts'] if stats['conflicts'] is not None else "-"
+            print(f"{stats['phase']:<40}{stats['status']:>10}{objective:>11}{bound:>9}{conflicts:>11}"
+                  f"{stats['solutions']:>11}{stats['time']:>10.2f}")
\ No newline at end of file
@@ -1,30 +1,110 @@
 # File to instantiate a university and a schedule with courses
 from .objects import *
-import pandas as pd
+from .compiled import COMPILED_NAME, load_compiled, save_compiled, source_signature
+import os
 import numpy as np
 from collections import defaultdict
+from typing import Dict, List
 
-def generateUniv2(gen_dir:str = './GoodwingTimetabler/UniversityInstance/'):
-    from util import createCSV
-    createCSV(gen_dir)
+# Sheets of University.xlsx, in the order they are written to csv/
+INSTANCE_SHEETS = ['University', 'Timeslots', 'Promotions', 'Subjects', 'Teachers', 'Rooms', 'TeacherAvailability']
+
+
+def read_workbook(xlsx_path: str) -> Dict[str, List[Dict]]:
+    """
+    Reads every sheet of a workbook in a single pass (openpyxl read-only mode, values only).\n
+    Parameters:\n
+    - xlsx_path : str | Path of the workbook
+    Returns:\n
+    - {sheet name: [row]} | Each row maps the headers of the first line to the cell values; empty rows are skipped
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(xlsx_path, read_only=True, data_only=True)
+    try:
+        sheets = {}
+        for ws in wb.worksheets:
+            rows = ws.iter_rows(values_only=True)
+            header = next(rows, ())
+            columns = [(idx, str(name)) for idx, name in enumerate(header) if name is not None]
+            sheets[ws.title] = [
+                {name: (values[idx] if idx < len(values) else None) for idx, name in columns}
+                for values in rows if any(value is not None for value in values)
+            ]
+        return sheets
+    finally:
+        wb.close()
+
+
+def read_availability(rows: List[Dict], time_ranges: List[tuple]):
+    """
+    Reads the TeacherAvailability sheet with a single column selection.\n
+    Parameters:\n
+    - rows : [row] | Rows of the sheet (see read_workbook), with a TeacherId column and one column per day of the week
+      and time range, named Day_StartTime-EndTime (e.g. Mon_8:15-9:45); a slot is available if its cell is 1
+    - time_ranges : [(datetime.time, datetime.time)] | Time ranges of a day
+    Returns:\n
+    - [str], numpy.ndarray | Teacher IDs, and their (teachers x 7 x slots per day) boolean availability
+    """
+    days_of_week = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+    columns = [f"{day}_{start.hour}:{start.minute:02d}-{end.hour}:{end.minute:02d}"
+               for day in days_of_week for start, end in time_ranges]
+
+    # Skip header rows or rows without teacher ID
+    rows = [row for row in rows if row.get('TeacherId') is not None and str(row['TeacherId']) != 'TeacherId']
+    header = list(rows[0]) if rows else []
+    table = np.array([list(row.values()) for row in rows], dtype=object).reshape(len(rows), len(header))
+
+    position = {name: idx for idx, name in enumerate(header)}
+    selected = np.array([position.get(column, -1) for column in columns], dtype=np.int64)
+    availability = np.asarray(table[:, np.maximum(selected, 0)] == 1, dtype=bool) if header else \
+        np.zeros((0, len(columns)), dtype=bool)
+    availability[:, selected < 0] = False  # Missing columns: unavailable
+    return [str(row['TeacherId']) for row in rows], availability.reshape(len(rows), 7, len(time_ranges))
+
+
+def generateUniv2(gen_dir:str = './GoodwingTimetabler/UniversityInstance/', write_csv: bool = False, compiled: bool = False):
+    """
+    Builds the university described by gen_dir/University.xlsx.\n
+    Parameters:\n
+    - gen_dir : str | Folder containing University.xlsx
+    - write_csv : bool | Also export the sheets to gen_dir/csv/ (they are not needed to build the instance)
+    - compiled : bool | Load gen_dir/University.npz if it is up to date with the workbook, otherwise read the workbook
+      and (re)write it (see csp/compiled.py)
+    """
+    xlsx_path = gen_dir + 'University.xlsx'
+    if compiled:
+        compiled_path = os.path.join(gen_dir, COMPILED_NAME)
+        my_univ = load_compiled(compiled_path, xlsx_path)
+        if my_univ is not None:
+            print(f"Loaded the compiled instance {compiled_path}")
+            return my_univ
+        source = source_signature(xlsx_path)
+        my_univ = generateUniv2(gen_dir, write_csv)
+        save_compiled(my_univ, compiled_path, source)
+        print(f"Compiled the instance to {compiled_path}")
+        return my_univ
+
+    sheets = read_workbook(xlsx_path)
+    if write_csv:
+        from util import createCSV
+        createCSV(gen_dir, sheets)
 
     # Getting the general info
-    uniCSV = pd.read_csv(gen_dir+'csv/University.csv', sep=',')
-    name = uniCSV["Value"][0]
-    start_date = dt.date(int(uniCSV["Value"][3]), int(uniCSV["Value"][2]), int(uniCSV["Value"][1]))
-    days = int(uniCSV["Value"][4])
+    values = [row["Value"] for row in sheets['University']]
+    name = str(values[0])
+    start_date = dt.date(int(values[3]), int(values[2]), int(values[1]))
+    days = int(values[4])
 
     # Getting the values for the rooms
-    roomsCSV = pd.read_csv(gen_dir+'csv/Rooms.csv', sep=',')
     rooms = []
-    for _, row in roomsCSV.iterrows():
-        rooms.append(Room(row["Name"], row["Type"]))
+    for row in sheets['Rooms']:
+        rooms.append(Room(str(row["Name"]), row["Type"] if row["Type"] is not None else "default"))
 
     # Getting the values for the subjects
-    subjectsCSV = pd.read_csv(gen_dir + 'csv/Subjects.csv', sep=',')
     subjects = []
-    for idx, row in subjectsCSV.iterrows():
-        subjects.append([row["Id"], row["Promotion"], Subject(row["Name"], row["Id"], row["Hours"], row["Color"])])
+    for row in sheets['Subjects']:
+        subjects.append([str(row["Id"]), row["Promotion"], Subject(row["Name"], str(row["Id"]), row["Hours"], str(row["Color"]))])
     
     promotion_dict = defaultdict(list)                  # Dictionary to group subjects by promotion
     for uni, promotion, subject in subjects:            # Populate dictionary
@@ -32,12 +112,15 @@ def generateUniv2(gen_dir:str = './GoodwingTimetabler/UniversityInstance/'):
     ordered_subjects = list(promotion_dict.values())    # Convert dictionary values to a list of lists
 
 
-    # Getting the values for the promotions
-    promotionsCSV = pd.read_csv(gen_dir+'csv/Promotions.csv', sep=',')
+    # Getting the values for the promotions (one column per promotion, listing its groups)
+    promotions_columns = {col: [] for col in (sheets['Promotions'][0] if sheets['Promotions'] else {})}
+    for row in sheets['Promotions']:
+        for col, value in row.items():
+            if value is not None:
+                promotions_columns[col].append(str(value))
     groups_names = []
     promo_names = []
-    for col in promotionsCSV.columns:
-        non_null_values = promotionsCSV[col].dropna().tolist()  # Remove NaN values
+    for col, non_null_values in promotions_columns.items():
         if non_null_values:  # Only add if there are valid values
             groups_names.append([col + '_' + val for val in non_null_values])
             promo_names.append(col)
@@ -54,80 +137,29 @@ def generateUniv2(gen_dir:str = './GoodwingTimetabler/UniversityInstance/'):
         promotions.append(Promotion(promo_name, groups[idx], ordered_subjects[idx]))
 
 
-    def get_subject_by_id(data: pd.DataFrame, target_id: str) -> Subject:
-        for subject in data:
-            if subject[0] == target_id:
-                return subject[2]
-        return None   
+    # Subjects by id (the first one if several subjects share an id)
+    subject_by_id = {}
+    for id, promotion, subject in subjects:
+        subject_by_id.setdefault(id, subject)
 
     # Getting the timeslots
-    timeslotsCSV = pd.read_csv(gen_dir + 'csv/Timeslots.csv')
     time_ranges = []
-    for idx, row in timeslotsCSV.iterrows():
-        time_ranges.append((dt.time(row["StartH"], row["StartMin"]), dt.time(row["EndH"], row["EndMin"])))
+    for row in sheets['Timeslots']:
+        time_ranges.append((dt.time(int(row["StartH"]), int(row["StartMin"])), dt.time(int(row["EndH"]), int(row["EndMin"]))))
     
     slots_per_day = len(time_ranges)
     
-    # Getting the values for the teachers
-    teachersCSV = pd.read_csv(gen_dir + 'csv/Teachers.csv', sep=',')
-    
     # Try to get teacher availability data
     try:
-        availabilityCSV = pd.read_csv(gen_dir + 'csv/TeacherAvailability.csv', sep=',')
+        if not sheets.get('TeacherAvailability'):
+            raise FileNotFoundError('TeacherAvailability')
+        teacher_ids, availability = read_availability(sheets['TeacherAvailability'], time_ranges)
+        # One weekly pattern per teacher ID, repeated over the whole period
+        teacher_availability_dict = {teacher_id: WeeklyAvailability.from_array(week)
+                                     for teacher_id, week in zip(teacher_ids, availability)}
         has_availability_data = True
-        
-        # Create a lookup dictionary for teacher availability by ID
-        teacher_availability_dict = {}
-        
-        for _, row in availabilityCSV.iterrows():
-            teacher_id = str(row['TeacherId'])
-            
-            # Skip header rows or rows without teacher ID
-            if teacher_id == 'TeacherId' or pd.isna(teacher_id):
-                continue
-                
-            # Initialize availability matrix (7 days x slots_per_day)
-            availability_matrix = np.zeros((7, slots_per_day), dtype=int)
-            
-            # Process each day
-            days_of_week = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-            
-            for day_idx, day in enumerate(days_of_week):
-                for slot_idx in range(slots_per_day):
-                    # Column name format: Day_StartTime-EndTime (e.g. Mon_8:15-9:45)
-                    # Fix for the str attribute error - directly format integers as strings without using pandas methods
-                    start_hour = str(int(timeslotsCSV["StartH"].iloc[slot_idx]))
-                    start_min = str(int(timeslotsCSV["StartMin"].iloc[slot_idx])).zfill(2)
-                    end_hour = str(int(timeslotsCSV["EndH"].iloc[slot_idx]))
-                    end_min = str(int(timeslotsCSV["EndMin"].iloc[slot_idx])).zfill(2)
-                    
-                    col_name = f"{day}_{start_hour}:{start_min}-{end_hour}:{end_min}"
-                    
-                    # Check if column exists and value is available (1)
-                    if col_name in row.index and row[col_name] == 1:
-                        availability_matrix[day_idx][slot_idx] = 1
-            
-            # Convert weekly matrix to full schedule slot list
-            available_slots = []
-            
-            # Calculate number of weeks needed for the full period
-            num_weeks = (days + 6) // 7
-            
-            for week in range(num_weeks):
-                for day in range(7):
-                    actual_day = week * 7 + day
-                    if actual_day >= days:  # Skip days beyond the specified period
-                        break
-                    
-                    for slot in range(slots_per_day):
-                        if availability_matrix[day][slot] == 1:
-                            # Calculate absolute slot index
-                            slot_idx = actual_day * slots_per_day + slot
-                            available_slots.append(slot_idx)
-            
-            teacher_availability_dict[teacher_id] = available_slots
                 
-    except (FileNotFoundError, pd.errors.EmptyDataError):
+    except FileNotFoundError:
         print("No teacher availability data found. All teachers will be considered available for all slots.")
         has_availability_data = False
     except Exception as e:
@@ -137,19 +169,19 @@ def generateUniv2(gen_dir:str = './GoodwingTimetabler/UniversityInstance/'):
     
     # Process teachers
     teachers = []
-    for idx, row in teachersCSV.iterrows():
+    for row in sheets['Teachers']:
         teacher_id = str(row["Idt"])
-        teacher_subjects_id = row["Subjects (séparés d'un '-')"].split('-')
+        teacher_subjects_id = str(row["Subjects (séparés d'un '-')"]).split('-')
         teacher_subjects = []
         for id in teacher_subjects_id:
-            teacher_subjects.append(get_subject_by_id(subjects, id))
+            teacher_subjects.append(subject_by_id.get(id))
         
         # Set teacher availability
         if has_availability_data and teacher_id in teacher_availability_dict:
             teacher_availability = teacher_availability_dict[teacher_id]
         else:
             # Default: available for all slots
-            teacher_availability = [i for i in range(days * slots_per_day)]
+            teacher_availability = WeeklyAvailability.always(slots_per_day)
         
         teachers.append(Teacher(row["First Name"], row["Last Name"], teacher_subjects, teacher_availability))
 
@@ -0,0 +1,238 @@
+import datetime as dt
+import gzip
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Tuple
+
+from ortools import __version__ as ortools_version
+from ortools.sat.python import cp_model, cp_model_helper
+
+from .checkpoint import atomic_write
+from .objects import University
+
+# Bump when the model built by CSP changes, so that older cache entries are not reused
+MODEL_VERSION = 2
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'GoodwingTimetabler', 'models')
+DEFAULT_CACHE_SIZE_MB = 2048
+
+
+def normalize_university(university: University) -> Dict:
+    """
+    Plain representation of everything in a University that the model depends on.
+    Lists keep their order: the model refers to rooms, teachers and timeslots by index.
+    """
+    return {
+        'name': university.name,
+        'timeslots': [[ts.day.isoformat(), ts.start.isoformat(), ts.end.isoformat()] for ts in university.timeslots],
+        'time_ranges': [[start.isoformat(), end.isoformat()] for start, end in university.time_ranges],
+        'rooms': [[room.name, room.type, room.id] for room in university.rooms],
+        'teachers': [
+            [teacher.first_name, teacher.last_name, [subject.name for subject in teacher.subjects],
+             teacher.available_timeslots(len(university.timeslots))]
+            for teacher in university.teachers
+        ],
+        'promotions': [
+            [promo.name, [group.name for group in promo.groups],
+             [[subject.name, subject.id, subject.hours] for subject in promo.subjects]]
+            for promo in university.promotions
+        ],
+    }
+
+
+def instance_fingerprint(university: University, options: Dict = None) -> str:
+    """
+    SHA-256 of the normalized instance, the model options, the model version and the OR-Tools version.\n
+    Parameters:\n
+    - university : University | The instance
+    - options : dict | Flags changing the built model (JSON serializable)
+    """
+    payload = {
+        'university': normalize_university(university),
+        'options': options or {},
+        'model_version': MODEL_VERSION,
+        'ortools': ortools_version,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def encode_term(term) -> object:
+    """Encodes an objective term as a variable index, or [variable indices, coefficients, offset]."""
+    if isinstance(term, cp_model.IntVar):
+        return term.Index()
+    flat = cp_model_helper.FlatIntExpr(term)
+    return [[var.Index() for var in flat.vars], list(flat.coeffs), flat.offset]
+
+
+def decode_term(model: cp_model.CpModel, encoded):
+    """Rebuilds a term encoded by encode_term on a model loaded from the cache."""
+    if isinstance(encoded, int):
+        return model.get_int_var_from_proto_index(encoded)
+    indices, coeffs, offset = encoded
+    variables = [model.get_int_var_from_proto_index(i) for i in indices]
+    return cp_model.LinearExpr.weighted_sum(variables, coeffs) + offset
+
+
+class ModelCache:
+    """
+    On-disk cache of built CP-SAT models, keyed by instance_fingerprint().\n
+    Every entry is the model proto (gzipped text format, the only format the OR-Tools Python proto can read back)
+    and a JSON file with the variable index maps needed to use the model (see CSP.exportModelIndex).
+    The least recently used entries are evicted when the total size goes over max_size_mb.\n
+    Parameters:\n
+    - directory : str | Cache folder (created if needed)
+    - max_size_mb : float | Maximum total size of the cache
+    """
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_size_mb: float = DEFAULT_CACHE_SIZE_MB):
+        self.directory = directory
+        self.max_size_mb = max_size_mb
+
+    def key(self, university: University, options: Dict = None) -> str:
+        return instance_fingerprint(university, options)
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        return os.path.join(self.directory, f"{key}.model.txt.gz"), os.path.join(self.directory, f"{key}.json")
+
+    def load(self, key: str) -> Tuple[cp_model.CpModel, Dict]:
+        """Returns (model, index) for key, or None on a cache miss."""
+        model_path, index_path = self._paths(key)
+        if not (os.path.exists(model_path) and os.path.exists(index_path)):
+            self._count('misses')
+            return None
+        try:
+            with open(index_path, encoding='utf-8') as file:
+                index = json.load(file)['index']
+            with gzip.open(model_path, 'rt', encoding='utf-8') as file:
+                text = file.read()
+            model = cp_model.CpModel()
+            model.Proto().parse_text_format(text)
+        except (OSError, ValueError, KeyError, RuntimeError) as e:
+            print(f"Ignoring broken model cache entry {key[:12]}: {e}")
+            self.remove(key)
+            self._count('misses')
+            return None
+
+        # The modification time of the index file is the last use of the entry (LRU)
+        os.utime(index_path)
+        self._count('hits')
+        return model, index
+
+    def store(self, key: str, model: cp_model.CpModel, index: Dict, **metadata):
+        """
+        Adds a model to the cache, then evicts the least recently used entries if the cache is too big.\n
+        Parameters:\n
+        - key : str | Instance fingerprint
+        - model : CpModel | Built model (without hints)
+        - index : dict | Variable index maps
+        - metadata : Descriptive fields shown by stats() (instance name, build time...)
+        """
+        model_path, index_path = self._paths(key)
+        atomic_write(model_path, gzip.compress(str(model.Proto()).encode('utf-8'), compresslevel=1))
+        entry = dict(metadata)
+        entry['created_at'] = dt.datetime.now().isoformat(timespec='seconds')
+        entry['variables'] = len(model.Proto().variables)
+        entry['constraints'] = len(model.Proto().constraints)
+        entry['index'] = index
+        # Written last: an entry is complete once its index file exists
+        atomic_write(index_path, json.dumps(entry, separators=(',', ':')).encode('utf-8'))
+        self.evict()
+
+    def remove(self, key: str):
+        for path in self._paths(key):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def clear(self):
+        for entry in self.entries():
+            self.remove(entry['key'])
+
+    def entries(self) -> List[Dict]:
+        """Cache entries, most recently used first (key, size in bytes, last use)."""
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.json') or filename == 'stats.json':
+                continue
+            key = filename[:-len('.json')]
+            model_path, index_path = self._paths(key)
+            try:
+                size = os.path.getsize(index_path) + (os.path.getsize(model_path) if os.path.exists(model_path) else 0)
+                last_used = os.path.getmtime(index_path)
+            except OSError:  # Removed by another process meanwhile
+                continue
+            entries.append({'key': key, 'size': size, 'last_used': last_used})
+        entries.sort(key=lambda entry: entry['last_used'], reverse=True)
+        return entries
+
+    def evict(self) -> List[str]:
+        """Removes the least recently used entries until the cache fits in max_size_mb. Returns the removed keys."""
+        max_size = self.max_size_mb * 1024 * 1024
+        total, removed = 0, []
+        for i, entry in enumerate(self.entries()):
+            # The most recent entry is always kept, even if it is bigger than the cache
+            if i > 0 and total + entry['size'] > max_size:
+                self.remove(entry['key'])
+                removed.append(entry['key'])
+            else:
+                total += entry['size']
+        return removed
+
+    def _count(self, counter: str):
+        """Best effort hit/miss counters (concurrent runs may lose an increment)."""
+        path = os.path.join(self.directory, 'stats.json')
+        counters = {'hits': 0, 'misses': 0}
+        try:
+            with open(path, encoding='utf-8') as file:
+                counters.update(json.load(file))
+        except (OSError, ValueError):
+            pass
+        counters[counter] += 1
+        try:
+            atomic_write(path, json.dumps(counters).encode('utf-8'))
+        except OSError:
+            pass
+
+    def stats(self) -> Dict:
+        """Summary of the cache: size, counters and entries (with the metadata given to store())."""
+        entries = []
+        for entry in self.entries():
+            try:
+                with open(self._paths(entry['key'])[1], encoding='utf-8') as file:
+                    info = json.load(file)
+            except (OSError, ValueError):
+                info = {}
+            info.pop('index', None)
+            info.update(entry)
+            entries.append(info)
+
+        counters = {'hits': 0, 'misses': 0}
+        try:
+            with open(os.path.join(self.directory, 'stats.json'), encoding='utf-8') as file:
+                counters.update(json.load(file))
+        except (OSError, ValueError):
+            pass
+
+        return {
+            'directory': self.directory,
+            'max_size_mb': self.max_size_mb,
+            'size_mb': round(sum(entry['size'] for entry in entries) / (1024 * 1024), 3),
+            'hits': counters['hits'],
+            'misses': counters['misses'],
+            'entries': entries,
+        }
+
+    def print_stats(self):
+        stats = self.stats()
+        print(f"Model cache: {stats['directory']}")
+        print(f"{len(stats['entries'])} entries, {stats['size_mb']:.1f} MB / {stats['max_size_mb']:.0f} MB, "
+              f"{stats['hits']} hits, {stats['misses']} misses")
+        if stats['entries']:
+            print(f"\n{'Key':<14}{'Instance':<24}{'Size (MB)':>10}{'Vars':>10}{'Build (s)':>11}  Last used")
+        for entry in stats['entries']:
+            last_used = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['last_used']))
+            build_time = f"{entry['build_time']:.2f}" if entry.get('build_time') is not None else "-"
+            print(f"{entry['key'][:12]:<14}{str(entry.get('instance', '-'))[:22]:<24}{entry['size'] / (1024 * 1024):>10.2f}"
+                  f"{entry.get('variables', 0):>10}{build_time:>11}  {last_used}")
@@ -4,7 +4,9 @@
 
 import datetime as dt
 from datetime import date
-from typing import List
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
 
 #
 #   Basic objects (to build complex ones)
@@ -18,16 +20,73 @@ class Timeslot:
     - day : datetime.date | Date of the timeslot
     - start : datetime.time | Start date and time of the timeslot
     - end: datetime.time | End date and time of the timeslot
+    - index : int | Position of the timeslot in the university's timeslots (set by generate_timeslots)
     """
-    def __init__(self, day: dt.date, start: dt.time, end: dt.time):
+    __slots__ = ('day', 'start', 'end', 'index')
+
+    def __init__(self, day: dt.date, start: dt.time, end: dt.time, index: int = None):
         self.day = day
         self.start:dt.time = start
         self.end:dt.time = end
+        self.index = index
 
     def __str__(self):
         return f"Timeslot date: {self.day} , starts at: {self.start} , ends at: {self.end}"
 
 
+class WeeklyAvailability:
+    """
+    Availability repeated every week, stored as a bitmask over one week of timeslots.\n
+    Timeslot i of the semester is available if bit i % (7 * slots_per_day) is set: the pattern starts on the first
+    day of the semester. An empty mask is treated like an empty availability list (always available).\n
+    Parameters:\n
+    - mask : int | Bit day * slots_per_day + slot is set if the slot of that day of the week is available
+    - slots_per_day : int | Number of timeslots per day
+    """
+    __slots__ = ('mask', 'slots_per_day')
+
+    def __init__(self, mask: int, slots_per_day: int):
+        self.mask = mask
+        self.slots_per_day = slots_per_day
+
+    @classmethod
+    def from_array(cls, week: np.ndarray) -> 'WeeklyAvailability':
+        """Builds the availability of a (7, slots_per_day) boolean array."""
+        week = np.asarray(week, dtype=bool)
+        bits = np.packbits(week.ravel(), bitorder='little')
+        return cls(int.from_bytes(bits.tobytes(), 'little'), week.shape[1])
+
+    @classmethod
+    def always(cls, slots_per_day: int) -> 'WeeklyAvailability':
+        return cls((1 << (7 * slots_per_day)) - 1, slots_per_day)
+
+    @property
+    def period(self) -> int:
+        return 7 * self.slots_per_day
+
+    def to_array(self) -> np.ndarray:
+        """(7, slots_per_day) boolean array of the week."""
+        bits = np.frombuffer(self.mask.to_bytes((self.period + 7) // 8, 'little'), dtype=np.uint8)
+        return np.unpackbits(bits, count=self.period, bitorder='little').astype(bool).reshape(7, self.slots_per_day)
+
+    def slots(self, count: int) -> List[int]:
+        """Indices of the available timeslots among the first count timeslots."""
+        return np.flatnonzero(np.resize(self.to_array().ravel(), count)).tolist()
+
+    def __contains__(self, timeslot_index: int) -> bool:
+        return bool(self.mask >> (timeslot_index % self.period) & 1)
+
+    def __bool__(self):
+        return self.mask != 0
+
+    def __eq__(self, other):
+        return (isinstance(other, WeeklyAvailability) and self.mask == other.mask
+                and self.slots_per_day == other.slots_per_day)
+
+    def __repr__(self):
+        return f"WeeklyAvailability({self.mask:#x}, {self.slots_per_day})"
+
+
 class Person:
     """
     Object for any person (teacher, student, etc...)\n
@@ -35,6 +94,8 @@ class Person:
     - first_name: str | First name of the person
     - last_name: str | Last name of the person
     """
+    __slots__ = ('first_name', 'last_name')
+
     def __init__(self, first_name: str, last_name: str):
         self.first_name = first_name
         self.last_name = last_name
@@ -50,11 +111,14 @@ class Subject:
     - id : str | The id of the subject (if applicable, '0' by default)
     - hours : float | The number of hours to complete the course (9.0 by default)
     """
+    __slots__ = ('name', 'id', 'hours', 'color', 'index')
+
     def __init__(self, name: str, id: str = "0", hours: float = 9.0, color: str = "29FF65"):
         self.name = name
         self.id = id
         self.hours = hours
         self.color = color
+        self.index = None  # Position in University.subjects
 
     def __str__(self):
         return f"{self.name} with id: {self.id}"
@@ -69,11 +133,23 @@ class Teacher(Person):
     Object representing a teacher.\n
     Parameters:\n
     - subjects : [Subject] | List of the subjects the teacher is able to teach
+    - available_slots : [int] | WeeklyAvailability | Indices of the timeslots where the teacher is available, or a
+      weekly pattern (empty: always available)
     """
-    def __init__(self, first_name: str, last_name: str, subjects: List[Subject] = [], available_slots: List[int] = None):
+    __slots__ = ('subjects', 'available_slots', 'index')
+
+    def __init__(self, first_name: str, last_name: str, subjects: List[Subject] = [],
+                 available_slots: Union[List[int], WeeklyAvailability] = None):
         super().__init__(first_name, last_name)
         self.subjects = subjects
         self.available_slots = available_slots if available_slots is not None else []
+        self.index = None  # Position in University.teachers
+
+    def available_timeslots(self, count: int) -> List[int]:
+        """Sorted indices of the timeslots where the teacher is available, among the first count ones ([] if always available)."""
+        if isinstance(self.available_slots, WeeklyAvailability):
+            return self.available_slots.slots(count) if self.available_slots else []
+        return sorted(slot for slot in self.available_slots if slot < count)
 
     def __str__(self):
         result = super().__str__() + " can teach: ["
@@ -88,6 +164,8 @@ class Student(Person):
     Parameters:\n
     - student_id : str | Badge id of the student (Default : '0')
     """
+    __slots__ = ('student_id',)
+
     def __init__(self, first_name: str, last_name: str, student_id: str = "0"):
         super().__init__(first_name, last_name)
         self.student_id = student_id
@@ -107,10 +185,13 @@ class Room:
     - name : str | Name of the room.
     - type : str | Type of the room if it's a special room. Otherwise "default"
     """
+    __slots__ = ('name', 'type', 'id', 'index')
+
     def __init__(self, name: str, type: str = "default", id: int = 0):
         self.name = name
         self.type = type
         self.id = id
+        self.index = None  # Position in University.rooms
 
     def __str__(self):
         return f"Room {self.name} has type: {self.type}"
@@ -127,9 +208,12 @@ class Group:
     - name : str | The name of the group
     - students : [Student] | List of the students in the class, None by default
     """
+    __slots__ = ('name', 'students', 'index')
+
     def __init__(self, name: str, students: List[Student] = None):
         self.name = name
         self.students = students
+        self.index = None  # Position in University.groups
 
     def __str__(self):
         return f"{self.name}"
@@ -142,6 +226,8 @@ class Promotion:
     - groups : [Group] | List of the groups on this promotion
     - subjects : [Subject] | List of the subjects the promotion has to attend
     """
+    __slots__ = ('name', 'groups', 'subjects')
+
     def __init__(self, name: str, groups: List[Group], subjects: List[Subject]):
         self.name = name
         self.groups = groups
@@ -167,6 +253,8 @@ class Course:
     - teacher : Teacher | The teacher giving the course
     - room : Room | The room where the course takes place
     """
+    __slots__ = ('timeslot', 'group', 'subject', 'teacher', 'room')
+
     def __init__(self, timeslot: Timeslot, group: Group, subject: Subject, teacher: Teacher, room: Room):
         self.timeslot = timeslot
         self.group = group
@@ -195,7 +283,7 @@ def generate_timeslots(start_date: dt.date, days: int, time_ranges: List[tuple])
     for day_offset in range(days):
         current_date = start_date + dt.timedelta(days=day_offset)
         for start, end in time_ranges:
-            timeslots.append(Timeslot(current_date, start, end))
+            timeslots.append(Timeslot(current_date, start, end, len(timeslots)))
     return timeslots
 
 
@@ -233,6 +321,58 @@ class University:
 
         self.timeslot_duration = duration
 
+        self.reindex()
+
+    def reindex(self):
+        """
+        Numbers the rooms, teachers, groups and subjects (their `index` is their position in the lists below) and
+        builds the lookup indexes. Called on creation; call it again after adding or removing objects.\n
+        Built attributes:\n
+        - groups : [Group] | Every group, in promotion order
+        - subjects : [Subject] | Every distinct subject, those of the promotions first, then those only known by teachers
+        - subject_by_id : {str: Subject} | Subject of an id (the first one if several subjects share an id)
+        - teachers_by_subject : [[int]] | Subject index -> indices of the teachers able to teach it
+        - timeslot_index : {(datetime.date, datetime.time): int} | Index of the timeslot of a day and start time
+        - group_by_name, room_by_name : {str: Group}, {str: Room}
+        """
+        for index, timeslot in enumerate(self.timeslots):
+            timeslot.index = index
+        for index, room in enumerate(self.rooms):
+            room.index = index
+        for index, teacher in enumerate(self.teachers):
+            teacher.index = index
+
+        self.groups: List[Group] = [group for promo in self.promotions for group in promo.groups]
+        for index, group in enumerate(self.groups):
+            group.index = index
+
+        # Subjects are compared by identity, as in the teachers' subject lists
+        subjects = {}
+        for promo in self.promotions:
+            for subject in promo.subjects:
+                subjects.setdefault(id(subject), subject)
+        for teacher in self.teachers:
+            for subject in teacher.subjects:
+                if subject is not None:
+                    subjects.setdefault(id(subject), subject)
+        self.subjects: List[Subject] = list(subjects.values())
+        for index, subject in enumerate(self.subjects):
+            subject.index = index
+
+        self.subject_by_id: Dict[str, Subject] = {}
+        for subject in self.subjects:
+            self.subject_by_id.setdefault(subject.id, subject)
+        self.teachers_by_subject: List[List[int]] = [[] for _ in self.subjects]
+        for teacher in self.teachers:
+            for subject in dict.fromkeys(subject for subject in teacher.subjects if subject is not None):
+                self.teachers_by_subject[subject.index].append(teacher.index)
+
+        self.timeslot_index: Dict[Tuple[dt.date, dt.time], int] = {
+            (timeslot.day, timeslot.start): timeslot.index for timeslot in self.timeslots
+        }
+        self.group_by_name: Dict[str, Group] = {group.name: group for group in reversed(self.groups)}
+        self.room_by_name: Dict[str, Room] = {room.name: room for room in reversed(self.rooms)}
+
     def __str__(self):
         return f"{self.name} has {len(self.rooms)} rooms, {len(self.teachers)} teachers and {len(self.promotions)} promotions."
 
@@ -0,0 +1,106 @@
+import contextlib
+import os
+import re
+from typing import Dict, List, Tuple
+
+from ortools.sat.python import cp_model
+
+from .coursetable import CourseTable
+from .modelcache import encode_term
+from .profiler import BuildProfiler
+
+# Constraint families built independently for every group (hard, then soft), in build order
+GROUP_HARD_FAMILIES = ('limit_online_hours', 'noMultipleCoursesOnTimeslotForGroup', 'teacherAvailabilityConstraint',
+                       'ensureLunchBreak', 'restrictWeekendTimeslots')
+GROUP_SOFT_FAMILIES = ('balanceCoursesAcrossDays', 'balanceSubjectsAcrossWeeks', 'minimizeGaps',
+                       'minimize_campus_returns', 'minimize_late_slots')
+
+# Text format fields holding variable references (negative values are negated literals)
+_REFERENCE = re.compile(r'^(\s*(?:vars|literals|enforcement_literal): )(-?\d+)$', re.MULTILINE)
+
+
+def split_groups(sizes: Dict[int, int], chunks: int) -> List[List[int]]:
+    """
+    Splits the groups into at most `chunks` contiguous chunks with about the same number of courses.\n
+    Parameters:\n
+    - sizes : dict | Number of courses of every group id (in instance order)
+    - chunks : int | Number of chunks wanted
+    """
+    total = sum(sizes.values()) or 1
+    target = total / max(1, min(chunks, len(sizes)))
+    result, current, current_size = [], [], 0
+    for group, size in sizes.items():
+        # Close the chunk before this group if adding it would overshoot the target more than stopping short
+        if current and len(result) < chunks - 1 and current_size + size - target > target - current_size:
+            result.append(current)
+            current, current_size = [], 0
+        current.append(group)
+        current_size += size
+    if current:
+        result.append(current)
+    return result
+
+
+def shift_references(text: str, first_local: int, shift: int) -> str:
+    """Renumbers the references to variables created by a block (index >= first_local) in a text format proto."""
+    if shift == 0:
+        return text
+
+    def renumber(match):
+        ref = int(match.group(2))
+        index = ref if ref >= 0 else -ref - 1
+        if index < first_local:
+            return match.group(0)
+        index += shift
+        return f"{match.group(1)}{index if ref >= 0 else -index - 1}"
+
+    return _REFERENCE.sub(renumber, text)
+
+
+def shift_term(encoded, first_local: int, shift: int):
+    """Renumbers a term encoded by modelcache.encode_term (see shift_references)."""
+    if isinstance(encoded, int):
+        return encoded + shift if encoded >= first_local else encoded
+    indices, coeffs, offset = encoded
+    return [[i + shift if i >= first_local else i for i in indices], coeffs, offset]
+
+
+def build_group_block(job: dict) -> Tuple[str, int, Dict]:
+    """
+    Builds the per-group constraint families for a chunk of groups (runs inside a pool worker).\n
+    The block model starts with the shared variables (course timeslots/rooms and teacher assignments),
+    parsed from their text format so that they keep their global indices.\n
+    Parameters:\n
+    - job : dict | university, base_text (text format of the shared variables), base_size (number of shared
+      variables), courses (the course table, see CourseTable.to_index) and groups (group ids of the chunk)
+    Returns the text format of the block (variables created by the block, then its constraints), the number
+    of variables it created and its objective terms per family (encoded).
+    """
+    from .csp import CSP
+
+    model = cp_model.CpModel()
+    model.Proto().parse_text_format(job['base_text'])
+
+    # A CSP over the shared variables, without building nor solving anything on creation
+    block = CSP.__new__(CSP)
+    block.university = job['university']
+    block.model = model
+    block.build_profiler = BuildProfiler(model, enabled=False)
+    block.courses = CourseTable.from_index(job['university'], model, job['courses'])
+    block.balance_penalties, block.gap_penalties, block.conflict_penalties = [], [], []
+    block.objective_terms = {}
+    block.blocks = None
+
+    groups = job['groups']
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for family in GROUP_HARD_FAMILIES:
+            getattr(block, family)(groups=groups)
+        for family in GROUP_SOFT_FAMILIES:
+            with block.softFamily(family):
+                getattr(block, family)(groups=groups)
+
+    text = str(model.Proto())
+    if not text.startswith(job['base_text']):
+        raise RuntimeError("Unexpected text format of the block model")
+    terms = {family: [encode_term(term) for term in family_terms] for family, family_terms in block.objective_terms.items()}
+    return text[len(job['base_text']):], len(model.Proto().variables) - job['base_size'], terms
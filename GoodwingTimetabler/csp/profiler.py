@@ -0,0 +1,163 @@
+import cProfile
+import html
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, List
+
+
+# Constraint kinds produced by the model builder
+CONSTRAINT_KINDS = ('bool_or', 'bool_and', 'at_most_one', 'exactly_one', 'bool_xor', 'linear',
+                    'int_mod', 'int_div', 'int_prod', 'lin_max', 'table', 'element', 'all_diff')
+
+
+def constraint_kind(constraint) -> str:
+    """Name of the constraint set in a ConstraintProto (None if empty)."""
+    if hasattr(constraint, 'WhichOneof'):  # google.protobuf message (older OR-Tools)
+        return constraint.WhichOneof('constraint')
+    for kind in CONSTRAINT_KINDS:
+        if getattr(constraint, f'has_{kind}')():
+            return kind
+    return None
+
+
+def count_literals(constraint) -> int:
+    """
+    Number of variable references of a ConstraintProto (enforcement literals, boolean arguments
+    and linear terms), used as a size measure of the model.
+    """
+    count = len(constraint.enforcement_literal)
+    kind = constraint_kind(constraint)
+    if kind is None:
+        return count
+    arg = getattr(constraint, kind)
+    if hasattr(arg, 'literals'):
+        count += len(arg.literals)
+    if hasattr(arg, 'vars'):
+        count += len(arg.vars)
+    if hasattr(arg, 'exprs'):
+        count += sum(len(expr.vars) for expr in arg.exprs)
+    if hasattr(arg, 'target') and hasattr(arg.target, 'vars'):
+        count += len(arg.target.vars)
+    return count
+
+
+class BuildProfiler:
+    """
+    Instruments the model construction, one phase per constraint family.\n
+    For each phase it records the wall time, the peak memory allocated by Python (tracemalloc)
+    and the number of variables, constraints and literals added to the model.\n
+    Parameters:\n
+    - model : CpModel | The model being built
+    - enabled : bool | If False, phase() does nothing (no overhead)
+    - trace_memory : bool | Record the peak memory of each phase (tracemalloc slows the build down)
+    - cprofile_dir : str | If given, a cProfile dump <phase>.prof is written per phase in this folder
+    """
+    def __init__(self, model, enabled: bool = True, trace_memory: bool = True, cprofile_dir: str = None):
+        self.model = model
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.cprofile_dir = cprofile_dir
+        self.phases: List[Dict] = []
+        self._started_tracing = False
+
+    @contextmanager
+    def phase(self, name: str):
+        """Context manager measuring everything added to the model inside the block."""
+        if not self.enabled:
+            yield
+            return
+
+        proto = self.model.Proto()
+        variables_before = len(proto.variables)
+        constraints_before = len(proto.constraints)
+
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.reset_peak()
+            memory_before = tracemalloc.get_traced_memory()[0]
+
+        profiler = None
+        if self.cprofile_dir:
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+                os.makedirs(self.cprofile_dir, exist_ok=True)
+                profiler.dump_stats(os.path.join(self.cprofile_dir, f"{name}.prof"))
+
+            peak_memory = None
+            if self.trace_memory:
+                peak_memory = max(0, tracemalloc.get_traced_memory()[1] - memory_before)
+
+            constraints_after = len(proto.constraints)
+            self.phases.append({
+                'family': name,
+                'wall_time': round(wall_time, 4),
+                'peak_memory_mb': round(peak_memory / (1024 * 1024), 3) if peak_memory is not None else None,
+                'variables': len(proto.variables) - variables_before,
+                'constraints': constraints_after - constraints_before,
+                'literals': sum(count_literals(proto.constraints[i]) for i in range(constraints_before, constraints_after)),
+            })
+
+    def stop(self):
+        """Stops the memory tracing started by the profiler."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def as_dict(self) -> Dict:
+        proto = self.model.Proto()
+        return {
+            'total': {
+                'wall_time': round(sum(p['wall_time'] for p in self.phases), 4),
+                'variables': len(proto.variables),
+                'constraints': len(proto.constraints),
+            },
+            'families': list(self.phases),
+        }
+
+    def print_summary(self):
+        print(f"\n{'Family':<38}{'Time (s)':>10}{'Peak MB':>10}{'Vars':>10}{'Constraints':>13}{'Literals':>11}")
+        for p in sorted(self.phases, key=lambda p: p['wall_time'], reverse=True):
+            peak = f"{p['peak_memory_mb']:.2f}" if p['peak_memory_mb'] is not None else "-"
+            print(f"{p['family']:<38}{p['wall_time']:>10.3f}{peak:>10}{p['variables']:>10}{p['constraints']:>13}{p['literals']:>11}")
+
+    def to_json(self, path: str):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.as_dict(), file, indent=2)
+
+    def to_html(self, path: str):
+        """Writes a standalone HTML table of the phases, with a bar showing the share of build time."""
+        report = self.as_dict()
+        total_time = report['total']['wall_time'] or 1
+        rows = []
+        for p in sorted(self.phases, key=lambda p: p['wall_time'], reverse=True):
+            share = p['wall_time'] / total_time * 100
+            peak = f"{p['peak_memory_mb']:.2f}" if p['peak_memory_mb'] is not None else "-"
+            rows.append(
+                f"<tr><td>{html.escape(p['family'])}</td><td>{p['wall_time']:.3f}</td>"
+                f"<td><div style='background:#4472C4;height:12px;width:{share:.1f}%'></div></td>"
+                f"<td>{peak}</td><td>{p['variables']}</td><td>{p['constraints']}</td><td>{p['literals']}</td></tr>"
+            )
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(
+                "<html><head><meta charset='utf-8'><title>Model build profile</title>"
+                "<style>body{font-family:sans-serif}td,th{padding:4px 10px;text-align:right}"
+                "td:first-child,th:first-child{text-align:left}td:nth-child(3){width:200px}</style></head><body>"
+                f"<h2>Model build profile</h2><p>Total: {report['total']['wall_time']:.3f}s, "
+                f"{report['total']['variables']} variables, {report['total']['constraints']} constraints</p>"
+                "<table><tr><th>Family</th><th>Time (s)</th><th>Share</th><th>Peak MB</th>"
+                "<th>Variables</th><th>Constraints</th><th>Literals</th></tr>"
+                + "".join(rows) + "</table></body></html>"
+            )
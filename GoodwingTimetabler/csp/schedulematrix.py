@@ -0,0 +1,182 @@
+from typing import Dict, List
+
+import numpy as np
+
+from .objects import University, Course
+
+# Slot of the day of the lunch break, never counted as a gap
+LUNCH_SLOT = 2
+# Number of slots at the end of the day counted as late
+LATE_SLOTS = 2
+
+
+def first_appearance_counts(keys: np.ndarray, names: List[str]) -> Dict[str, int]:
+    """
+    Number of occurrences of every name, in order of first appearance of its keys (entities sharing a name are summed).\n
+    Parameters:\n
+    - keys : np.ndarray | Entity index of every course, in course order
+    - names : [str] | Name of every entity index
+    """
+    counts = np.bincount(keys, minlength=len(names))
+    unique, first = np.unique(keys, return_index=True)
+    result = {}
+    for key in unique[np.argsort(first)].tolist():
+        result[names[key]] = result.get(names[key], 0) + int(counts[key])
+    return result
+
+
+class ScheduleMatrix:
+    """
+    Occupancy tensor of a solution: groups x days x slots of the day, built once from the courses.\n
+    Every cell holds the number of courses of a group on a slot (count) and the position of its course in the course
+    list (course, -1 if free; the last one if the group is double-booked). The subject, teacher, room and online layers
+    are read through it, so the analyses of the intelligence report are reductions over the tensor.\n
+    Parameters:\n
+    - university : University | The instance
+    - timeslot, group, subject, teacher, room : array of int | Indices in university.timeslots, groups, subjects,
+      teachers and rooms of every course, in course order
+    """
+    def __init__(self, university: University, timeslot, group, subject, teacher, room):
+        self.university = university
+        self.slots_per_day = slots = len(university.time_ranges)
+        self.days = -(-len(university.timeslots) // slots)
+
+        # Per course columns
+        self.timeslot = np.asarray(timeslot, dtype=np.int64)
+        self.group = np.asarray(group, dtype=np.int64)
+        self.subject = np.asarray(subject, dtype=np.int64)
+        self.teacher = np.asarray(teacher, dtype=np.int64)
+        self.room = np.asarray(room, dtype=np.int64)
+        self.day, self.slot = np.divmod(self.timeslot, slots)
+        self.online_rooms = np.array([room.name.lower() == "online" for room in university.rooms], dtype=bool)
+        self.online = self.online_rooms[self.room]
+
+        shape = (len(university.groups), self.days, slots)
+        cells = (self.group, self.day, self.slot)
+        positions = np.arange(len(self.timeslot))
+        self.count = np.zeros(shape, dtype=np.int32)
+        np.add.at(self.count, cells, 1)
+        # With repeated cells, the last assignment wins: course keeps the last course of a cell, first_course the first
+        self.course = np.full(shape, -1, dtype=np.int64)
+        self.course[cells] = positions
+        self.first_course = np.full(shape, -1, dtype=np.int64)
+        self.first_course[tuple(axis[::-1] for axis in cells)] = positions[::-1]
+
+    @classmethod
+    def from_courses(cls, university: University, courses: List[Course]) -> 'ScheduleMatrix':
+        indices = np.array([(course.timeslot.index, course.group.index, course.subject.index, course.teacher.index,
+                             course.room.index) for course in courses], dtype=np.int64).reshape(-1, 5)
+        return cls(university, *indices.T)
+
+    def __len__(self):
+        return len(self.timeslot)
+
+    @property
+    def occupied(self) -> np.ndarray:
+        return self.count > 0
+
+    def layer(self, values: np.ndarray, empty=-1, first: bool = False) -> np.ndarray:
+        """Tensor of a per course column (e.g. room), empty on free cells (read from first_course if first)."""
+        course = self.first_course if first else self.course
+        if not len(values):
+            return np.full(course.shape, empty)
+        return np.where(course >= 0, values[course], empty)
+
+    @property
+    def online_layer(self) -> np.ndarray:
+        return self.layer(self.online, False)
+
+    @property
+    def room_layer(self) -> np.ndarray:
+        return self.layer(self.room)
+
+    @property
+    def teacher_layer(self) -> np.ndarray:
+        return self.layer(self.teacher)
+
+    def first_positions(self, mask: np.ndarray = None):
+        """
+        Position of the first course (among those of mask) of every group and of every group and day.\n
+        Returns:\n
+        - (np.ndarray, np.ndarray) | (groups,) and (groups, days) positions, len(self) where there is none
+        """
+        positions = np.arange(len(self))
+        if mask is not None:
+            positions = positions[mask]
+        group, day = self.group[positions], self.day[positions]
+        by_group = np.full(self.count.shape[0], len(self), dtype=np.int64)
+        np.minimum.at(by_group, group, positions)
+        by_day = np.full(self.count.shape[:2], len(self), dtype=np.int64)
+        np.minimum.at(by_day, (group, day), positions)
+        return by_group, by_day
+
+    def gaps(self, lunch_slot: int = LUNCH_SLOT) -> np.ndarray:
+        """
+        Free slots between the first and the last course of a group's day, on days with at least 2 courses outside the
+        lunch break (the lunch break is never a gap).\n
+        Returns:\n
+        - np.ndarray | (groups, days, slots) bool tensor
+        """
+        slots = np.arange(self.slots_per_day)
+        lunch = slots == lunch_slot
+        occupied = self.occupied & ~lunch
+        courses = np.where(lunch, 0, self.count).sum(axis=2)
+        first = occupied.argmax(axis=2)[..., None]
+        last = self.slots_per_day - 1 - occupied[..., ::-1].argmax(axis=2)[..., None]
+        return (slots >= first) & (slots <= last) & ~occupied & ~lunch & (courses >= 2)[..., None]
+
+    def transitions(self) -> np.ndarray:
+        """
+        Changes between an online and a physical course on consecutive slots of a group's day.\n
+        Returns:\n
+        - np.ndarray | (groups, days, slots - 1) bool tensor, True where the course of slot s and the one of s + 1
+          differ (with a double-booked group, the last course of s and the first one of s + 1)
+        """
+        occupied = self.occupied
+        online_last, online_first = self.layer(self.online, False), self.layer(self.online, False, first=True)
+        return occupied[..., :-1] & occupied[..., 1:] & (online_last[..., :-1] != online_first[..., 1:])
+
+    def late(self, late_slots: int = LATE_SLOTS) -> np.ndarray:
+        """Courses (per course, bool) in the last late_slots slots of the day."""
+        return self.slot >= self.slots_per_day - late_slots
+
+    def overlaps(self, keys: np.ndarray, mask: np.ndarray = None) -> int:
+        """Number of pairs of courses sharing a timeslot and a key (e.g. the teacher), among the courses of mask."""
+        keys = keys if mask is None else keys[mask]
+        timeslot = self.timeslot if mask is None else self.timeslot[mask]
+        counts = np.unique(timeslot * (int(keys.max(initial=0)) + 1) + keys, return_counts=True)[1]
+        return int((counts * (counts - 1) // 2).sum())
+
+    def utilization(self) -> Dict[str, Dict]:
+        """Number of courses per room, teacher (last name), timeslot, subject and group, in order of first appearance."""
+        university = self.university
+        return {
+            'rooms': first_appearance_counts(self.room, [room.name for room in university.rooms]),
+            'teachers': first_appearance_counts(self.teacher, [teacher.last_name for teacher in university.teachers]),
+            'timeslots': first_appearance_counts(self.timeslot, list(range(len(university.timeslots)))),
+            'by_subject': first_appearance_counts(self.subject, [subject.name for subject in university.subjects]),
+            'by_group': first_appearance_counts(self.group, [group.name for group in university.groups]),
+        }
+
+    def group_penalties(self) -> Dict[str, Dict[str, int]]:
+        """Courses, gaps, online transitions and late courses of every group having courses, in group order."""
+        groups = len(self.university.groups)
+        courses = np.bincount(self.group, minlength=groups)
+        gaps = self.gaps().sum(axis=(1, 2))
+        transitions = self.transitions().sum(axis=(1, 2))
+        late = np.bincount(self.group[self.late()], minlength=groups)
+        return {
+            group.name: {'courses': int(courses[g]), 'gaps': int(gaps[g]), 'transitions': int(transitions[g]), 'late': int(late[g])}
+            for g, group in enumerate(self.university.groups) if courses[g]
+        }
+
+    def summary(self) -> Dict[str, int]:
+        """Totals of the analyses, cheap enough to compute on every solution found during the search."""
+        return {
+            'courses': len(self),
+            'room_overlaps': self.overlaps(self.room, ~self.online),
+            'teacher_overlaps': self.overlaps(self.teacher),
+            'gaps': int(self.gaps().sum()),
+            'transitions': int(self.transitions().sum()),
+            'late': int(self.late().sum()),
+        }
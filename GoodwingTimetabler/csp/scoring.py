@@ -0,0 +1,226 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .objects import University, Course
+
+# Kept in sync with csp.OBJECTIVE_FAMILIES (not imported to keep OR-Tools out of the scorer)
+SCORE_FAMILIES = ('conflicts', 'balanceCoursesAcrossDays', 'balanceSubjectsAcrossWeeks', 'minimizeGaps',
+                  'minimize_campus_returns', 'minimize_late_slots')
+
+# Weights of the objective built by CSP.createSoftConstraints
+WEEK_BALANCE_WEIGHT = 2
+GAP_WEIGHT = 3
+TRANSITION_WEIGHT = 10
+LATE_WEIGHT = 8
+# CSP.balanceCoursesAcrossDays counts the courses of blocks of 7 timeslots
+DAY_BALANCE_SLOTS = 7
+# Slot of the day skipped by CSP.minimizeGaps
+GAP_LUNCH_SLOT = 2
+
+
+def gap_patterns(slots_per_day: int, lunch_slot: int = GAP_LUNCH_SLOT) -> np.ndarray:
+    """
+    Gaps penalized by CSP.minimizeGaps, enumerated as in its loops.\n
+    Returns:\n
+    - np.ndarray | (patterns, 5) rows: slot used, next slot free, slot free, next slot used and penalty
+    """
+    slots = [slot for slot in range(slots_per_day) if slot != lunch_slot]
+    patterns = []
+    for i in range(len(slots) - 2):
+        if slots[i + 1] != slots[i] + 1:
+            continue
+        for j in range(i + 1, len(slots) - 1):
+            if slots[j + 1] != slots[j] + 1:
+                continue
+            patterns.append((slots[i], slots[i + 1], slots[j], slots[j + 1], GAP_WEIGHT * (slots[j] - slots[i])))
+    return np.array(patterns, dtype=np.int64).reshape(-1, 5)
+
+
+def _equal_pairs(keys: np.ndarray) -> np.ndarray:
+    """Number of pairs of equal keys in every row (negative keys never match)."""
+    candidates, courses = keys.shape
+    if courses < 2:
+        return np.zeros(candidates, dtype=np.int64)
+    # Negative keys are made unique within their row
+    keys = np.where(keys < 0, -1 - np.arange(courses), keys)
+    keys = np.sort(keys, axis=1)
+    same = np.concatenate([np.zeros((candidates, 1), dtype=bool), keys[:, 1:] == keys[:, :-1]], axis=1)
+    # A key equal to the k previous ones closes k pairs
+    positions = np.arange(courses)
+    run_start = np.maximum.accumulate(np.where(same, 0, positions), axis=1)
+    return (positions - run_start).sum(axis=1)
+
+
+def _counts(cells: np.ndarray, size: int) -> np.ndarray:
+    """(candidates, size) number of courses of every candidate in every cell (negative cells are ignored)."""
+    candidates = cells.shape[0]
+    flat = np.where(cells >= 0, cells + np.arange(candidates)[:, None] * size, candidates * size)
+    return np.bincount(flat.ravel(), minlength=candidates * size + 1)[:-1].reshape(candidates, size)
+
+
+class ScheduleScorer:
+    """
+    Objective of the CP-SAT model (conflicts and the families of CSP.createSoftConstraints) evaluated with NumPy, for
+    a batch of candidate timetables at once.\n
+    A candidate gives the timeslot, room and teacher of every course; a batch is a (candidates x courses) array of
+    each, the courses being in the order given here. The score of a solution is the objective CP-SAT reports for it
+    once its auxiliary variables are minimal (as in an optimal solution): the balance indicators of the model only
+    count courses one way, so a day or week is only penalized below its target.\n
+    Parameters:\n
+    - university : University | The instance
+    - group, subject : array of int | Group and subject of every course (any numbering, e.g. CourseTable ids)
+    - has_teacher : array of bool | Courses with a teacher assignment variable (the others have no teacher conflicts)
+    """
+    def __init__(self, university: University, group, subject, has_teacher=None):
+        self.university = university
+        self.slots_per_day = slots = len(university.time_ranges)
+        self.timeslot_count = timeslots = len(university.timeslots)
+        groups, self.group = np.unique(np.asarray(group, dtype=np.int64), return_inverse=True)
+        pairs, self.pair = np.unique(self.group * (int(np.max(subject, initial=0)) + 1) + np.asarray(subject, dtype=np.int64),
+                                     return_inverse=True)
+        self.group, self.pair = self.group.ravel(), self.pair.ravel()
+        self.has_teacher = np.ones(len(self.group), dtype=bool) if has_teacher is None else np.asarray(has_teacher, dtype=bool)
+        self.group_count, self.pair_count = len(groups), len(pairs)
+
+        # Day balance: every group aims at int(courses / days) courses a day
+        self.balance_days = timeslots // DAY_BALANCE_SLOTS
+        group_courses = np.bincount(self.group, minlength=self.group_count)
+        self.day_target = group_courses // self.balance_days if self.balance_days else np.zeros(self.group_count, dtype=np.int64)
+
+        # Week balance: every group and subject with 2 courses or more aims at int(courses / weeks) courses a week (at least 1)
+        self.weeks = timeslots // (7 * slots)
+        pair_courses = np.bincount(self.pair, minlength=self.pair_count)
+        self.week_pairs = pair_courses >= 2 if self.weeks > 1 else np.zeros(self.pair_count, dtype=bool)
+        self.week_target = np.maximum(1, pair_courses // max(self.weeks, 1))
+
+        # Gaps, transitions and late slots are counted per day of slots_per_day timeslots
+        self.days = timeslots // slots
+        self.gaps = gap_patterns(slots)
+        self.late = np.zeros(timeslots, dtype=bool)
+        for day in range(self.days):
+            for offset in (slots - 2, slots - 1):
+                if 0 <= day * slots + offset < timeslots:
+                    self.late[day * slots + offset] = True
+        self.online_rooms = np.array([room.name.lower() == "online" for room in university.rooms], dtype=bool)
+
+    @classmethod
+    def from_csp(cls, csp: 'CSP') -> 'ScheduleScorer':
+        """Scorer of the active courses of a CSP, in CourseTable row order (see csp_assignment)."""
+        table = csp.courses
+        rows = table.rows()
+        return cls(csp.university, table.group_id[rows], table.subject_id[rows], table.teacher_index[rows] >= 0)
+
+    @staticmethod
+    def csp_assignment(csp: 'CSP') -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Timeslot, room and teacher (-1 without assignment) of the active courses in the last solution of a CSP."""
+        table = csp.courses
+        rows = table.rows()
+        solution = np.asarray(csp.solver.ResponseProto().solution, dtype=np.int64)
+        teacher_index = table.teacher_index[rows]
+        teacher = np.where(teacher_index >= 0, solution[np.maximum(teacher_index, 0)], -1)
+        return solution[table.timeslot_index[rows]], solution[table.room_index[rows]], teacher
+
+    @classmethod
+    def from_courses(cls, university: University, courses: List[Course]) -> 'ScheduleScorer':
+        """Scorer of a list of courses (see course_assignment)."""
+        return cls(university, [course.group.index for course in courses], [course.subject.index for course in courses])
+
+    @staticmethod
+    def course_assignment(courses: List[Course]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Timeslot, room and teacher indices of a list of courses."""
+        indices = np.array([(course.timeslot.index, course.room.index, course.teacher.index) for course in courses],
+                           dtype=np.int64).reshape(-1, 3)
+        return indices[:, 0], indices[:, 1], indices[:, 2]
+
+    def __len__(self):
+        return len(self.group)
+
+    def score(self, timeslot, room, teacher, weights: Dict[str, float] = None, chunk: int = None) -> Dict[str, np.ndarray]:
+        """
+        Penalties of a batch of candidates.\n
+        Parameters:\n
+        - timeslot, room, teacher : array of int | (candidates, courses) indices in university.timeslots, rooms and
+          teachers (a single candidate can be given as a 1-D array)
+        - weights : {str: float} | Factor of every family in the total (1 by default), to compare weightings
+        - chunk : int | Candidates evaluated together (bounds the memory used; by default about 32 MB of counters)
+        Returns:\n
+        - {str: np.ndarray} | (candidates,) penalty of every family of SCORE_FAMILIES, their (weighted) total, and
+          invalid_transitions: online/physical changes that the model can't satisfy (a single direction between two
+          slots makes the transition penalty both 0 and 10), non-zero for timetables CP-SAT can't return
+        """
+        timeslot, room, teacher = (np.atleast_2d(np.asarray(values, dtype=np.int64)) for values in (timeslot, room, teacher))
+        if not (timeslot.shape == room.shape == teacher.shape) or timeslot.shape[1] != len(self):
+            raise ValueError(f"Expected (candidates, {len(self)}) timeslot, room and teacher arrays")
+        if chunk is None:
+            cells = max(self.group_count * self.days * self.slots_per_day, self.group_count * self.balance_days,
+                        self.pair_count * self.weeks, 1)
+            chunk = max(1, (1 << 22) // cells)
+        parts = [self.score_chunk(timeslot[start:start + chunk], room[start:start + chunk], teacher[start:start + chunk])
+                 for start in range(0, len(timeslot), chunk)]
+        scores = {name: np.concatenate([part[name] for part in parts]) if parts else np.zeros(0, dtype=np.int64)
+                  for name in SCORE_FAMILIES + ('invalid_transitions',)}
+        weights = weights or {}
+        scores['total'] = sum(scores[family] * weights.get(family, 1) for family in SCORE_FAMILIES)
+        return scores
+
+    def score_chunk(self, timeslot: np.ndarray, room: np.ndarray, teacher: np.ndarray) -> Dict[str, np.ndarray]:
+        """Unweighted family penalties of (candidates, courses) arrays (see score)."""
+        candidates = len(timeslot)
+        slots, days = self.slots_per_day, self.days
+        scores = {}
+
+        # Room conflicts (except online) and teacher conflicts: one per pair of courses
+        online = self.online_rooms[room]
+        room_keys = np.where(online, -1, timeslot * len(self.online_rooms) + room)
+        teacher_keys = np.where(self.has_teacher & (teacher >= 0), timeslot * len(self.university.teachers) + teacher, -1)
+        scores['conflicts'] = _equal_pairs(room_keys) + _equal_pairs(teacher_keys)
+
+        # Day balance: days below the target of their group
+        if self.balance_days:
+            day = timeslot // DAY_BALANCE_SLOTS
+            counts = _counts(np.where(day < self.balance_days, self.group * self.balance_days + day, -1),
+                             self.group_count * self.balance_days).reshape(candidates, self.group_count, self.balance_days)
+            scores['balanceCoursesAcrossDays'] = np.maximum(0, self.day_target[:, None] - counts).sum(axis=(1, 2))
+        else:
+            scores['balanceCoursesAcrossDays'] = np.zeros(candidates, dtype=np.int64)
+
+        # Week balance: weeks below the target of their group and subject
+        if self.week_pairs.any():
+            week = timeslot // (7 * slots)
+            counts = _counts(np.where(week < self.weeks, self.pair * self.weeks + week, -1),
+                             self.pair_count * self.weeks).reshape(candidates, self.pair_count, self.weeks)
+            below = np.maximum(0, self.week_target[:, None] - counts) * self.week_pairs[:, None]
+            scores['balanceSubjectsAcrossWeeks'] = WEEK_BALANCE_WEIGHT * below.sum(axis=(1, 2))
+        else:
+            scores['balanceSubjectsAcrossWeeks'] = np.zeros(candidates, dtype=np.int64)
+
+        # Slots used by every group, day and slot of the day
+        day, slot = np.divmod(timeslot, slots)
+        cells = np.where(day < days, (self.group * days + day) * slots + slot, -1)
+        shape = (candidates, self.group_count, days, slots)
+        used = _counts(cells, self.group_count * days * slots).reshape(shape) > 0
+
+        # Gaps: used slot, free slot ... free slot, used slot
+        if len(self.gaps):
+            start, after_start, end, after_end, penalty = self.gaps.T
+            gaps = used[..., start] & ~used[..., after_start] & ~used[..., end] & used[..., after_end]
+            scores['minimizeGaps'] = (gaps * penalty).sum(axis=(1, 2, 3))
+        else:
+            scores['minimizeGaps'] = np.zeros(candidates, dtype=np.int64)
+
+        # Online / physical changes between consecutive slots
+        if self.online_rooms.any():
+            has_online = _counts(np.where(online, cells, -1), self.group_count * days * slots).reshape(shape) > 0
+            has_physical = _counts(np.where(online, -1, cells), self.group_count * days * slots).reshape(shape) > 0
+            to_physical = has_online[..., :-1] & has_physical[..., 1:]
+            to_online = has_physical[..., :-1] & has_online[..., 1:]
+            scores['minimize_campus_returns'] = TRANSITION_WEIGHT * (to_physical & to_online).sum(axis=(1, 2, 3))
+            scores['invalid_transitions'] = (to_physical ^ to_online).sum(axis=(1, 2, 3))
+        else:
+            scores['minimize_campus_returns'] = np.zeros(candidates, dtype=np.int64)
+            scores['invalid_transitions'] = np.zeros(candidates, dtype=np.int64)
+
+        # Courses in the last two slots of a day
+        scores['minimize_late_slots'] = LATE_WEIGHT * self.late[timeslot].sum(axis=1)
+        return scores
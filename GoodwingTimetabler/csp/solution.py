@@ -0,0 +1,174 @@
+import datetime as dt
+import os
+import re
+from typing import Dict, List
+
+import numpy as np
+
+from .objects import University, Course
+
+# pandas (and pyarrow for Parquet) are imported by the exports using them
+
+# Columns of a solution frame, in export order
+SOLUTION_COLUMNS = ('timeslot', 'date', 'start', 'end', 'group', 'subject', 'teacher', 'room', 'online')
+
+# Entities getting one iCalendar file each
+ICAL_ENTITIES = ('group', 'teacher', 'room')
+
+
+def ical_path(output_dir: str, entity: str, name: str) -> str:
+    """Path of the iCalendar file of a group, teacher or room (entity) named name."""
+    return os.path.join(output_dir, entity + '_' + re.sub(r'[^\w.-]', '_', name) + '.ics')
+
+
+def _ical_text(values: np.ndarray) -> np.ndarray:
+    """Escapes iCalendar TEXT values (RFC 5545, 3.3.11)."""
+    values = np.char.replace(values.astype(str), '\\', '\\\\')
+    for char in (';', ','):
+        values = np.char.replace(values, char, '\\' + char)
+    return np.char.replace(values, '\n', '\\n')
+
+
+def _ical_fold(line: str) -> str:
+    """Folds a content line longer than 75 octets (RFC 5545, 3.1)."""
+    if len(line.encode('utf-8')) <= 75:
+        return line
+    parts, current = [], ''
+    for char in line:
+        if len((current + char).encode('utf-8')) > (75 if not parts else 74):
+            parts.append(current)
+            current = ''
+        current += char
+    parts.append(current)
+    return '\r\n '.join(parts)
+
+
+class SolutionFrame:
+    """
+    Columnar view of a solution: one row per course, as indices into the university lists.\n
+    Rows are sorted by timeslot, group and subject, so that the exports of two runs can be diffed line by line.
+    Text columns are built by indexing small per-entity tables, without any per-course object access.\n
+    Parameters:\n
+    - university : University | The instance
+    - timeslot, group, subject, teacher, room : array of int | Indices in university.timeslots, groups, subjects, teachers and rooms
+    """
+    def __init__(self, university: University, timeslot, group, subject, teacher, room):
+        self.university = university
+        order = np.lexsort((np.asarray(subject), np.asarray(group), np.asarray(timeslot)))
+        self.timeslot = np.asarray(timeslot, dtype=np.int32)[order]
+        self.group = np.asarray(group, dtype=np.int32)[order]
+        self.subject = np.asarray(subject, dtype=np.int32)[order]
+        self.teacher = np.asarray(teacher, dtype=np.int32)[order]
+        self.room = np.asarray(room, dtype=np.int32)[order]
+
+    @classmethod
+    def from_courses(cls, university: University, courses: List[Course]) -> 'SolutionFrame':
+        indices = np.array([(course.timeslot.index, course.group.index, course.subject.index, course.teacher.index,
+                             course.room.index) for course in courses], dtype=np.int32).reshape(-1, 5)
+        return cls(university, *indices.T)
+
+    def __len__(self):
+        return len(self.timeslot)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """
+        Values of the SOLUTION_COLUMNS.\n
+        Returns:\n
+        - {str: np.ndarray} | timeslot (int), date (datetime64[D]), start and end ("HH:MM"), group, subject, teacher
+          ("First Last") and room names, online (bool)
+        """
+        university = self.university
+        timeslots = university.timeslots
+        dates = np.array([timeslot.day for timeslot in timeslots], dtype='datetime64[D]')
+        starts = np.array([timeslot.start.strftime('%H:%M') for timeslot in timeslots])
+        ends = np.array([timeslot.end.strftime('%H:%M') for timeslot in timeslots])
+        rooms = np.array([room.name for room in university.rooms])
+        return {
+            'timeslot': self.timeslot,
+            'date': dates[self.timeslot],
+            'start': starts[self.timeslot],
+            'end': ends[self.timeslot],
+            'group': np.array([group.name for group in university.groups])[self.group],
+            'subject': np.array([subject.name for subject in university.subjects])[self.subject],
+            'teacher': np.array([f"{teacher.first_name} {teacher.last_name}" for teacher in university.teachers])[self.teacher],
+            'room': rooms[self.room],
+            'online': (np.char.lower(rooms) == "online")[self.room],
+        }
+
+    def to_pandas(self):
+        import pandas as pd
+
+        return pd.DataFrame(self.columns(), columns=list(SOLUTION_COLUMNS))
+
+    def to_csv(self, path: str):
+        self.to_pandas().to_csv(path, index=False)
+
+    def to_parquet(self, path: str):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError("The Parquet export needs pyarrow (pip install pyarrow)") from None
+        self.to_pandas().to_parquet(path, engine='pyarrow', index=False)
+
+    def to_jsonl(self, path: str):
+        """One JSON object per course and line (dates as YYYY-MM-DD), for streaming consumers."""
+        frame = self.to_pandas()
+        frame['date'] = np.datetime_as_string(frame['date'].to_numpy(dtype='datetime64[D]'), unit='D')
+        frame.to_json(path, orient='records', lines=True, force_ascii=False)
+
+    def to_icalendar(self, output_dir: str, entity: str = 'group', stamp: dt.datetime = None, names: List[str] = None) -> List[str]:
+        """
+        Writes one iCalendar file (.ics) per group, teacher or room, with one event per course.\n
+        Parameters:\n
+        - output_dir : str | Folder receiving <entity>_<name>.ics files
+        - entity : str | 'group', 'teacher' or 'room'
+        - stamp : datetime | DTSTAMP of the events (defaults to the first day of the semester, so that the files of two
+          runs only differ by their courses)
+        - names : [str] | Only write the files of these entities (names as in columns(), e.g. "Ada Lovelace")
+        Returns:\n
+        - [str] | Paths of the files written
+        """
+        if entity not in ICAL_ENTITIES:
+            raise ValueError(f"Unknown entity '{entity}', expected one of {', '.join(ICAL_ENTITIES)}")
+        columns = self.columns()
+        if stamp is None:
+            stamp = dt.datetime.combine(self.university.timeslots[0].day, dt.time())
+        dtstamp = stamp.strftime('%Y%m%dT%H%M%SZ')
+
+        # Every event line is built for all the courses at once (times are floating local times)
+        day = np.char.replace(np.datetime_as_string(columns['date'], unit='D'), '-', '')
+        start = np.char.add(np.char.add(day, 'T'), np.char.add(np.char.replace(columns['start'], ':', ''), '00'))
+        end = np.char.add(np.char.add(day, 'T'), np.char.add(np.char.replace(columns['end'], ':', ''), '00'))
+        uid = [f"{t}-{g}-{s}@goodwing-timetabler" for t, g, s in zip(self.timeslot.tolist(), self.group.tolist(), self.subject.tolist())]
+        summary, location = _ical_text(columns['subject']), _ical_text(columns['room'])
+        description = _ical_text(np.char.add(np.char.add(np.char.add('Group: ', columns['group']), '\nTeacher: '), columns['teacher']))
+        events = [
+            "\r\n".join(_ical_fold(line) for line in (
+                "BEGIN:VEVENT", f"UID:{u}", f"DTSTAMP:{dtstamp}", f"DTSTART:{s}", f"DTEND:{e}", f"SUMMARY:{su}",
+                f"LOCATION:{lo}", f"DESCRIPTION:{de}", "END:VEVENT"))
+            for u, s, e, su, lo, de in zip(uid, start.tolist(), end.tolist(), summary.tolist(), location.tolist(), description.tolist())
+        ]
+
+        os.makedirs(output_dir, exist_ok=True)
+        keys = getattr(self, entity)
+        entity_names = columns[entity]
+        wanted = set(names) if names is not None else None
+        paths = []
+        # Rows of each entity, in order of first appearance (rows stay sorted by timeslot)
+        order = np.argsort(keys, kind='stable')
+        bounds = np.flatnonzero(np.diff(keys[order])) + 1
+        groups = sorted(np.split(order, bounds), key=lambda rows: rows[0]) if len(order) else []
+        for rows in groups:
+            name = str(entity_names[rows[0]])
+            if wanted is not None and name not in wanted:
+                continue
+            path = ical_path(output_dir, entity, name)
+            calendar = "\r\n".join([
+                "BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//Goodwing Timetabler//EN", "CALSCALE:GREGORIAN",
+                _ical_fold(f"X-WR-CALNAME:{_ical_text(np.array([f'{self.university.name} - {name}']))[0]}"),
+                *(events[row] for row in rows.tolist()),
+                "END:VCALENDAR", ""])
+            with open(path, 'w', encoding='utf-8', newline='') as file:
+                file.write(calendar)
+            paths.append(path)
+        return paths
@@ -0,0 +1,159 @@
+import json
+import os
+import sys
+import threading
+import time
+from typing import Callable, List
+
+
+class SolverTelemetry:
+    """
+    Structured stream of solver events (start, solution, heartbeat, end).\n
+    Every event is a flat dict with the wall time, CPU time and RSS of the process, plus event specific fields
+    (objective, best_bound, gap, solutions...). Events are appended as JSON lines to a file and/or passed to listeners.\n
+    Parameters:\n
+    - jsonl_path : str | File receiving one JSON object per event (None to disable)
+    - listeners : [Callable[[dict], None]] | Functions called with every event (e.g. a TerminalRenderer)
+    - heartbeat : float | Seconds between two heartbeat events while solving (0 to disable)
+    """
+    def __init__(self, jsonl_path: str = None, listeners: List[Callable[[dict], None]] = None, heartbeat: float = 0):
+        self.jsonl_path = jsonl_path
+        self.listeners = list(listeners or [])
+        self.heartbeat = heartbeat
+        self.start_wall = time.time()
+        self.start_cpu = time.process_time()
+        self.paused_time = 0.0
+        import psutil  # Only needed once a solve is monitored
+        self._process = psutil.Process(os.getpid())
+        self._file = None
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: Callable[[dict], None]):
+        self.listeners.append(listener)
+
+    def start(self, **fields):
+        """Resets the clocks, opens the JSONL file and emits the 'start' event."""
+        self.start_wall = time.time()
+        self.start_cpu = time.process_time()
+        self.paused_time = 0.0
+        if self.jsonl_path:
+            directory = os.path.dirname(self.jsonl_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.jsonl_path, 'w', encoding='utf-8')
+        self.emit('start', **fields)
+
+    def elapsed(self) -> float:
+        """Wall time since start, excluding the time spent paused (e.g. waiting for the user)."""
+        return time.time() - self.start_wall - self.paused_time
+
+    def emit(self, event: str, **fields):
+        record = {
+            'event': event,
+            'wall_time': round(self.elapsed(), 4),
+            'cpu_time': round(time.process_time() - self.start_cpu, 4),
+            'rss_mb': round(self._process.memory_info().rss / (1024 * 1024), 2),
+        }
+        record.update(fields)
+
+        with self._lock:
+            if self._file is not None:
+                self._file.write(json.dumps(record) + '\n')
+                self._file.flush()
+            for listener in self.listeners:
+                listener(record)
+        return record
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def relative_gap(objective: float, bound: float) -> float:
+    """Relative gap between the incumbent and the best bound (0 means proven optimal)."""
+    if objective is None or bound is None:
+        return None
+    return abs(objective - bound) / max(1.0, abs(objective))
+
+
+class TerminalRenderer:
+    """
+    Telemetry listener rewriting a single status line on the terminal.\n
+    Parameters:\n
+    - stream : file | Where to write (sys.stdout by default)
+    """
+    def __init__(self, stream=None):
+        self.stream = stream
+        self.max_ram = 0
+        self.max_cpu = 0
+        self.objective = None
+        self.solutions = 0
+        self._last_wall = 0.0
+        self._last_cpu = 0.0
+        self._max_line_length = 0
+
+    def __call__(self, record: dict):
+        stream = self.stream or sys.stdout
+        if record['event'] == 'solution':
+            self.objective = record['objective']
+            self.solutions = record['solutions']
+        elif record['event'] == 'end':
+            stream.write('\n')
+            stream.flush()
+            return
+
+        # CPU usage over the last interval, in % of one core
+        wall_delta = record['wall_time'] - self._last_wall
+        cpu_usage = (record['cpu_time'] - self._last_cpu) / wall_delta * 100 if wall_delta > 0 else 0
+        self._last_wall, self._last_cpu = record['wall_time'], record['cpu_time']
+        self.max_cpu = max(self.max_cpu, cpu_usage)
+        self.max_ram = max(self.max_ram, record['rss_mb'])
+
+        objective_info = f"| Objective: {self.objective if self.objective is not None else 'N/A'}"
+        solutions_info = f"| Solutions: {self.solutions}"
+        status_line = (f"Elapsed time: {record['wall_time']:.2f}s | CPU: {cpu_usage:.2f}% | RAM: {record['rss_mb']:.2f}MB "
+                       f"| Peak CPU: {self.max_cpu:.2f}% | Max RAM: {self.max_ram:.2f}MB {objective_info} {solutions_info}")
+
+        # Pad with spaces so a shorter line fully overwrites the previous one
+        self._max_line_length = max(self._max_line_length, len(status_line))
+        stream.write('\r' + status_line.ljust(self._max_line_length))
+        stream.flush()
+
+
+def load_telemetry(jsonl_path: str) -> List[dict]:
+    """Reads back the events of a telemetry JSONL file."""
+    with open(jsonl_path, encoding='utf-8') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def plot_telemetry(jsonl_path: str, save_path: str = None):
+    """
+    Plots the incumbent objective and best bound against wall time from a telemetry file.\n
+    Parameters:\n
+    - jsonl_path : str | Telemetry file written during a solve
+    - save_path : str | Image path (the plot is shown if None)
+    """
+    import matplotlib
+    if save_path:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    solutions = [e for e in load_telemetry(jsonl_path) if e['event'] == 'solution']
+    times = [e['wall_time'] for e in solutions]
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.step(times, [e['objective'] for e in solutions], where='post', label='Objective')
+    ax.step(times, [e['best_bound'] for e in solutions], where='post', label='Best bound')
+    ax.set_xlabel("Wall time (s)")
+    ax.set_ylabel("Penalty")
+    ax.set_title("Solver convergence")
+    ax.grid(True, linestyle='--', alpha=0.5)
+    ax.legend()
+
+    if save_path:
+        fig.savefig(save_path, dpi=150, bbox_inches='tight')
+        plt.close(fig)
+    else:
+        plt.show()
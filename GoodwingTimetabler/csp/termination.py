@@ -0,0 +1,179 @@
+import re
+from typing import List
+
+
+class SearchState:
+    """
+    Snapshot of the search given to the termination rules.\n
+    Parameters:\n
+    - elapsed : float | Solving time in seconds (pauses excluded)
+    - objective : float | Best objective value found (None before the first solution)
+    - best_bound : float | Best objective bound proved by the solver
+    - gap : float | Relative gap between objective and bound (None before the first solution)
+    - solutions : int | Number of solutions found
+    - conflicts : int | Conflicts of the last solution (None before the first solution)
+    - feasible : bool | True once a conflict-free solution has been found
+    - last_improvement : float | Elapsed time of the last improving solution (None before the first solution)
+    """
+    def __init__(self, elapsed: float = 0.0, objective: float = None, best_bound: float = None, gap: float = None,
+                 solutions: int = 0, conflicts: int = None, feasible: bool = False, last_improvement: float = None):
+        self.elapsed = elapsed
+        self.objective = objective
+        self.best_bound = best_bound
+        self.gap = gap
+        self.solutions = solutions
+        self.conflicts = conflicts
+        self.feasible = feasible
+        self.last_improvement = last_improvement
+
+
+class StopRule:
+    """
+    Base class of the termination rules. Rules are combined with & (all) and | (any).\n
+    time_based is True when the rule can become true without a new solution, in which case it
+    must also be evaluated periodically and not only from the solution callback.
+    """
+    time_based = False
+
+    def check(self, state: SearchState) -> bool:
+        raise NotImplementedError
+
+    def explain(self, state: SearchState) -> str:
+        """Description of the part of the policy that is met (None if the policy is not met)."""
+        return str(self) if self.check(state) else None
+
+    def __and__(self, other: 'StopRule') -> 'StopRule':
+        return AllOf([self, other])
+
+    def __or__(self, other: 'StopRule') -> 'StopRule':
+        return AnyOf([self, other])
+
+
+class GapBelow(StopRule):
+    """Stops when the relative gap between the objective and the bound is at most `percent` %."""
+    def __init__(self, percent: float):
+        self.percent = percent
+
+    def check(self, state):
+        return state.gap is not None and state.gap * 100 <= self.percent
+
+    def __str__(self):
+        return f"gap<{self.percent:g}%"
+
+
+class NoImprovement(StopRule):
+    """Stops when the objective has not improved for `seconds` seconds (after the first solution)."""
+    time_based = True
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def check(self, state):
+        return state.last_improvement is not None and state.elapsed - state.last_improvement >= self.seconds
+
+    def __str__(self):
+        return f"stall>{self.seconds:g}s"
+
+
+class ObjectiveBelow(StopRule):
+    """Stops when the objective value is at most `threshold`."""
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+
+    def check(self, state):
+        return state.objective is not None and state.objective <= self.threshold
+
+    def __str__(self):
+        return f"objective<{self.threshold:g}"
+
+
+class FirstFeasible(StopRule):
+    """Stops at the first solution without room or teacher conflicts."""
+    def check(self, state):
+        return state.feasible
+
+    def __str__(self):
+        return "feasible"
+
+
+class Deadline(StopRule):
+    """Stops after `seconds` seconds of search, whatever the solution quality."""
+    time_based = True
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def check(self, state):
+        return state.elapsed >= self.seconds
+
+    def __str__(self):
+        return f"time>{self.seconds:g}s"
+
+
+class AllOf(StopRule):
+    """Stops when every rule is satisfied."""
+    def __init__(self, rules: List[StopRule]):
+        self.rules = []
+        for rule in rules:
+            self.rules.extend(rule.rules if isinstance(rule, AllOf) else [rule])
+        self.time_based = any(rule.time_based for rule in self.rules)
+
+    def check(self, state):
+        return all(rule.check(state) for rule in self.rules)
+
+    def __str__(self):
+        return " & ".join(f"({r})" if isinstance(r, AnyOf) else str(r) for r in self.rules)
+
+
+class AnyOf(StopRule):
+    """Stops as soon as one of the rules is satisfied."""
+    def __init__(self, rules: List[StopRule]):
+        self.rules = []
+        for rule in rules:
+            self.rules.extend(rule.rules if isinstance(rule, AnyOf) else [rule])
+        self.time_based = any(rule.time_based for rule in self.rules)
+
+    def check(self, state):
+        return any(rule.check(state) for rule in self.rules)
+
+    def explain(self, state):
+        met = [rule.explain(state) for rule in self.rules]
+        met = [reason for reason in met if reason is not None]
+        return " | ".join(met) if met else None
+
+    def __str__(self):
+        return " | ".join(str(r) for r in self.rules)
+
+
+_NUMBER = r'(\d+(?:\.\d+)?)'
+_RULE_PATTERNS = [
+    (re.compile(rf'^gap\s*<=?\s*{_NUMBER}\s*%?$'), lambda v: GapBelow(float(v))),
+    (re.compile(rf'^(?:stall|no-?improvement)\s*>=?\s*{_NUMBER}\s*s?$'), lambda v: NoImprovement(float(v))),
+    (re.compile(rf'^(?:objective|obj)\s*<=?\s*{_NUMBER}$'), lambda v: ObjectiveBelow(float(v))),
+    (re.compile(rf'^(?:time|deadline)\s*>=?\s*{_NUMBER}\s*s?$'), lambda v: Deadline(float(v))),
+    (re.compile(r'^(?:feasible|first-feasible)$'), lambda v: FirstFeasible()),
+]
+
+
+def parse_stop_rule(spec: str) -> StopRule:
+    """
+    Builds a termination policy from a text specification.\n
+    Rules: `gap<1%`, `stall>60s` (no improvement for 60s), `objective<100`, `feasible`, `time>300s`.
+    `&` (all) binds tighter than `|` (any), e.g. `gap<2% & stall>30s | time>600`.\n
+    Parameters:\n
+    - spec : str | Policy specification
+    """
+    alternatives = []
+    for alternative in spec.split('|'):
+        rules = []
+        for term in alternative.split('&'):
+            term = term.strip().lower()
+            for pattern, build in _RULE_PATTERNS:
+                match = pattern.match(term)
+                if match:
+                    rules.append(build(match.group(1) if match.groups() else None))
+                    break
+            else:
+                raise ValueError(f"Unknown stop rule '{term}' in '{spec}'")
+        alternatives.append(rules[0] if len(rules) == 1 else AllOf(rules))
+    return alternatives[0] if len(alternatives) == 1 else AnyOf(alternatives)
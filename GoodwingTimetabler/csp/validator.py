@@ -0,0 +1,143 @@
+from typing import Dict, List, Union
+
+import numpy as np
+
+from .objects import University, Course, WeeklyAvailability
+from .schedulematrix import LUNCH_SLOT
+from .solution import SolutionFrame
+
+# Checked rules, in the order of the violation list
+HARD_CONSTRAINTS = ('room_overlap', 'teacher_overlap', 'group_overlap', 'teacher_availability', 'lunch_break', 'weekend',
+                    'online_quota', 'session_count')
+# Share of the courses of a group in a subject that can take place online
+ONLINE_QUOTA = 0.3
+# First forbidden slot of Saturdays (Sundays are forbidden all day)
+SATURDAY_CLOSING_SLOT = 3
+
+
+def _course_arrays(courses: Union[List[Course], SolutionFrame]):
+    if isinstance(courses, SolutionFrame):
+        return courses.timeslot, courses.group, courses.subject, courses.teacher, courses.room
+    indices = np.array([(course.timeslot.index, course.group.index, course.subject.index, course.teacher.index,
+                         course.room.index) for course in courses], dtype=np.int64).reshape(-1, 5)
+    return indices.T
+
+
+def _collisions(first: np.ndarray, second: np.ndarray, second_count: int, rows: np.ndarray):
+    """Yields (first, second, rows) for every pair of values shared by several of the given rows."""
+    keys = first[rows] * second_count + second[rows]
+    if not len(keys) or np.bincount(keys).max() < 2:
+        return
+    order = np.argsort(keys, kind='stable')
+    unique, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+    for k in np.flatnonzero(counts > 1).tolist():
+        key = int(unique[k])
+        yield key // second_count, key % second_count, rows[order[starts[k]:starts[k] + counts[k]]]
+
+
+def teacher_availability_matrix(university: University) -> np.ndarray:
+    """(teachers, timeslots) bool matrix of the slots where every teacher can teach (always if no availability is given)."""
+    count = len(university.timeslots)
+    available = np.ones((len(university.teachers), count), dtype=bool)
+    for t, teacher in enumerate(university.teachers):
+        slots = teacher.available_slots
+        if isinstance(slots, WeeklyAvailability):
+            if slots:
+                available[t] = np.resize(slots.to_array().ravel(), count)
+        elif slots:
+            available[t] = False
+            slots = np.asarray(list(slots), dtype=np.int64)
+            available[t, slots[(slots >= 0) & (slots < count)]] = True
+    return available
+
+
+def required_sessions(university: University) -> np.ndarray:
+    """(groups, subjects) number of courses of every group in every subject of its promotion (0 elsewhere)."""
+    required = np.zeros((len(university.groups), len(university.subjects)), dtype=np.int64)
+    for promo in university.promotions:
+        for group in promo.groups:
+            for subject in promo.subjects:
+                required[group.index, subject.index] = int(subject.hours // university.timeslot_duration)
+    return required
+
+
+def validate(university: University, courses: Union[List[Course], SolutionFrame]) -> List[dict]:
+    """
+    Checks the hard constraints of a timetable, independently of the solver and its penalties.\n
+    Courses are encoded once as integer arrays; every rule is a bincount or unique over them.\n
+    Parameters:\n
+    - university : University | The instance
+    - courses : [Course] | SolutionFrame | The timetable (e.g. csp.generated_courses or csp.solution)
+    Returns:\n
+    - [dict] | Violations, in HARD_CONSTRAINTS order: constraint, message and courses (positions of the courses
+      involved in courses), plus the timeslot, room, teacher, group and subject names that apply, and the count and
+      limit of the quota and session rules. Empty if the timetable is valid
+    """
+    timeslot, group, subject, teacher, room = (np.asarray(column, dtype=np.int64) for column in _course_arrays(courses))
+    slots_per_day = len(university.time_ranges)
+    day, slot = np.divmod(timeslot, slots_per_day)
+    online_rooms = np.array([r.name.lower() == "online" for r in university.rooms], dtype=bool)
+    online = online_rooms[room]
+    positions = np.arange(len(timeslot))
+
+    rooms = [r.name for r in university.rooms]
+    teachers = [f"{t.first_name} {t.last_name}" for t in university.teachers]
+    groups = [g.name for g in university.groups]
+    subjects = [s.name for s in university.subjects]
+    violations = []
+
+    # Several courses of a room (except online), a teacher or a group on the same timeslot
+    for constraint, keys, names, entity, rows in (
+            ('room_overlap', room, rooms, 'room', positions[~online]),
+            ('teacher_overlap', teacher, teachers, 'teacher', positions),
+            ('group_overlap', group, groups, 'group', positions)):
+        for t, key, clashing in _collisions(timeslot, keys, len(names), rows):
+            violations.append({'constraint': constraint, 'courses': clashing.tolist(), 'timeslot': t, entity: names[key],
+                               'message': f"{entity.capitalize()} {names[key]} has {len(clashing)} courses on timeslot {t}"})
+
+    # Courses given by a teacher outside of their availability
+    unavailable = ~teacher_availability_matrix(university)[teacher, timeslot]
+    for position in np.flatnonzero(unavailable).tolist():
+        t, name = int(timeslot[position]), teachers[teacher[position]]
+        violations.append({'constraint': 'teacher_availability', 'courses': [position], 'timeslot': t, 'teacher': name,
+                           'message': f"Teacher {name} is not available on timeslot {t}"})
+
+    # Forbidden slots: the lunch break, Saturday afternoons and Sundays (days counted from the first day of the semester)
+    weekday = day % 7
+    for constraint, forbidden, label in (
+            ('lunch_break', slot == LUNCH_SLOT, "the lunch break"),
+            ('weekend', ((weekday == 5) & (slot >= SATURDAY_CLOSING_SLOT)) | (weekday == 6), "the weekend")):
+        for position in np.flatnonzero(forbidden).tolist():
+            t = int(timeslot[position])
+            violations.append({'constraint': constraint, 'courses': [position], 'timeslot': t, 'group': groups[group[position]],
+                               'message': f"Course of {groups[group[position]]} in {subjects[subject[position]]} on "
+                                          f"timeslot {t}, during {label}"})
+
+    # Per group and subject: online quota and number of sessions
+    cells = group * len(subjects) + subject
+    shape = (len(groups), len(subjects))
+    total = np.bincount(cells, minlength=len(groups) * len(subjects)).reshape(shape)
+    online_total = np.bincount(cells[online], minlength=len(groups) * len(subjects)).reshape(shape)
+    limit = (ONLINE_QUOTA * total).astype(np.int64)
+    required = required_sessions(university)
+    # Courses of every group and subject, as slices of the courses sorted by cell
+    by_cell = np.argsort(cells, kind='stable')
+    bounds = np.searchsorted(cells[by_cell], np.arange(len(groups) * len(subjects) + 1))
+    for constraint, wrong, count, bound, message in (
+            ('online_quota', online_total > limit, online_total, limit, "{group} has {count} online {subject} courses (at most {limit})"),
+            ('session_count', total != required, total, required, "{group} has {count} {subject} courses instead of {limit}")):
+        for g, s in zip(*np.nonzero(wrong)):
+            g, s = int(g), int(s)
+            cell = g * len(subjects) + s
+            details = {'group': groups[g], 'subject': subjects[s], 'count': int(count[g, s]), 'limit': int(bound[g, s])}
+            violations.append({'constraint': constraint, 'courses': by_cell[bounds[cell]:bounds[cell + 1]].tolist(),
+                               **details, 'message': message.format(**details)})
+    return violations
+
+
+def violation_counts(violations: List[dict]) -> Dict[str, int]:
+    """Number of violations of every hard constraint having some."""
+    counts = {}
+    for violation in violations:
+        counts[violation['constraint']] = counts.get(violation['constraint'], 0) + 1
+    return counts
@@ -0,0 +1,29 @@
+import os
+from app.batch import discover_instances, _output_dirs
+
+
+def _make_instance(path):
+    os.makedirs(path, exist_ok=True)
+    open(os.path.join(path, 'University.xlsx'), 'w').close()
+
+
+def test_discover_instances(tmp_path):
+    """Only folders holding a University.xlsx are kept, globs are expanded once."""
+    _make_instance(tmp_path / 'deptA')
+    _make_instance(tmp_path / 'deptB')
+    os.makedirs(tmp_path / 'empty')
+
+    instances = discover_instances([str(tmp_path / '*'), str(tmp_path / 'deptA')])
+
+    assert [os.path.basename(i) for i in instances] == ['deptA', 'deptB']
+
+
+def test_output_dirs_are_unique(tmp_path):
+    """Instances sharing a folder name get distinct output folders."""
+    first, second = str(tmp_path / 'a' / 'dept'), str(tmp_path / 'b' / 'dept')
+
+    outputs = _output_dirs([first, second], str(tmp_path / 'out'))
+
+    assert outputs[first] == os.path.join(str(tmp_path / 'out'), 'dept')
+    assert outputs[second] == os.path.join(str(tmp_path / 'out'), 'dept_2')
+    assert _output_dirs([first]) == {first: os.path.join(first, 'Outputs')}
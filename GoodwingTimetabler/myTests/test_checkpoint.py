@@ -0,0 +1,35 @@
+import json
+import os
+
+from csp.checkpoint import CheckpointWriter, load_checkpoint
+
+
+def test_checkpoint_roundtrip(tmp_path):
+    """A written checkpoint is read back with its metadata and the elapsed offset applied."""
+    path = str(tmp_path / 'checkpoint.json')
+    writer = CheckpointWriter(path, min_interval=60, metadata={'instance': 'ESILV'}, elapsed_offset=10)
+    assert writer.due()
+
+    assignment = {'courses': [['A1', 'Maths', 0, 12, 1]], 'teachers': [['A1', 'Maths', 2]]}
+    writer.write(assignment, objective=42, elapsed=5, solutions=3)
+    assert not writer.due()
+
+    data = load_checkpoint(path)
+    assert data['objective'] == 42
+    assert data['elapsed'] == 15
+    assert data['instance'] == 'ESILV'
+    assert data['solutions'] == 3
+    assert data['courses'] == assignment['courses']
+    assert data['teachers'] == assignment['teachers']
+    assert os.listdir(tmp_path) == ['checkpoint.json']  # no temporary file left behind
+
+
+def test_load_checkpoint_invalid(tmp_path):
+    assert load_checkpoint(str(tmp_path / 'missing.json')) is None
+
+    path = tmp_path / 'checkpoint.json'
+    path.write_text('{"courses": [')
+    assert load_checkpoint(str(path)) is None
+
+    path.write_text(json.dumps({'version': 0, 'courses': []}))
+    assert load_checkpoint(str(path)) is None
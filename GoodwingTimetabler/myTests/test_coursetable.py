@@ -0,0 +1,51 @@
+import datetime as dt
+
+from ortools.sat.python import cp_model
+
+from csp.coursetable import CourseTable
+from csp.objects import University, Room, Teacher, Subject, Group, Promotion
+
+
+def build_table():
+    """Two promotions with a 'Maths' subject each (different objects), one course per session."""
+    maths1, maths2, physics = Subject('Maths', 'M1', 3.0), Subject('Maths', 'M2', 1.5), Subject('Physics', 'P', 1.5)
+    promotions = [Promotion('P1', [Group('A1'), Group('A2')], [maths1, physics]), Promotion('P2', [Group('B1')], [maths2])]
+    teachers = [Teacher('Ada', 'Lovelace', [maths1, maths2]), Teacher('Marie', 'Curie', [physics])]
+    university = University('Test', [Room('A101')], teachers, promotions, dt.date(2024, 9, 2), 2, [(dt.time(8), dt.time(9, 30))])
+
+    model = cp_model.CpModel()
+    table = CourseTable(university)
+    course_id = 0
+    for group_id in range(len(table.groups)):
+        for subject_id in table.promotion_subjects[table.group_promotion[group_id]]:
+            table.teachers[group_id, subject_id] = model.NewIntVar(0, 1, f"teacher_{group_id}_{subject_id}")
+            for session_no in range(int(table.subjects[subject_id].hours // university.timeslot_duration)):
+                course_id += 1
+                table.add(group_id, subject_id, session_no, course_id,
+                          model.NewIntVar(0, 1, f"timeslot_{course_id}"), model.NewIntVar(0, 0, f"room_{course_id}"))
+    return table, model
+
+
+def test_groupings():
+    table, model = build_table()
+    assert len(table) == 7
+    assert table.subjects[0] is not table.subjects[2] and table.subjects[0].name == table.subjects[2].name
+    assert list(table.promotion_id) == [0, 0, 0, 0, 0, 0, 1]
+    assert {group_id: rows.tolist() for group_id, rows in table.by_group.items()} == {0: [0, 1, 2], 1: [3, 4, 5], 2: [6]}
+    assert table.by_group_subject[1, 0].tolist() == [3, 4]
+    assert {subject_id: rows.tolist() for subject_id, rows in table.by_subject.items()} == {0: [0, 1, 3, 4], 1: [2, 5], 2: [6]}
+    assert {teacher: rows.tolist() for teacher, rows in table.by_teacher.items()} == {0: [0, 1, 3, 4, 6], 1: [2, 5]}
+    assert table.key(6) == ('B1', 'Maths', 7)
+
+
+def test_remove_and_index_roundtrip():
+    table, model = build_table()
+    table.remove(1)
+    assert table.rows().tolist() == [0, 2, 3, 4, 5, 6]
+    assert table.by_group_subject[0, 0].tolist() == [0]
+    assert table.rows(groups=[0, 2]).tolist() == [0, 2, 6]
+
+    loaded = CourseTable.from_index(table.university, model, table.to_index())
+    assert loaded.rows().tolist() == table.rows().tolist()
+    assert [var.Index() for var in loaded.timeslot] == [var.Index() for var in table.timeslot]
+    assert loaded.teacher_index.tolist() == table.teacher_index.tolist()
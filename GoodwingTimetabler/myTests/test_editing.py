@@ -0,0 +1,38 @@
+import datetime as dt
+
+from csp import CSP
+from csp.objects import University, Room, Teacher, Subject, Group, Promotion
+
+
+def small_university():
+    maths, physics = Subject('Maths', 'M', 3.0), Subject('Physics', 'P', 3.0)
+    time_ranges = [(dt.time(8 + 2 * i), dt.time(9 + 2 * i, 30)) for i in range(5)]
+    teachers = [Teacher('Ada', 'Lovelace', [maths]), Teacher('Marie', 'Curie', [physics])]
+    promotion = Promotion('P1', [Group('G1'), Group('G2')], [maths, physics])
+    return University('Small', [Room('A101'), Room('A102')], teachers, [promotion], dt.date(2024, 9, 2), 5, time_ranges)
+
+
+def test_edit_and_resolve():
+    """Edits only touch their entities, and the resolved timetable follows them."""
+    university = small_university()
+    scheduler = CSP(university, max_time=10, num_workers=1, interactive=False, show_progress=False, editable=True)
+    assert len(scheduler.generated_courses) == 8
+
+    # Ada can now only teach on the first two days
+    first_days = {university.timeslots[0].day, university.timeslots[5].day}
+    scheduler.update_teacher_availability(university.teachers[0],
+                                          [i for i, ts in enumerate(university.timeslots) if ts.day in first_days])
+    courses = scheduler.resolve()
+    maths = [course for course in courses if course.subject.name == 'Maths']
+    assert len(maths) == 4
+    assert all(course.timeslot.day in first_days for course in maths)
+
+    # One more Physics course for each group
+    scheduler.set_subject_hours('Physics', 4.5)
+    courses = scheduler.resolve()
+    assert sum(course.subject.name == 'Physics' for course in courses) == 6
+    assert scheduler.solver.Value(scheduler.conflict_count) == 0
+
+    scheduler.set_subject_hours('Physics', 1.5)
+    courses = scheduler.resolve()
+    assert sum(course.subject.name == 'Physics' for course in courses) == 2
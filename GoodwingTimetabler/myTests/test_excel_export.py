@@ -0,0 +1,73 @@
+import datetime as dt
+import time
+
+from openpyxl import load_workbook
+
+from csp.objects import University, Room, Teacher, Subject, Group, Promotion, Course
+from util.excelManager import ExcelScheduleManager
+
+
+def build_schedule(weeks: int):
+    """One course per group and timeslot, cycling through the subjects, teachers and rooms."""
+    subjects = [Subject('Maths', 'M', color='0A0CA3'), Subject('Physics', 'P', color='FF5733')]
+    groups = [Group('A1'), Group('A2'), Group('A3')]
+    teachers = [Teacher('Ada', 'Lovelace', subjects), Teacher('Marie', 'Curie', subjects)]
+    rooms = [Room('L101'), Room('L102'), Room('L103')]
+    university = University('Test', rooms, teachers, [Promotion('A', groups, subjects)], dt.date(2024, 9, 2), 7 * weeks,
+                            [(dt.time(8), dt.time(9, 30)), (dt.time(10), dt.time(11, 30))])
+    # Listed in reverse order: the rows must still be in timetable order
+    courses = [Course(timeslot, group, subjects[(timeslot.index + g) % 2], teachers[g % 2], rooms[g])
+               for timeslot in reversed(university.timeslots) for g, group in enumerate(groups)]
+    return university, courses
+
+
+def test_streamed_schedule(tmp_path):
+    university, courses = build_schedule(weeks=1)
+    ExcelScheduleManager(university, courses).generate_excel_schedule(tmp_path / 'schedule.xlsx')
+
+    wb = load_workbook(tmp_path / 'schedule.xlsx')
+    assert wb.sheetnames == ['Group_A1', 'Group_A2', 'Group_A3', 'Teacher_Lovelace', 'Teacher_Curie',
+                             'Room_L101', 'Room_L102', 'Room_L103', 'Statistics']
+    ws = wb['Group_A1']
+    assert [cell.value for cell in ws[1]] == ['Week', 'Day', 'Time Slot', 'Subject', 'Teacher', 'Room']
+    assert [cell.value for cell in ws[2]] == [1, 'Monday', '08:00 - 09:30', 'Maths', 'Ada Lovelace', 'L101']
+    assert [cell.value for cell in ws[3]] == [1, 'Monday', '10:00 - 11:30', 'Physics', 'Ada Lovelace', 'L101']
+    assert ws.max_row == 1 + 14 and ws.auto_filter.ref == 'A1:F1'
+    assert ws['D2'].style == 'subject_0A0CA3' and ws['D2'].font.color.rgb == '00FFFFFF'
+    assert ws['D3'].style == 'subject_FF5733' and ws['A2'].style == 'schedule_cell'
+    assert [cell.value for cell in wb['Statistics'][3]] == ['A1', '21.0', 2, 1]
+
+
+def test_export_throughput(tmp_path):
+    university, courses = build_schedule(weeks=20)
+    start = time.perf_counter()
+    ExcelScheduleManager(university, courses).generate_excel_schedule(tmp_path / 'schedule.xlsx')
+    elapsed = time.perf_counter() - start
+    rows = 3 * len(courses)  # Each course is written to its group, teacher and room sheets
+    print(f"\nExcel export: {rows} rows in {elapsed:.2f}s ({rows / elapsed:.0f} rows/s)")
+    assert sum(1 for _ in load_workbook(tmp_path / 'schedule.xlsx', read_only=True)['Room_L101'].iter_rows()) == 1 + 7 * 20 * 2
+
+
+def test_visual_timetable(tmp_path):
+    university, courses = build_schedule(weeks=3)
+    manager = ExcelScheduleManager(university, courses)
+
+    manager.create_visual_timetable(tmp_path / 'visual.xlsx')
+    wb = load_workbook(tmp_path / 'visual.xlsx')
+    assert len(wb.sheetnames) == 1 + (3 + 2 + 3) * 3 and wb.sheetnames[:3] == ['Index', 'Group_A1_W1', 'Group_A1_W2']
+    ws = wb['Group_A1_W1']
+    assert ws['B3'].value == 'Maths\nAda Lovelace\n(L101)' and ws['B3'].style == 'visual_subject_0A0CA3'
+    assert wb['Teacher_Lovelace_Ada_W1']['B3'].value == 'Maths (L101)\nMaths (L103)'  # A1 and A3 at the same time
+
+    # Every week is the same: one sheet per entity, the other weeks link to it
+    paths = manager.create_visual_timetable(str(tmp_path / 'deduped.xlsx'), dedupe_weeks=True)
+    wb = load_workbook(paths[0])
+    assert len(wb.sheetnames) == 1 + 3 + 2 + 3
+    assert wb['Group_A1_W1']['A1'].value.endswith('(same as weeks 2, 3)')
+    index = wb['Index']
+    assert index['B5'].value == 'Week 2 (same as week 1)' and index['A5'].hyperlink.target == '#Group_A1_W1!A1'
+
+    paths = manager.create_visual_timetable(str(tmp_path / 'visual.xlsx'), shard='entity', entities=['Teacher', 'Room:L101'])
+    assert paths == [str(tmp_path / 'visual' / name) for name in
+                     ['Teacher_Lovelace_Ada.xlsx', 'Teacher_Curie_Marie.xlsx', 'Room_L101.xlsx']]
+    assert load_workbook(paths[2]).sheetnames == ['Index', 'Room_L101_W1', 'Room_L101_W2', 'Room_L101_W3']
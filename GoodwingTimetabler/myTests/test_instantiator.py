@@ -0,0 +1,55 @@
+import datetime as dt
+import os
+
+import numpy as np
+
+from csp.compiled import COMPILED_NAME, load_compiled
+from csp.instantiator import generateUniv2, read_availability, read_workbook
+from util import init_template
+
+
+def test_single_pass_loader(tmp_path):
+    gen_dir = f"{tmp_path}/"
+    init_template(gen_dir)
+
+    sheets = read_workbook(gen_dir + 'University.xlsx')
+    assert sheets['University'][0] == {'Setting': 'Name', 'Value': 'ESILV'}
+
+    university = generateUniv2(gen_dir)
+    assert not os.path.exists(gen_dir + 'csv')
+    assert university.days == 14 and len(university.timeslots) == 14 * len(university.time_ranges)
+    assert all(subject is not None for teacher in university.teachers for subject in teacher.subjects)
+    assert university.teachers[0].available_slots
+
+    generateUniv2(gen_dir, write_csv=True)
+    assert sorted(os.listdir(gen_dir + 'csv')) == sorted(f'{sheet}.csv' for sheet in sheets)
+
+
+def test_compiled_instance(tmp_path):
+    gen_dir = f"{tmp_path}/"
+    init_template(gen_dir)
+    university = generateUniv2(gen_dir, compiled=True)
+    compiled_path = gen_dir + COMPILED_NAME
+    assert os.path.exists(compiled_path)
+
+    loaded = load_compiled(compiled_path, gen_dir + 'University.xlsx')
+    assert [(t.first_name, [s.name for s in t.subjects], t.available_slots) for t in loaded.teachers] == \
+           [(t.first_name, [s.name for s in t.subjects], t.available_slots) for t in university.teachers]
+    assert [[s.id for s in p.subjects] for p in loaded.promotions] == [[s.id for s in p.subjects] for p in university.promotions]
+    assert loaded.time_ranges == university.time_ranges and loaded.timeslots[-1].day == university.timeslots[-1].day
+
+    # A modified workbook makes the compiled file stale
+    with open(gen_dir + 'University.xlsx', 'ab') as file:
+        file.write(b'\0')
+    assert load_compiled(compiled_path, gen_dir + 'University.xlsx') is None
+
+
+def test_read_availability():
+    time_ranges = [(dt.time(8, 15), dt.time(9, 45)), (dt.time(10), dt.time(11, 30))]
+    rows = [{'TeacherId': 'T1', 'Mon_8:15-9:45': 1, 'Mon_10:00-11:30': 0, 'Sun_10:00-11:30': 1},
+            {'TeacherId': None, 'Mon_8:15-9:45': 1, 'Mon_10:00-11:30': 1, 'Sun_10:00-11:30': 1},
+            {'TeacherId': 2, 'Mon_8:15-9:45': None, 'Mon_10:00-11:30': 1.0, 'Sun_10:00-11:30': 0}]
+    teacher_ids, availability = read_availability(rows, time_ranges)
+    assert teacher_ids == ['T1', '2']
+    assert availability.shape == (2, 7, 2)
+    assert np.flatnonzero(availability[0]).tolist() == [0, 13] and np.flatnonzero(availability[1]).tolist() == [1]
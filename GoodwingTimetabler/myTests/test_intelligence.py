@@ -0,0 +1,128 @@
+import datetime as dt
+import random
+import time
+
+import numpy as np
+
+from csp import ScheduleMatrix
+from csp.csp import ScheduleIntelligence
+from csp.objects import University, Room, Teacher, Subject, Group, Promotion, Course
+from myTests.test_excel_export import build_schedule
+
+
+def random_schedule(courses_count: int, seed: int = 0):
+    """Random courses on few timeslots, rooms and teachers, so that many of them overlap."""
+    rng = random.Random(seed)
+    subjects = [Subject('Maths', 'M'), Subject('Physics', 'P')]
+    groups = [Group(f'G{g}') for g in range(12)]
+    teachers = [Teacher(f'First{t}', f'Last{t}', subjects) for t in range(5)]
+    rooms = [Room('L101'), Room('L102'), Room('L103'), Room('Online')]
+    university = University('Test', rooms, teachers, [Promotion('A', groups, subjects)], dt.date(2024, 9, 2), 7,
+                            [(dt.time(8), dt.time(9, 30)), (dt.time(10), dt.time(11, 30))])
+    courses = [Course(rng.choice(university.timeslots), rng.choice(groups), rng.choice(subjects), rng.choice(teachers),
+                      rng.choice(rooms)) for _ in range(courses_count)]
+    return university, courses
+
+
+def pairwise_conflicts(courses):
+    """Conflicts found by comparing every pair of courses sorted by timeslot (the reference output)."""
+    conflicts = {'room_overlaps': [], 'teacher_overlaps': []}
+    sorted_courses = sorted(courses, key=lambda x: x.timeslot.index)
+    for i, course1 in enumerate(sorted_courses):
+        for course2 in sorted_courses[i+1:]:
+            pair = [{'subject': course.subject.name, 'group': course.group.name} for course in (course1, course2)]
+            if course1.timeslot == course2.timeslot and course1.room == course2.room and course1.room.name.lower() != "online":
+                conflicts['room_overlaps'].append({'courses': pair, 'timeslot': course1.timeslot.index, 'room': course1.room.name})
+            if course1.timeslot == course2.timeslot and course1.teacher == course2.teacher:
+                conflicts['teacher_overlaps'].append({'courses': pair, 'timeslot': course1.timeslot.index,
+                                                      'teacher': course1.teacher.last_name})
+    return conflicts
+
+
+def test_analyze_conflicts():
+    for seed in range(5):
+        university, courses = random_schedule(150, seed)
+        intelligence = ScheduleIntelligence(courses, university)
+        intelligence.analyze_conflicts()
+        conflicts = intelligence.intel['conflicts']
+        assert conflicts['room_overlaps'] and conflicts['teacher_overlaps']
+        assert {key: conflicts[key] for key in ('room_overlaps', 'teacher_overlaps')} == pairwise_conflicts(courses)
+        assert all(overlap['room'] != 'Online' for overlap in conflicts['room_overlaps'])
+
+
+def test_analyze_conflicts_speed():
+    university, courses = build_schedule(weeks=16)
+    start = time.perf_counter()
+    intelligence = ScheduleIntelligence(courses, university)
+    intelligence.analyze_conflicts()
+    bucketed = time.perf_counter() - start
+    start = time.perf_counter()
+    reference = pairwise_conflicts(courses)
+    pairwise = time.perf_counter() - start
+    # A1 and A3 have the same teacher on every timeslot
+    assert intelligence.intel['conflicts']['teacher_overlaps'] == reference['teacher_overlaps']
+    assert len(reference['teacher_overlaps']) == len(university.timeslots)
+    print(f"\nConflicts of {len(courses)} courses: {bucketed:.3f}s (pairwise: {pairwise:.3f}s)")
+
+
+def day_schedule(slots):
+    """Courses of group A1 on the first day, one per (slot, room name)."""
+    subjects = [Subject('Maths', 'M')]
+    groups = [Group('A1'), Group('A2')]
+    teachers = [Teacher('Ada', 'Lovelace', subjects)]
+    rooms = [Room('L101'), Room('Online')]
+    university = University('Test', rooms, teachers, [Promotion('A', groups, subjects)], dt.date(2024, 9, 2), 7,
+                            [(dt.time(8 + 2 * hour), dt.time(9 + 2 * hour)) for hour in range(6)])
+    by_name = {room.name: room for room in rooms}
+    courses = [Course(university.timeslots[slot], groups[0], subjects[0], teachers[0], by_name[room]) for slot, room in slots]
+    return university, courses
+
+
+def test_schedule_matrix():
+    # Slot 2 is the lunch break, slots 4 and 5 are late
+    university, courses = day_schedule([(0, 'L101'), (2, 'Online'), (3, 'Online'), (5, 'L101')])
+    matrix = ScheduleMatrix.from_courses(university, courses)
+    assert matrix.count.shape == (2, 7, 6) and matrix.count.sum() == 4
+    assert matrix.room_layer[0, 0].tolist() == [0, -1, 1, 1, -1, 0] and matrix.online_layer[0, 0].tolist()[2:4] == [True, True]
+    assert np.flatnonzero(matrix.gaps()[0, 0]).tolist() == [1, 4]
+    assert np.flatnonzero(matrix.transitions()[0, 0]).tolist() == []  # 0 -> 2 and 3 -> 5 are not consecutive
+    assert matrix.late().tolist() == [False, False, False, True]
+    assert matrix.summary() == {'courses': 4, 'room_overlaps': 0, 'teacher_overlaps': 0, 'gaps': 2, 'transitions': 0, 'late': 1}
+    assert matrix.group_penalties() == {'A1': {'courses': 4, 'gaps': 2, 'transitions': 0, 'late': 1}}
+
+    # A single course outside the lunch break has no gap; online then physical is a transition
+    university, courses = day_schedule([(2, 'L101'), (3, 'Online'), (4, 'L101')])
+    matrix = ScheduleMatrix.from_courses(university, courses)
+    assert not matrix.gaps().any()
+    assert np.flatnonzero(matrix.transitions()[0, 0]).tolist() == [2, 3]
+
+
+def test_summary_matches_conflicts():
+    university, courses = random_schedule(300, seed=3)
+    intelligence = ScheduleIntelligence(courses, university)
+    intelligence.analyze_conflicts()
+    summary = intelligence.matrix.summary()
+    assert summary['room_overlaps'] == len(intelligence.intel['conflicts']['room_overlaps'])
+    assert summary['teacher_overlaps'] == len(intelligence.intel['conflicts']['teacher_overlaps'])
+
+
+class SolvedModel:
+    """Penalty lists read by analyze_penalty_breakdown, all empty."""
+    conflict_penalties = balance_penalties = gap_penalties = []
+
+
+def test_report(capsys):
+    university, courses = build_schedule(weeks=2)
+    intelligence = ScheduleIntelligence(courses, university)
+    intelligence.analyze_conflicts()
+    intelligence.analyze_resource_utilization()
+    assert intelligence.intel['resource_utilization']['rooms'] == {'L103': 84 // 3, 'L102': 84 // 3, 'L101': 84 // 3}
+    assert intelligence.intel['course_distribution']['by_group'] == {'A1': 28, 'A2': 28, 'A3': 28}
+    intelligence.generate_report()
+    intelligence.analyze_penalty_breakdown(None, SolvedModel())
+    report = capsys.readouterr().out
+    assert "* L103: 28 courses" in report and "Teacher Overlaps: 28" in report
+    # Both slots of a day are late (2 slots per day): every course is
+    assert "Courses in late timeslots: 84 (100.0% of all courses)" in report
+    assert "- A1: 0 gap(s), 0 transition(s), 28 late course(s) out of 28" in report
+    assert report.rstrip().endswith("==== END OF INTELLIGENCE REPORT ====")
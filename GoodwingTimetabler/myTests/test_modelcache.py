@@ -0,0 +1,53 @@
+import os
+
+from ortools.sat.python import cp_model
+
+from csp.modelcache import ModelCache, encode_term, decode_term
+
+
+def build_model():
+    model = cp_model.CpModel()
+    x = model.NewIntVar(0, 10, 'x')
+    y = model.NewBoolVar('y')
+    model.Add(x + y >= 3)
+    model.Minimize(2 * x + y)
+    return model, x, y
+
+
+def test_cache_roundtrip(tmp_path):
+    """A stored model is loaded back with its index maps, and encoded terms evaluate the same."""
+    cache = ModelCache(str(tmp_path))
+    model, x, y = build_model()
+    index = {'terms': [encode_term(x), encode_term(2 * x + y + 1)]}
+    assert cache.load('abc') is None
+
+    cache.store('abc', model, index, instance='test', build_time=1.5)
+    loaded, loaded_index = cache.load('abc')
+    assert len(loaded.Proto().variables) == 2
+    assert loaded_index == index
+
+    solver = cp_model.CpSolver()
+    assert solver.Solve(loaded) == cp_model.OPTIMAL
+    terms = [decode_term(loaded, term) for term in loaded_index['terms']]
+    assert solver.Value(terms[0]) == 2 and solver.Value(terms[1]) == 6
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (1, 1)
+    assert stats['entries'][0]['instance'] == 'test'
+
+
+def test_cache_lru_eviction(tmp_path):
+    model, _, _ = build_model()
+    cache = ModelCache(str(tmp_path), max_size_mb=1)
+    for key in ('a', 'b', 'c'):
+        cache.store(key, model, {})
+    entry_size = cache.entries()[0]['size']
+
+    # Use 'a' so that 'b' becomes the least recently used entry
+    os.utime(os.path.join(str(tmp_path), 'b.json'), (0, 0))
+    os.utime(os.path.join(str(tmp_path), 'c.json'), (1, 1))
+    assert cache.load('a') is not None
+
+    cache.max_size_mb = 2.5 * entry_size / (1024 * 1024)
+    assert cache.evict() == ['b']
+    assert [entry['key'] for entry in cache.entries()] == ['a', 'c']
@@ -0,0 +1,51 @@
+import datetime as dt
+import pickle
+
+import numpy as np
+import pytest
+
+from csp.objects import University, Room, Teacher, Subject, Group, Promotion, Course, WeeklyAvailability
+
+
+def build_university():
+    maths, physics, latin = Subject('Maths', 'M'), Subject('Physics', 'P'), Subject('Latin', 'M')
+    promotions = [Promotion('P1', [Group('A1'), Group('A2')], [maths, physics]), Promotion('P2', [Group('B1')], [maths, latin])]
+    teachers = [Teacher('Ada', 'Lovelace', [maths]), Teacher('Marie', 'Curie', [physics, maths, None])]
+    return University('Test', [Room('A101'), Room('Online')], teachers, promotions, dt.date(2024, 9, 2), 3,
+                      [(dt.time(8), dt.time(9, 30)), (dt.time(10), dt.time(11, 30))])
+
+
+def test_indexes():
+    university = build_university()
+    assert [timeslot.index for timeslot in university.timeslots] == list(range(6))
+    assert university.timeslot_index[dt.date(2024, 9, 3), dt.time(10)] == 3
+    assert [group.index for group in university.groups] == [0, 1, 2]
+    assert [subject.name for subject in university.subjects] == ['Maths', 'Physics', 'Latin']
+    assert university.subject_by_id['M'].name == 'Maths'
+    assert university.teachers_by_subject == [[0, 1], [1], []]
+    assert university.room_by_name['Online'].index == 1
+    assert university.group_by_name['B1'] is university.promotions[1].groups[0]
+
+
+def test_slots():
+    university = build_university()
+    course = Course(university.timeslots[0], university.groups[0], university.subjects[0], university.teachers[0],
+                    university.rooms[0])
+    with pytest.raises(AttributeError):
+        course.duration = 1.5
+    copy = pickle.loads(pickle.dumps(university))
+    assert copy.teachers[1].index == 1 and copy.timeslots[5].index == 5
+
+
+def test_weekly_availability():
+    week = np.zeros((7, 2), dtype=bool)
+    week[0, 1] = week[6, 0] = True
+    availability = WeeklyAvailability.from_array(week)
+    assert 1 in availability and 12 in availability and 0 not in availability
+    assert 15 in availability and 26 in availability  # Same slots, one week later
+    assert availability.slots(30) == [1, 12, 15, 26, 29]
+    assert (availability.to_array() == week).all()
+
+    teacher = Teacher('Ada', 'Lovelace', [], availability)
+    assert teacher.available_timeslots(14) == [1, 12]
+    assert not WeeklyAvailability(0, 2) and Teacher('Marie', 'Curie').available_timeslots(14) == []
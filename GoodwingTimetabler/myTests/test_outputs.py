@@ -0,0 +1,105 @@
+import json
+import os
+import time
+
+import pytest
+
+from app.outputs import plan_artefacts, write_outputs
+from myTests.test_excel_export import build_schedule
+
+
+class SolvedSchedule:
+    """What the output pipeline reads from a solved CSP."""
+    def __init__(self, university, courses):
+        self.university = university
+        self.generated_courses = courses
+
+    def intelligenceReport(self):
+        print("==== SCHEDULING INTELLIGENCE REPORT ====")
+
+
+def test_plan_artefacts(tmp_path):
+    _, courses = build_schedule(weeks=1)
+    tasks = plan_artefacts(courses, str(tmp_path), ['schedule', 'visual', 'yaml'], {'shard': 'entity', 'entities': ['Room', 'Group:A2']})
+    assert [task['name'] for task in tasks] == ['excel/schedule.xlsx', 'excel/visual_timetable (groups)', 'excel/visual_timetable (rooms)',
+                                                'yaml/A1.yml', 'yaml/A2.yml', 'yaml/A3.yml']
+    assert tasks[1]['options'] == {'shard': 'entity', 'entities': ['Group:A2']}
+    with pytest.raises(ValueError):
+        plan_artefacts(courses, str(tmp_path), ['pdf'])
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_write_outputs(tmp_path, workers):
+    timings = write_outputs(SolvedSchedule(*build_schedule(weeks=1)), str(tmp_path), ['schedule', 'visual', 'yaml', 'report'],
+                            {'dedupe_weeks': True}, workers=workers)
+    assert set(timings['artefacts']) == {'excel/schedule.xlsx', 'excel/visual_timetable.xlsx', 'yaml/A1.yml', 'yaml/A2.yml',
+                                         'yaml/A3.yml', 'report.txt'}
+    assert not timings['errors'] and timings['workers'] == workers
+    assert os.path.isfile(tmp_path / 'excel' / 'visual_timetable.xlsx')
+    assert (tmp_path / 'yaml' / 'A1.yml').read_text().startswith('- color: 0A0CA3')
+    assert 'INTELLIGENCE REPORT' in (tmp_path / 'report.txt').read_text()
+
+
+def test_solution_exports(tmp_path):
+    timings = write_outputs(SolvedSchedule(*build_schedule(weeks=1)), str(tmp_path), ['csv', 'jsonl', 'ics'], workers=1)
+    assert not timings['errors']
+    assert (tmp_path / 'solution.csv').read_text().startswith('timeslot,date,start,end,group,subject,teacher,room,online')
+    assert sorted(os.listdir(tmp_path / 'ics')) == ['group_A1.ics', 'group_A2.ics', 'group_A3.ics', 'room_L101.ics',
+                                                    'room_L102.ics', 'room_L103.ics', 'teacher_Ada_Lovelace.ics',
+                                                    'teacher_Marie_Curie.ics']
+
+
+def test_incremental_outputs(tmp_path):
+    university, courses = build_schedule(weeks=2)
+    artefacts = ['schedule', 'visual', 'yaml', 'ics', 'csv', 'report']
+    visual = {'shard': 'entity'}
+
+    def publish():
+        return write_outputs(SolvedSchedule(university, courses), str(tmp_path), artefacts, visual, workers=1, incremental=True)
+
+    def contents():
+        return {str(path.relative_to(tmp_path)): path.read_bytes() for path in tmp_path.rglob('*')
+                if path.is_file() and path.name not in ('manifest.json', 'changes.json')}
+
+    full = publish()
+    assert full['changes']['full'] and full['changes']['reason'] == "no previous manifest"
+    first = contents()
+
+    # Nothing changed: nothing is written
+    timings = publish()
+    assert not timings['changes']['full'] and timings['changes']['changes'] == [] and timings['changes']['written'] == []
+    assert contents() == first
+
+    # A course of A1 in week 2 moves to L102: only the artefacts showing A1, Lovelace, L101 and L102 are written
+    moved = next(course for course in courses if course.group.name == 'A1' and course.timeslot.index == 20)
+    moved.room = university.rooms[1]
+    start = time.perf_counter()
+    timings = publish()
+    print(f"\nIncremental outputs: {time.perf_counter() - start:.2f}s (full: {full['wall']}s)")
+    changes = timings['changes']
+    assert [(change['entity'], change['week'], change['change']) for change in changes['changes']] == [
+        ('Group:A1', 2, 'modified'), ('Room:L101', 2, 'modified'), ('Room:L102', 2, 'modified'),
+        ('Teacher:Lovelace_Ada', 2, 'modified')]
+    assert {'yaml/A1.yml', 'report.txt'} <= set(changes['written']) and 'yaml/A2.yml' in changes['unchanged']
+    second = contents()
+    rewritten = {path for path in first if first[path] != second[path]}
+    assert rewritten == {'excel/schedule.xlsx', 'solution.csv', 'yaml/A1.yml', 'ics/group_A1.ics',
+                         'ics/room_L101.ics', 'ics/room_L102.ics', 'ics/teacher_Ada_Lovelace.ics',
+                         'excel/visual_timetable/Group_A1.xlsx', 'excel/visual_timetable/Room_L101.xlsx',
+                         'excel/visual_timetable/Room_L102.xlsx', 'excel/visual_timetable/Teacher_Lovelace_Ada.xlsx'}
+    with open(tmp_path / 'changes.json') as file:
+        assert json.load(file)['changes'] == changes['changes']
+
+    # A3 (the only group in L103) has no course anymore: their files are removed
+    courses[:] = [course for course in courses if course.group.name != 'A3']
+    changes = publish()['changes']
+    assert changes['removed'] == {'Group:A3': 'A3', 'Room:L103': 'L103'}
+    assert sorted(os.listdir(tmp_path / 'excel' / 'visual_timetable')) == [
+        'Group_A1.xlsx', 'Group_A2.xlsx', 'Room_L101.xlsx', 'Room_L102.xlsx', 'Teacher_Curie_Marie.xlsx',
+        'Teacher_Lovelace_Ada.xlsx']
+    assert not (tmp_path / 'yaml' / 'A3.yml').exists() and not (tmp_path / 'ics' / 'group_A3.ics').exists()
+    assert not (tmp_path / 'ics' / 'room_L103.ics').exists()
+
+    # Other output settings: everything is written again
+    visual = {'shard': 'type'}
+    assert publish()['changes']['reason'] == "output settings changed"
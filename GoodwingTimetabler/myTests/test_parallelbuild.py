@@ -0,0 +1,29 @@
+from ortools.sat.python import cp_model
+
+from csp.parallelbuild import split_groups, shift_references, shift_term
+
+
+def test_split_groups_balances_courses():
+    sizes = {0: 4, 1: 4, 2: 1, 3: 1}  # group id -> number of courses
+    assert split_groups(sizes, 2) == [[0], [1, 2, 3]]
+    assert split_groups(sizes, 10) == [[0], [1], [2, 3]]
+
+
+def test_shift_references_keeps_shared_variables():
+    """Only the variables created by a block (index >= 2 here) are renumbered, negated literals included."""
+    model = cp_model.CpModel()
+    x, y = model.NewBoolVar('x'), model.NewBoolVar('y')  # shared
+    z = model.NewBoolVar('z')  # created by the block
+    model.AddBoolOr([x, z.Not()]).OnlyEnforceIf(z)
+    model.Add(y + z <= 1)
+    text = str(model.Proto())
+
+    shifted = cp_model.CpModel()
+    shifted.Proto().parse_text_format(shift_references(text, 2, 3))
+    bool_or, linear = shifted.Proto().constraints
+    assert list(bool_or.enforcement_literal) == [5]
+    assert list(bool_or.bool_or.literals) == [0, -6]
+    assert list(linear.linear.vars) == [1, 5]
+
+    assert shift_term(2, 2, 3) == 5
+    assert shift_term([[1, 2], [1, 2], 0], 2, 3) == [[1, 5], [1, 2], 0]
@@ -0,0 +1,42 @@
+import time
+
+import pytest
+
+from util.plotManager import ScheduleRenderer, render_schedules, schedule_columns
+from myTests.test_excel_export import build_schedule
+
+
+def test_schedule_columns():
+    _, courses = build_schedule(weeks=2)
+    columns = schedule_columns([course for course in courses if course.group.name == 'A1'])
+    # The second week repeats the first one: one block per weekday and time range
+    assert len(columns['label']) == 7 * 2
+    assert (columns['day'][-1], columns['start'][-1], columns['end'][-1]) == (0, 8.0, 9.5)
+    assert columns['label'][-1] == 'Maths\nAda Lovelace\n(L101)' and columns['color'][-1] == '0A0CA3'
+
+
+def test_renderer_reuses_its_figure(tmp_path):
+    import matplotlib.pyplot as plt
+
+    _, courses = build_schedule(weeks=1)
+    renderer = ScheduleRenderer(dpi=50)
+    axes = renderer.ax
+    for group in ('A1', 'A2'):
+        renderer.render([course for course in courses if course.group.name == group], str(tmp_path / f'{group}.png'))
+    renderer.render(courses, str(tmp_path / 'all.svg'))
+    assert renderer.ax is axes and len(axes.texts) == len(schedule_columns(courses)['label'])
+    assert (tmp_path / 'A2.png').read_bytes()[:4] == b'\x89PNG' and b'<svg' in (tmp_path / 'all.svg').read_bytes()[:500]
+    assert plt.get_fignums() == []  # Nothing left open in pyplot
+    renderer.close()
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_render_schedules(tmp_path, workers):
+    _, courses = build_schedule(weeks=1)
+    start = time.perf_counter()
+    paths = render_schedules(courses, str(tmp_path), dpi=50, workers=workers)
+    print(f"\n{len(paths)} plots with {workers} worker(s): {time.perf_counter() - start:.2f}s")
+    assert paths == [str(tmp_path / f'{group}.png') for group in ('A1', 'A2', 'A3')]
+    assert all((tmp_path / f'{group}.png').stat().st_size > 0 for group in ('A1', 'A2', 'A3'))
+    with pytest.raises(ValueError):
+        render_schedules(courses, str(tmp_path), format='jpg')
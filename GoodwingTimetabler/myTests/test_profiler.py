@@ -0,0 +1,34 @@
+from ortools.sat.python import cp_model
+from csp.profiler import BuildProfiler
+
+
+def test_build_profiler_counts_per_phase(tmp_path):
+    """Each phase reports what was added to the model inside it."""
+    model = cp_model.CpModel()
+    profiler = BuildProfiler(model, cprofile_dir=str(tmp_path / 'profiles'))
+
+    with profiler.phase('variables'):
+        x = model.NewIntVar(0, 10, 'x')
+        b = model.NewBoolVar('b')
+    with profiler.phase('constraints'):
+        model.Add(x == 3).OnlyEnforceIf(b)
+        model.AddBoolOr([b, b.Not()])
+    profiler.stop()
+
+    report = profiler.as_dict()
+    variables, constraints = report['families']
+    assert (variables['variables'], variables['constraints']) == (2, 0)
+    assert (constraints['variables'], constraints['constraints'], constraints['literals']) == (0, 2, 4)
+    assert report['total']['constraints'] == 2
+    assert (tmp_path / 'profiles' / 'constraints.prof').exists()
+
+    profiler.to_html(str(tmp_path / 'report.html'))
+    assert 'constraints' in (tmp_path / 'report.html').read_text()
+
+
+def test_disabled_profiler_records_nothing():
+    model = cp_model.CpModel()
+    profiler = BuildProfiler(model, enabled=False)
+    with profiler.phase('variables'):
+        model.NewBoolVar('b')
+    assert profiler.phases == []
@@ -0,0 +1,105 @@
+import datetime as dt
+import time
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+from csp import CSP, ScheduleScorer, SCORE_FAMILIES
+from csp.objects import University, Room, Teacher, Subject, Group, Promotion
+from csp.scoring import gap_patterns, _equal_pairs
+
+
+def two_week_university():
+    """3 groups, 3 subjects, 5 slots per day over 14 days, with an online room (every family of the objective is built)."""
+    maths, physics, chemistry = Subject('Maths', 'M', 6.0), Subject('Physics', 'P', 4.5), Subject('Chemistry', 'C', 3.0)
+    time_ranges = [(dt.time(8 + 2 * i), dt.time(9 + 2 * i, 30)) for i in range(5)]
+    teachers = [Teacher('Ada', 'Lovelace', [maths, chemistry]), Teacher('Marie', 'Curie', [physics]),
+                Teacher('Emmy', 'Noether', [maths, physics])]
+    promotion = Promotion('P1', [Group('G1'), Group('G2'), Group('G3')], [maths, physics, chemistry])
+    rooms = [Room('A101'), Room('A102'), Room('Online')]
+    return University('TwoWeeks', rooms, teachers, [promotion], dt.date(2024, 9, 2), 14, time_ranges)
+
+
+def main_variables(scheduler):
+    table = scheduler.courses
+    rows = table.rows()
+    teacher_index = table.teacher_index[rows]
+    return np.concatenate([table.timeslot_index[rows], table.room_index[rows], teacher_index[teacher_index >= 0]])
+
+
+def test_gap_patterns():
+    # Slot 2 (lunch) is skipped: 0-1 then 3-4 are the only consecutive pairs
+    assert gap_patterns(5).tolist() == [[0, 1, 3, 4, 9]]
+    assert gap_patterns(4).tolist() == []
+
+
+def test_equal_pairs():
+    rng = np.random.default_rng(0)
+    keys = rng.integers(-1, 6, size=(50, 12))
+    expected = [sum(a == b >= 0 for i, a in enumerate(row) for b in row[i + 1:]) for row in keys.tolist()]
+    assert _equal_pairs(keys).tolist() == expected
+
+
+def test_scores_match_cp_sat():
+    """Random feasible timetables get, family by family, the objective CP-SAT finds once its main variables are fixed."""
+    scheduler = CSP(two_week_university(), max_time=3, num_workers=4, interactive=False, show_progress=False)
+    scorer = ScheduleScorer.from_csp(scheduler)
+    variables = main_variables(scheduler)
+    rng = np.random.default_rng(1)
+    for _ in range(3):
+        # Any feasible assignment of the main variables (random linear objective)
+        model = scheduler.model.Clone()
+        model.ClearObjective()
+        model.ClearHints()
+        main = [model.GetIntVarFromProtoIndex(int(index)) for index in variables]
+        model.Minimize(sum(int(weight) * var for weight, var in zip(rng.integers(-5, 6, len(main)), main)))
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = 5
+        assert solver.Solve(model) in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+        values = [solver.Value(var) for var in main]
+
+        # Same assignment with the real objective: CP-SAT only chooses the auxiliary variables
+        fixed = scheduler.model.Clone()
+        fixed.ClearHints()
+        for index, value in zip(variables, values):
+            fixed.Add(fixed.GetIntVarFromProtoIndex(int(index)) == value)
+        scheduler.solver = cp_model.CpSolver()
+        scheduler.solver.parameters.max_time_in_seconds = 20
+        assert scheduler.solver.Solve(fixed) == cp_model.OPTIMAL
+
+        scores = scorer.score(*ScheduleScorer.csp_assignment(scheduler))
+        assert scores['total'].tolist() == [int(scheduler.solver.ObjectiveValue())]
+        for family in SCORE_FAMILIES:
+            expected = sum(scheduler.solver.Value(term) for term in scheduler.objective_terms.get(family, []))
+            assert scores[family].tolist() == [expected], family
+        assert scores['invalid_transitions'].tolist() == [0]
+
+
+def test_batch_scoring():
+    """Rows of a batch are scored independently, from the CSP tables or from the course list."""
+    scheduler = CSP(two_week_university(), max_time=3, num_workers=4, interactive=False, show_progress=False)
+    university, courses = scheduler.university, scheduler.generated_courses
+    scorer = ScheduleScorer.from_courses(university, courses)
+    timeslot, room, teacher = ScheduleScorer.course_assignment(courses)
+    best = scorer.score(timeslot, room, teacher)
+    # Without a proof of optimality, CP-SAT may not have minimized every auxiliary variable of its solution
+    assert best['total'][0] <= scheduler.solver.ObjectiveValue()
+    assert (best['total'][0] == scheduler.solver.ObjectiveValue()) or scheduler.status != cp_model.OPTIMAL
+
+    # Shuffled timeslots of the best solution
+    rng = np.random.default_rng(2)
+    count = 5000
+    timeslots = np.stack([rng.permutation(timeslot) for _ in range(count)])
+    rooms, teachers = np.tile(room, (count, 1)), np.tile(teacher, (count, 1))
+    start = time.perf_counter()
+    scores = scorer.score(timeslots, rooms, teachers, chunk=128)
+    elapsed = time.perf_counter() - start
+    print(f"\nScored {count} candidates of {len(scorer)} courses: {count / elapsed:,.0f} candidates/s")
+    for k in (0, 1234, count - 1):
+        single = scorer.score(timeslots[k], room, teacher)
+        assert all(scores[name][k] == single[name][0] for name in SCORE_FAMILIES + ('total', 'invalid_transitions'))
+
+    # Weights scale the families in the total
+    weighted = scorer.score(timeslots[:10], rooms[:10], teachers[:10], weights={'minimize_late_slots': 0, 'conflicts': 2})
+    assert weighted['total'].tolist() == (scores['total'][:10] - scores['minimize_late_slots'][:10]
+                                         + scores['conflicts'][:10]).tolist()
@@ -0,0 +1,75 @@
+import json
+import time
+
+import pytest
+
+from csp import SolutionFrame, SOLUTION_COLUMNS
+from util import ExcelScheduleManager
+from myTests.test_excel_export import build_schedule
+
+
+def test_solution_frame():
+    university, courses = build_schedule(weeks=2)
+    frame = SolutionFrame.from_courses(university, courses)
+    columns = frame.columns()
+    assert len(frame) == len(courses) and list(columns) == list(SOLUTION_COLUMNS)
+    # Sorted by timeslot then group, whatever the order of the courses
+    assert columns['timeslot'].tolist() == sorted(columns['timeslot'].tolist())
+    assert [columns[name][0] for name in ('start', 'end', 'group', 'subject', 'teacher', 'room')] == \
+        ['08:00', '09:30', 'A1', 'Maths', 'Ada Lovelace', 'L101']
+    assert not columns['online'].any()
+
+
+def test_csv_and_jsonl(tmp_path):
+    import pandas as pd
+
+    university, courses = build_schedule(weeks=1)
+    frame = SolutionFrame.from_courses(university, courses)
+    frame.to_csv(str(tmp_path / 'solution.csv'))
+    frame.to_jsonl(str(tmp_path / 'solution.jsonl'))
+
+    table = pd.read_csv(tmp_path / 'solution.csv')
+    assert list(table.columns) == list(SOLUTION_COLUMNS) and len(table) == len(courses)
+    lines = (tmp_path / 'solution.jsonl').read_text(encoding='utf-8').splitlines()
+    assert len(lines) == len(courses)
+    first = json.loads(lines[0])
+    assert first['date'] == str(courses[-1].timeslot.day) and first['group'] == 'A1' and first['online'] is False
+
+    # Two exports of the same solution are identical, whatever the order of the courses
+    SolutionFrame.from_courses(university, courses[::-1]).to_csv(str(tmp_path / 'again.csv'))
+    assert (tmp_path / 'again.csv').read_bytes() == (tmp_path / 'solution.csv').read_bytes()
+
+
+def test_parquet(tmp_path):
+    pytest.importorskip('pyarrow')
+    import pandas as pd
+
+    university, courses = build_schedule(weeks=1)
+    SolutionFrame.from_courses(university, courses).to_parquet(str(tmp_path / 'solution.parquet'))
+    assert len(pd.read_parquet(tmp_path / 'solution.parquet')) == len(courses)
+
+
+def test_icalendar(tmp_path):
+    university, courses = build_schedule(weeks=1)
+    paths = SolutionFrame.from_courses(university, courses).to_icalendar(str(tmp_path), 'teacher')
+    assert sorted(paths) == [str(tmp_path / 'teacher_Ada_Lovelace.ics'), str(tmp_path / 'teacher_Marie_Curie.ics')]
+    calendar = (tmp_path / 'teacher_Marie_Curie.ics').read_bytes().decode('utf-8')
+    assert calendar.startswith('BEGIN:VCALENDAR\r\n') and calendar.endswith('END:VCALENDAR\r\n')
+    assert calendar.count('BEGIN:VEVENT') == sum(course.teacher.last_name == 'Curie' for course in courses)
+    assert 'DESCRIPTION:Group: A2\\nTeacher: Marie Curie' in calendar
+    with pytest.raises(ValueError):
+        SolutionFrame.from_courses(university, courses).to_icalendar(str(tmp_path), 'subject')
+
+
+def test_export_speed(tmp_path):
+    university, courses = build_schedule(weeks=16)
+    start = time.perf_counter()
+    frame = SolutionFrame.from_courses(university, courses)
+    frame.to_csv(str(tmp_path / 'solution.csv'))
+    frame.to_jsonl(str(tmp_path / 'solution.jsonl'))
+    frame.to_icalendar(str(tmp_path / 'ics'), 'group')
+    columnar = time.perf_counter() - start
+    start = time.perf_counter()
+    ExcelScheduleManager(university, courses).generate_excel_schedule(str(tmp_path / 'schedule.xlsx'))
+    excel = time.perf_counter() - start
+    print(f"\n{len(courses)} courses: columnar exports {columnar:.3f}s, schedule.xlsx {excel:.3f}s")
@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ('ortools', 'pandas', 'matplotlib', 'openpyxl', 'numpy', 'psutil', 'yaml', 'pytest')
+
+
+def import_profile(statement: str):
+    """
+    Runs statement in a fresh interpreter with -X importtime.\n
+    Returns:\n
+    - float, set | Total import time in ms, and the top-level packages imported
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    total_us, packages = 0, set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        total_us += int(self_us)
+        packages.add(name.strip().split('.')[0])
+    return total_us / 1000, packages
+
+
+@pytest.mark.parametrize('statement, allowed', [
+    ('from app import run_cli', ()),                                   # Argument parsing
+    ('import csp', ('numpy', 'openpyxl')),                             # Instance loading (openpyxl on first read)
+    ('from app import run_app', ('numpy', 'openpyxl')),                # Interactive menu
+    ('from csp import CSP', ('numpy', 'ortools', 'psutil', 'pandas')), # Solver (OR-Tools imports pandas itself)
+])
+def test_startup_imports(statement, allowed):
+    total_ms, packages = import_profile(statement)
+    print(f"\n{statement}: {total_ms:.0f} ms")
+    assert packages & set(HEAVY) <= set(allowed)
@@ -0,0 +1,24 @@
+from csp.telemetry import SolverTelemetry, load_telemetry, relative_gap
+
+
+def test_telemetry_jsonl_and_listeners(tmp_path):
+    """Events are written as JSON lines and forwarded to every listener."""
+    received = []
+    path = str(tmp_path / 'telemetry.jsonl')
+    telemetry = SolverTelemetry(path, listeners=[received.append])
+
+    telemetry.start(variables=10)
+    telemetry.emit('solution', objective=12, best_bound=3, gap=relative_gap(12, 3), solutions=1)
+    telemetry.close()
+
+    events = load_telemetry(path)
+    assert [e['event'] for e in events] == ['start', 'solution']
+    assert events == received
+    assert events[1]['gap'] == 0.75
+    assert all(k in events[1] for k in ('wall_time', 'cpu_time', 'rss_mb'))
+
+
+def test_relative_gap():
+    assert relative_gap(10, 10) == 0
+    assert relative_gap(0, 0) == 0
+    assert relative_gap(None, 3) is None
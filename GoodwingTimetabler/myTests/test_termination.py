@@ -0,0 +1,32 @@
+import pytest
+
+from csp.termination import (SearchState, GapBelow, NoImprovement, FirstFeasible, Deadline,
+                             AllOf, AnyOf, parse_stop_rule)
+
+
+def test_parse_stop_rule_precedence():
+    """& binds tighter than |."""
+    rule = parse_stop_rule("gap<2% & stall>30s | time>600")
+    assert isinstance(rule, AnyOf)
+    assert isinstance(rule.rules[0], AllOf)
+    assert isinstance(rule.rules[1], Deadline)
+    assert rule.time_based
+    assert str(rule) == "gap<2% & stall>30s | time>600s"
+
+    with pytest.raises(ValueError):
+        parse_stop_rule("gap<2% & quality>3")
+
+
+def test_stop_rule_evaluation():
+    rule = GapBelow(5) & NoImprovement(10) | FirstFeasible()
+    state = SearchState(elapsed=20, objective=100, best_bound=97, gap=0.03, solutions=4,
+                        conflicts=2, feasible=False, last_improvement=15)
+    assert not rule.check(state)  # no improvement for 5s only
+
+    state.elapsed = 25
+    assert rule.check(state)
+    assert rule.explain(state) == "gap<5% & stall>10s"
+
+    before_first_solution = SearchState(elapsed=1000)
+    assert not rule.check(before_first_solution)
+    assert Deadline(600).check(before_first_solution)
@@ -0,0 +1,75 @@
+import datetime as dt
+import time
+
+from csp import SolutionFrame, validate, violation_counts, HARD_CONSTRAINTS
+from csp.objects import University, Room, Teacher, Subject, Group, Promotion, Course
+
+
+def build_university():
+    """2 groups, 2 subjects of 2 sessions (3h of 1.5h courses), 7 slots per day over one week."""
+    subjects = [Subject('Maths', 'M', hours=3), Subject('Physics', 'P', hours=3)]
+    groups = [Group('A1'), Group('A2')]
+    teachers = [Teacher('Ada', 'Lovelace', subjects), Teacher('Marie', 'Curie', subjects, available_slots=list(range(7)))]
+    rooms = [Room('L101'), Room('L102'), Room('Online')]
+    time_ranges = [(dt.time(8 + 2 * slot), dt.time(9 + 2 * slot, 30)) for slot in range(7)]
+    return University('Test', rooms, teachers, [Promotion('A', groups, subjects)], dt.date(2024, 9, 2), 7, time_ranges)
+
+
+def valid_courses(university):
+    """A1 with Lovelace in L101 and A2 with Curie in L102 (available on the first day), slots 0, 1, 3 and 4."""
+    (maths, physics), (a1, a2), (lovelace, curie), (l101, l102, _) = (university.subjects, university.groups,
+                                                                     university.teachers, university.rooms)
+    timeslots = university.timeslots
+    return [Course(timeslots[slot], group, subject, teacher, room)
+            for group, teacher, room in ((a1, lovelace, l101), (a2, curie, l102))
+            for slot, subject in ((0, maths), (1, maths), (3, physics), (4, physics))]
+
+
+def test_valid_timetable():
+    university = build_university()
+    courses = valid_courses(university)
+    assert validate(university, courses) == []
+    assert validate(university, SolutionFrame.from_courses(university, courses)) == []
+
+
+def test_violations():
+    university = build_university()
+    courses = valid_courses(university)
+    timeslots, rooms = university.timeslots, university.rooms
+    # A2 moves to L101 on slot 0 (room overlap), A1's slot 4 goes to the lunch break (slot 2)
+    courses[4].room = rooms[0]
+    courses[3].timeslot = timeslots[2]
+    # Lovelace teaches A2 on slot 1 (teacher overlap); Curie teaches A2 on Sunday (availability and weekend)
+    courses[5].teacher = university.teachers[0]
+    courses[7].timeslot = timeslots[6 * 7 + 4]
+    # Both Physics courses of A2 online: above the 30% quota; a third Maths course for A1 on slot 5, clashing with nothing
+    courses[6].room = courses[7].room = rooms[2]
+    courses.append(Course(timeslots[5], university.groups[0], university.subjects[0], university.teachers[0], rooms[0]))
+    # A2's first Physics course moved on its Maths course of slot 0 (group overlap, and Curie's second teacher overlap)
+    courses[6].timeslot = timeslots[0]
+
+    violations = validate(university, courses)
+    assert violation_counts(violations) == {'room_overlap': 1, 'teacher_overlap': 2, 'group_overlap': 1, 'teacher_availability': 1,
+                                            'lunch_break': 1, 'weekend': 1, 'online_quota': 1, 'session_count': 1}
+    assert list(dict.fromkeys(violation['constraint'] for violation in violations)) == list(HARD_CONSTRAINTS)
+    by_constraint = {violation['constraint']: violation for violation in violations}
+    # Sorted by timeslot
+    assert [violation['courses'] for violation in violations if violation['constraint'] == 'teacher_overlap'] == [[4, 6], [1, 5]]
+    assert by_constraint['room_overlap']['courses'] == [0, 4] and by_constraint['room_overlap']['room'] == 'L101'
+    assert by_constraint['teacher_overlap']['teacher'] == 'Ada Lovelace' and by_constraint['teacher_overlap']['timeslot'] == 1
+    assert by_constraint['group_overlap']['courses'] == [4, 6]
+    assert by_constraint['teacher_availability']['teacher'] == 'Marie Curie'
+    assert by_constraint['online_quota']['count'] == 2 and by_constraint['online_quota']['limit'] == 0
+    assert by_constraint['session_count']['message'] == "A1 has 3 Maths courses instead of 2"
+    assert by_constraint['session_count']['courses'] == [0, 1, 8]
+
+
+def test_validation_speed():
+    university = build_university()
+    courses = valid_courses(university) * 2500
+    frame = SolutionFrame.from_courses(university, courses)
+    start = time.perf_counter()
+    violations = validate(university, frame)
+    print(f"\nValidation of {len(frame)} courses: {time.perf_counter() - start:.4f}s")
+    # Every course is repeated 2500 times
+    assert violation_counts(violations) == {'room_overlap': 8, 'teacher_overlap': 8, 'group_overlap': 8, 'session_count': 4}
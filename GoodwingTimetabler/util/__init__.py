@@ -1,3 +1,4 @@
 from .helloworld import hello_world
 from .yamlManager import *
-from .excelManager import *
\ No newline at end of file
+from .excelManager import *
+from .plotManager import *
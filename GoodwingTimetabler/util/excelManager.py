@@ -1,42 +1,39 @@
-import pandas as pd
 import os
+import re
 
 # ExcelScheduleManager
 from openpyxl import Workbook, load_workbook
-from openpyxl.styles import PatternFill, Alignment, Font, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill, Alignment, Font, Border, Side, NamedStyle
 from openpyxl.utils import get_column_letter
-from openpyxl.worksheet.dimensions import ColumnDimension, DimensionHolder
 from openpyxl.worksheet.filters import FilterColumn, Filters
 import datetime as dt
 from typing import List, Dict
 from collections import defaultdict
-from csp import University
+from csp.objects import University
 
-def createCSV(gen_dir: str = './GoodwingTimetabler/UniversityInstance/'):
-    
-    xlsx_path = f'{gen_dir}University.xlsx'
+def createCSV(gen_dir: str = './GoodwingTimetabler/UniversityInstance/', sheets: Dict[str, List[Dict]] = None):
+    """
+    Exports the sheets of University.xlsx to gen_dir/csv/ (one file per sheet).\n
+    Parameters:\n
+    - gen_dir : str | Folder containing University.xlsx
+    - sheets : {str: [row]} | Sheets already read by read_workbook (the workbook is read if None)
+    """
+    import pandas as pd
+    from csp.instantiator import INSTANCE_SHEETS, read_workbook
+
+    if sheets is None:
+        sheets = read_workbook(f'{gen_dir}University.xlsx')
 
     # Ensure the CSV directory exists
     os.makedirs(f'{gen_dir}csv', exist_ok=True)
     
-    # Define standard sheets to process
-    standard_sheets = ['University', 'Timeslots', 'Promotions', 'Subjects', 'Teachers', 'Rooms']
-    
-    # Process standard sheets
-    wb = load_workbook(xlsx_path)
-    for sheet_name in standard_sheets:
-        if sheet_name in wb.sheetnames:
+    for sheet_name in INSTANCE_SHEETS:
+        if sheet_name in sheets:
             print(f"Processing sheet: {sheet_name}")
-            df = pd.read_excel(xlsx_path, sheet_name)
-            df.to_csv(f'{gen_dir}csv/{sheet_name}.csv', index=False)
-    
-    # Process teacher availability if it exists
-    if 'TeacherAvailability' in wb.sheetnames:
-        print("Processing teacher availability data")
-        df = pd.read_excel(xlsx_path, 'TeacherAvailability')
-        df.to_csv(f'{gen_dir}csv/TeacherAvailability.csv', index=False)
-    else:
-        print("No teacher availability data")
+            pd.DataFrame(sheets[sheet_name]).to_csv(f'{gen_dir}csv/{sheet_name}.csv', index=False)
+        elif sheet_name == 'TeacherAvailability':
+            print("No teacher availability data")
 
 
 def init_template(gen_dir: str = './GoodwingTimetabler/UniversityInstance/', force_reset=True):
@@ -228,10 +225,24 @@ def create_availability_template(output_path: str = './GoodwingTimetabler/Univer
         print(f"Error creating TeacherAvailability template: {e}")
 
 class ExcelScheduleManager:
+    # Columns of the group, teacher and room schedule sheets
+    SCHEDULE_HEADERS = ['Week', 'Day', 'Time Slot', 'Subject', 'Teacher', 'Room']
+    SCHEDULE_WIDTHS = [10, 15, 20, 30, 25, 15]
+    DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    # Entities of the visual timetable: name of the entity of a course, and index section (title, colour)
+    VISUAL_ENTITIES = {
+        'Group': lambda course: course.group.name,
+        'Teacher': lambda course: f"{course.teacher.last_name}_{course.teacher.first_name}",
+        'Room': lambda course: course.room.name,
+    }
+    INDEX_SECTIONS = {'Group': ('Groups', "9BC2E6"), 'Teacher': ('Teachers', "A9D08E"), 'Room': ('Rooms', "FFD966")}
+    VISUAL_SHARDS = (None, 'type', 'entity')
+
     def __init__(self, university: University, generated_courses):
         self.university = university
         self.courses = generated_courses
-        self.wb = Workbook()
+        self.wb = None
+        self._visual_styles = None
         self.time_slots = university.time_ranges
         
     def format_time(self, time_obj):
@@ -240,123 +251,94 @@ class ExcelScheduleManager:
     def get_week_number(self, date):
         return (date - self.university.timeslots[0].day).days // 7 + 1
 
+    def register_styles(self) -> Dict[str, str]:
+        """
+        Registers the named styles of the schedule workbook: headers, plain cells and one style per subject colour.\n
+        Returns:\n
+        - {str: str} | Subject colour -> name of its style
+        """
+        thin = Side(style='thin')
+        border = Border(left=thin, right=thin, top=thin, bottom=thin)
+        centered = Alignment(horizontal='center', vertical='center')
+        header_fill = PatternFill(start_color="E0E0E0", end_color="E0E0E0", fill_type="solid")
+
+        self.wb.add_named_style(NamedStyle(name='schedule_header', font=Font(bold=True), fill=header_fill,
+                                           alignment=Alignment(horizontal='center')))
+        self.wb.add_named_style(NamedStyle(name='schedule_cell', alignment=centered, border=border))
+        self.wb.add_named_style(NamedStyle(name='statistics_title', font=Font(bold=True)))
+        self.wb.add_named_style(NamedStyle(name='statistics_header', font=Font(bold=True), fill=header_fill))
+
+        subject_styles = {}
+        for color in dict.fromkeys(course.subject.color for course in self.courses):
+            # Adjust font color for better readability
+            brightness = sum(int(color[i:i+2], 16) for i in (0, 2, 4)) / 3
+            name = f'subject_{color}'
+            self.wb.add_named_style(NamedStyle(name=name, alignment=centered, border=border,
+                                               fill=PatternFill(start_color=color, end_color=color, fill_type="solid"),
+                                               font=Font(color="FFFFFF" if brightness < 128 else "000000")))
+            subject_styles[color] = name
+        return subject_styles
+
+    def styled(self, ws, value, style: str) -> WriteOnlyCell:
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        return cell
+
     def setup_sheet_structure(self, ws):
-        # Headers
-        headers = ['Week', 'Day', 'Time Slot', 'Subject', 'Teacher', 'Room']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col)
-            cell.value = header
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="E0E0E0", end_color="E0E0E0", fill_type="solid")
-            cell.alignment = Alignment(horizontal='center')
-
-        # Add filters
+        # Column widths and filters must be set before the first row is streamed
+        for col, width in enumerate(self.SCHEDULE_WIDTHS, 1):
+            ws.column_dimensions[get_column_letter(col)].width = width
         ws.auto_filter.ref = f'A1:F1'
-        
-        # Set column widths
-        dim_holder = DimensionHolder(worksheet=ws)
-        
-        widths = [10, 15, 20, 30, 25, 15]  # Adjusted widths for each column
-        for col, width in enumerate(widths, 1):
-            dim_holder[get_column_letter(col)] = ColumnDimension(ws, min=col, max=col, width=width)
-        
-        ws.column_dimensions = dim_holder
 
-    def add_course_to_sheet(self, ws, row, course, week_num):
-        day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        day_of_week = day_names[course.timeslot.day.weekday()]
-        
-        # Data to insert
-        data = [
-            week_num,
-            day_of_week,
+        # Headers
+        ws.append([self.styled(ws, header, 'schedule_header') for header in self.SCHEDULE_HEADERS])
+
+    def course_values(self, course) -> list:
+        """Values of the schedule row of a course."""
+        return [
+            self.get_week_number(course.timeslot.day),
+            self.DAY_NAMES[course.timeslot.day.weekday()],
             f"{self.format_time(course.timeslot.start)} - {self.format_time(course.timeslot.end)}",
             course.subject.name,
             f"{course.teacher.first_name} {course.teacher.last_name}",
             course.room.name
         ]
-        
-        # Insert data
-        for col, value in enumerate(data, 1):
-            cell = ws.cell(row=row, column=col)
+
+    def add_course_to_sheet(self, ws, cells: list, values: list):
+        for cell, value in zip(cells, values):
             cell.value = value
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-            
-            # Add color to subject cell
-            if col == 4:  # Subject column
-                cell.fill = PatternFill(start_color=course.subject.color, 
-                                      end_color=course.subject.color, 
-                                      fill_type="solid")
-                # Adjust font color for better readability
-                brightness = sum(int(course.subject.color[i:i+2], 16) for i in (0, 2, 4)) / 3
-                cell.font = Font(color="FFFFFF" if brightness < 128 else "000000")
-
-        # Add border
-        border = Border(left=Side(style='thin'), 
-                       right=Side(style='thin'),
-                       top=Side(style='thin'),
-                       bottom=Side(style='thin'))
-        for col in range(1, 7):
-            ws.cell(row=row, column=col).border = border
-
-    def create_group_schedule(self, group_name, group_courses):
-        ws = self.wb.create_sheet(title=f"Group_{group_name}")
-        self.setup_sheet_structure(ws)
-        
-        row = 2
-        for course in sorted(group_courses, 
-                           key=lambda x: (self.get_week_number(x.timeslot.day), 
-                                        x.timeslot.day, 
-                                        x.timeslot.start)):
-            week_num = self.get_week_number(course.timeslot.day)
-            self.add_course_to_sheet(ws, row, course, week_num)
-            row += 1
-
-    def create_teacher_schedule(self, teacher, teacher_courses):
-        ws = self.wb.create_sheet(title=f"Teacher_{teacher.last_name}")
-        self.setup_sheet_structure(ws)
-        
-        row = 2
-        for course in sorted(teacher_courses, 
-                           key=lambda x: (self.get_week_number(x.timeslot.day), 
-                                        x.timeslot.day, 
-                                        x.timeslot.start)):
-            week_num = self.get_week_number(course.timeslot.day)
-            self.add_course_to_sheet(ws, row, course, week_num)
-            row += 1
-
-    def create_room_schedule(self, room, room_courses):
-        ws = self.wb.create_sheet(title=f"Room_{room.name}")
+        ws.append(cells)
+
+    def create_schedule_sheet(self, title: str, rows: List[tuple]):
+        """
+        Streams a schedule sheet.\n
+        Parameters:\n
+        - title : str | Sheet title
+        - rows : [(values, subject style)] | Rows in timetable order
+        """
+        ws = self.wb.create_sheet(title=title)
         self.setup_sheet_structure(ws)
-        
-        row = 2
-        for course in sorted(room_courses, 
-                           key=lambda x: (self.get_week_number(x.timeslot.day), 
-                                        x.timeslot.day, 
-                                        x.timeslot.start)):
-            week_num = self.get_week_number(course.timeslot.day)
-            self.add_course_to_sheet(ws, row, course, week_num)
-            row += 1
+
+        # Rows of a write-only sheet are serialized on append, so the same styled cells are reused for every row
+        cells = [self.styled(ws, None, 'schedule_cell') for _ in self.SCHEDULE_HEADERS]
+        subject_cells = {}
+        for values, subject_style in rows:
+            if subject_style not in subject_cells:
+                subject_cells[subject_style] = self.styled(ws, None, subject_style)
+            cells[3] = subject_cells[subject_style]
+            self.add_course_to_sheet(ws, cells, values)
 
     def create_statistics_sheet(self):
         ws = self.wb.create_sheet(title="Statistics")
         
-        # Style for headers
-        header_style = Font(bold=True)
-        header_fill = PatternFill(start_color="E0E0E0", end_color="E0E0E0", fill_type="solid")
-        
+        # Adjust column widths
+        for col in range(1, 5):
+            ws.column_dimensions[get_column_letter(col)].width = 20
+
         # Group Statistics
-        ws['A1'] = "Group Statistics"
-        ws['A1'].font = header_style
-        
-        headers = ['Group', 'Total Hours', 'Subjects', 'Teachers']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=2, column=col)
-            cell.value = header
-            cell.font = header_style
-            cell.fill = header_fill
+        ws.append([self.styled(ws, "Group Statistics", 'statistics_title')])
+        ws.append([self.styled(ws, header, 'statistics_header') for header in ['Group', 'Total Hours', 'Subjects', 'Teachers']])
         
-        row = 3
         group_stats = defaultdict(lambda: {'hours': 0, 'subjects': set(), 'teachers': set()})
         
         for course in self.courses:
@@ -368,25 +350,14 @@ class ExcelScheduleManager:
             stats['teachers'].add(f"{course.teacher.first_name} {course.teacher.last_name}")
         
         for group, stats in group_stats.items():
-            ws.cell(row=row, column=1, value=group)
-            ws.cell(row=row, column=2, value=f"{stats['hours']:.1f}")
-            ws.cell(row=row, column=3, value=len(stats['subjects']))
-            ws.cell(row=row, column=4, value=len(stats['teachers']))
-            row += 1
+            ws.append([group, f"{stats['hours']:.1f}", len(stats['subjects']), len(stats['teachers'])])
         
         # Teacher Statistics
-        row += 2
-        ws.cell(row=row, column=1, value="Teacher Statistics").font = header_style
-        row += 1
-        
-        headers = ['Teacher', 'Total Hours', 'Groups', 'Subjects']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=row, column=col)
-            cell.value = header
-            cell.font = header_style
-            cell.fill = header_fill
-        
-        row += 1
+        ws.append([])
+        ws.append([])
+        ws.append([self.styled(ws, "Teacher Statistics", 'statistics_title')])
+        ws.append([self.styled(ws, header, 'statistics_header') for header in ['Teacher', 'Total Hours', 'Groups', 'Subjects']])
+        
         teacher_stats = defaultdict(lambda: {'hours': 0, 'groups': set(), 'subjects': set()})
         
         for course in self.courses:
@@ -399,43 +370,43 @@ class ExcelScheduleManager:
             stats['subjects'].add(course.subject.name)
         
         for teacher, stats in teacher_stats.items():
-            ws.cell(row=row, column=1, value=teacher)
-            ws.cell(row=row, column=2, value=f"{stats['hours']:.1f}")
-            ws.cell(row=row, column=3, value=len(stats['groups']))
-            ws.cell(row=row, column=4, value=len(stats['subjects']))
-            row += 1
-        
-        # Adjust column widths
-        for col in range(1, 5):
-            ws.column_dimensions[get_column_letter(col)].width = 20
+            ws.append([teacher, f"{stats['hours']:.1f}", len(stats['groups']), len(stats['subjects'])])
 
     def generate_excel_schedule(self, output_path):
-        # Remove default sheet
-        self.wb.remove(self.wb.active)
-        
-        # Group schedules
-        group_courses = defaultdict(list)
+        """
+        Writes the group, teacher and room schedules and the statistics to output_path.\n
+        The sheets are streamed (write-only workbook) with shared named styles: the courses are sorted once, their
+        row values computed once, and the cells are not kept in memory.\n
+        Parameters:\n
+        - output_path: str | Path of the .xlsx file
+        """
+        self.wb = Workbook(write_only=True)
+        subject_styles = self.register_styles()
+
+        # Sheets in order of first appearance of the entities
+        group_rows, teacher_rows, room_rows = {}, {}, {}
         for course in self.courses:
-            group_courses[course.group.name].append(course)
-        
-        for group_name, courses in group_courses.items():
-            self.create_group_schedule(group_name, courses)
+            group_rows.setdefault(course.group.name, [])
+            teacher_rows.setdefault(course.teacher, [])
+            room_rows.setdefault(course.room, [])
+
+        for course in sorted(self.courses, key=lambda x: (x.timeslot.day, x.timeslot.start)):
+            row = (self.course_values(course), subject_styles[course.subject.color])
+            group_rows[course.group.name].append(row)
+            teacher_rows[course.teacher].append(row)
+            room_rows[course.room].append(row)
+
+        # Group schedules
+        for group_name, rows in group_rows.items():
+            self.create_schedule_sheet(f"Group_{group_name}", rows)
         
         # Teacher schedules
-        teacher_courses = defaultdict(list)
-        for course in self.courses:
-            teacher_courses[course.teacher].append(course)
-        
-        for teacher, courses in teacher_courses.items():
-            self.create_teacher_schedule(teacher, courses)
+        for teacher, rows in teacher_rows.items():
+            self.create_schedule_sheet(f"Teacher_{teacher.last_name}", rows)
         
         # Room schedules
-        room_courses = defaultdict(list)
-        for course in self.courses:
-            room_courses[course.room].append(course)
-        
-        for room, courses in room_courses.items():
-            self.create_room_schedule(room, courses)
+        for room, rows in room_rows.items():
+            self.create_schedule_sheet(f"Room_{room.name}", rows)
         
         # Statistics sheet
         self.create_statistics_sheet()
@@ -444,356 +415,270 @@ class ExcelScheduleManager:
         self.wb.save(output_path)
         print(f"\nBasic timetable saved to {output_path}")
 
-    def create_visual_timetable(self, output_path="./Outputs/excel/visual_timetable.xlsx"):
+    def visual_style_components(self) -> Dict[str, dict]:
         """
-        Creates a visual Excel timetable with days as columns and timeslots as rows.
-        Creates separate sheets for each week to handle unique weekly schedules.
-        Each entity (group, teacher, room) gets its own set of weekly sheets.
-        Includes an organized index page with separate columns for groups, teachers, and rooms.
-        
-        Parameters:
-        - output_path: str | Path to save the Excel file
+        Fonts, fills, borders and alignments of the visual timetable, by style name.\n
+        Built once per manager and shared by every workbook it writes (shards), which only register them as named styles.
         """
-        from openpyxl import Workbook
-        from openpyxl.styles import PatternFill, Alignment, Font, Border, Side
-        from openpyxl.utils import get_column_letter
-        from openpyxl.worksheet.hyperlink import Hyperlink
-        from openpyxl.drawing.image import Image
-        import datetime as dt
-        from collections import defaultdict
+        if self._visual_styles is None:
+            thin = Side(style='thin')
+            border = Border(left=thin, right=thin, top=thin, bottom=thin)
+            centered = Alignment(horizontal='center', vertical='center')
+            wrapped = Alignment(wrap_text=True, horizontal='center', vertical='center')
+            link = Font(color="0563C1", underline="single")
 
-        wb = Workbook()
-        wb.remove(wb.active)  # Remove the default sheet
-        
-        # Format time ranges for row headers
-        time_range_labels = [f"{self.format_time(start)} - {self.format_time(end)}" 
-                            for start, end in self.university.time_ranges]
-        
-        # Day names for column headers
-        day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        
-        # Create border styles
-        thin_border = Border(
-            left=Side(style='thin'), right=Side(style='thin'),
-            top=Side(style='thin'), bottom=Side(style='thin')
-        )
-        
-        # Calculate the number of weeks in the schedule
+            def fill(color):
+                return PatternFill(start_color=color, end_color=color, fill_type="solid")
+
+            styles = {
+                'visual_title': dict(font=Font(bold=True, size=14), alignment=centered, fill=fill("B8CCE4")),
+                'visual_back': dict(font=Font(color="0563C1", underline="single", bold=True), alignment=Alignment(horizontal='right')),
+                'visual_day': dict(font=Font(bold=True), alignment=centered, border=border, fill=fill("E0E0E0")),
+                'visual_time': dict(font=Font(bold=True), alignment=centered, border=border, fill=fill("F0F0F0")),
+                'visual_empty': dict(border=border),
+                'visual_multi': dict(font=Font(size=8), alignment=wrapped, border=border),  # Smaller font for multiple entries
+                'index_title': dict(font=Font(bold=True, size=16, color="FFFFFF"), alignment=Alignment(horizontal='center'),
+                                    fill=fill("4472C4")),
+                'index_header': dict(font=Font(bold=True), alignment=Alignment(horizontal='center'), border=border, fill=fill("E0E0E0")),
+                'index_link': dict(font=link, alignment=Alignment(horizontal='left', vertical='center'), border=border),
+                'index_week': dict(alignment=centered, border=border),
+                'index_note': dict(font=Font(italic=True), alignment=Alignment(horizontal='center')),
+            }
+            for section, color in self.INDEX_SECTIONS.values():
+                styles[f'index_{section.lower()}'] = dict(font=Font(bold=True, size=12), alignment=Alignment(horizontal='center'),
+                                                          fill=fill(color))
+            for color in dict.fromkeys(course.subject.color for course in self.courses):
+                # Adjust font color for better readability
+                brightness = sum(int(color[i:i+2], 16) for i in (0, 2, 4)) / 3
+                styles[f'visual_subject_{color}'] = dict(font=Font(color="FFFFFF" if brightness < 128 else "000000"),
+                                                         alignment=wrapped, border=border, fill=fill(color))
+            self._visual_styles = styles
+        return self._visual_styles
+
+    def visual_cells(self, courses_by_timeslot: Dict[tuple, list]) -> Dict[tuple, tuple]:
+        """
+        Content of the grid of a visual sheet.\n
+        Parameters:\n
+        - courses_by_timeslot : {(day index, time index): [Course]} | Courses of one entity and one week
+        Returns:\n
+        - {(day index, time index): (str, str)} | Text and style of the non-empty cells
+        """
+        cells = {}
+        for (day_idx, time_idx), course_list in courses_by_timeslot.items():
+            if len(course_list) > 1:
+                # Format the text for multiple courses
+                cells[day_idx, time_idx] = ("\n".join(f"{c.subject.name} ({c.room.name})" for c in course_list), 'visual_multi')
+            else:
+                # Single course, more detailed formatting, colored by subject
+                course = course_list[0]
+                cells[day_idx, time_idx] = (f"{course.subject.name}\n{course.teacher.first_name} {course.teacher.last_name}\n"
+                                            f"({course.room.name})", f'visual_subject_{course.subject.color}')
+        return cells
+
+    def plan_visual_sheets(self, dedupe_weeks: bool = False, entities: List[str] = None) -> List[dict]:
+        """
+        Lists the sheets of the visual timetable, before anything is written.\n
+        Parameters:\n
+        - dedupe_weeks : bool | A week identical to an earlier week of the same entity gets no sheet of its own
+        - entities : [str] | Only plan these entities ("Group:A1", "Teacher:Lovelace_Ada", "Room:L101", or a whole type such as "Room")
+        Returns:\n
+        - [dict] | Per entity (in order of first appearance) and week (in order): entity type, name, week, cells, and the sheet of the
+          earlier identical week (same_as) or the later weeks it stands for (also)
+        """
+        time_index = {time_range: i for i, time_range in enumerate(self.university.time_ranges)}
         start_date = self.university.timeslots[0].day
-        end_date = self.university.timeslots[-1].day
-        days_diff = (end_date - start_date).days
-        total_weeks = (days_diff // 7) + 1
-        
-        # Function to get week number for a date (relative to start_date)
-        def get_week_number(date):
-            days_from_start = (date - start_date).days
-            return days_from_start // 7
-        
-        # Create the index sheet first
-        index = wb.create_sheet(title="Index")
-        
-        # Keep track of all sheets for organized index
-        sheet_info = {
-            'Groups': [],
-            'Teachers': [],
-            'Rooms': []
-        }
-        
-        # Function to add navigation button back to index
-        def add_back_to_index_button(worksheet):
-            # Add a text hyperlink in the top-right corner
-            cell = worksheet.cell(row=1, column=8)  # Use H1 cell
-            cell.value = "Back to Index"
-            cell.hyperlink = "#Index!A1"
-            cell.font = Font(color="0563C1", underline="single", bold=True)
-            cell.alignment = Alignment(horizontal='right')
-        
-        # Function to create a visual timetable sheet for a specific week
-        def setup_visual_sheet(entity_name, entity_type, week_num, courses_by_timeslot):
-            sheet_type = f"{entity_type}s"  # Convert to plural for categorization
-            
-            # Format sheet name
-            sheet_name = f"{entity_type}_{entity_name}_W{week_num+1}"
-            # Truncate sheet name if too long (Excel limit is 31 chars)
-            if len(sheet_name) > 31:
-                sheet_name = sheet_name[:28] + "..."
-            
-            # Store sheet info for index
-            sheet_info[sheet_type].append({
-                'name': entity_name,
-                'week': week_num + 1,
-                'sheet_name': sheet_name
-            })
-            
-            ws = wb.create_sheet(title=sheet_name)
-            
-            # Set up column widths
-            for col in range(1, 9):  # 1 for time column + 7 days + 1 for back button
-                width = 20 if col == 1 else 25
-                ws.column_dimensions[get_column_letter(col)].width = width
-            
-            # Set up row heights
-            for row in range(1, len(time_range_labels) + 3):
-                ws.row_dimensions[row].height = 60
-            
-            # Add header with week information
-            week_start = start_date + dt.timedelta(days=week_num*7)
-            week_end = min(week_start + dt.timedelta(days=6), end_date)
-            week_header = f"Week {week_num+1}: {week_start.strftime('%d/%m/%Y')} - {week_end.strftime('%d/%m/%Y')}"
-            
-            # Add the entity name and week info in cell A1
-            ws.merge_cells('A1:G1')
-            header_cell = ws.cell(row=1, column=1)
-            header_cell.value = f"{entity_type}: {entity_name} - {week_header}"
-            header_cell.font = Font(bold=True, size=14)
-            header_cell.alignment = Alignment(horizontal='center', vertical='center')
-            header_cell.fill = PatternFill(start_color="B8CCE4", end_color="B8CCE4", fill_type="solid")
-            
-            # Add back to index button
-            add_back_to_index_button(ws)
-            
-            # Add day headers (row 2)
-            ws.cell(row=2, column=1).value = "Time Slot"
-            ws.cell(row=2, column=1).font = Font(bold=True)
-            ws.cell(row=2, column=1).alignment = Alignment(horizontal='center', vertical='center')
-            ws.cell(row=2, column=1).border = thin_border
-            ws.cell(row=2, column=1).fill = PatternFill(start_color="E0E0E0", end_color="E0E0E0", fill_type="solid")
-            
-            for i, day in enumerate(day_names):
-                cell = ws.cell(row=2, column=i+2)
-                cell.value = day
-                cell.font = Font(bold=True)
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-                cell.border = thin_border
-                cell.fill = PatternFill(start_color="E0E0E0", end_color="E0E0E0", fill_type="solid")
-            
-            # Add time slots as row headers
-            for i, time_label in enumerate(time_range_labels):
-                cell = ws.cell(row=i+3, column=1)
-                cell.value = time_label
-                cell.font = Font(bold=True)
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-                cell.border = thin_border
-                cell.fill = PatternFill(start_color="F0F0F0", end_color="F0F0F0", fill_type="solid")
-            
-            # Create empty grid with borders
-            for row in range(3, len(time_range_labels) + 3):
-                for col in range(2, 9):
-                    cell = ws.cell(row=row, column=col)
-                    cell.border = thin_border
-            
-            # Fill in the courses for this week
-            for (day_idx, time_idx), course_list in courses_by_timeslot.items():
-                if 0 <= day_idx < 7 and 0 <= time_idx < len(time_range_labels):
-                    row = time_idx + 3
-                    col = day_idx + 2
-                    
-                    if course_list:  # If there are courses in this timeslot
-                        # Format the text for multiple courses (if more than one)
-                        if len(course_list) > 1:
-                            text = "\n".join([f"{c.subject.name} ({c.room.name})" for c in course_list])
-                            cell = ws.cell(row=row, column=col)
-                            cell.value = text
-                            cell.alignment = Alignment(wrap_text=True, horizontal='center', vertical='center')
-                            cell.font = Font(size=8)  # Smaller font for multiple entries
-                        else:
-                            # Single course, more detailed formatting
-                            course = course_list[0]
-                            cell = ws.cell(row=row, column=col)
-                            cell.value = f"{course.subject.name}\n{course.teacher.first_name} {course.teacher.last_name}\n({course.room.name})"
-                            cell.alignment = Alignment(wrap_text=True, horizontal='center', vertical='center')
-                            
-                            # Color based on subject
-                            color = course.subject.color
-                            cell.fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
-                            
-                            # Set font color based on background brightness
-                            brightness = sum(int(color[i:i+2], 16) for i in (0, 2, 4)) / 3
-                            cell.font = Font(color="FFFFFF" if brightness < 128 else "000000")
-        
-        # Process group schedules - organize by group, week, day, and timeslot
-        group_schedules = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
-        for course in self.courses:
-            date = course.timeslot.day
-            week_num = get_week_number(date)
-            day_idx = date.weekday()  # 0 for Monday, 6 for Sunday
-            
-            # Find the time range index
-            time_idx = None
-            for i, (start, end) in enumerate(self.university.time_ranges):
-                if course.timeslot.start == start and course.timeslot.end == end:
-                    time_idx = i
-                    break
-            
-            if time_idx is not None:
-                group_schedules[course.group.name][week_num][(day_idx, time_idx)].append(course)
-        
-        # Create visual timetable for each group and week
-        for group_name, weeks in group_schedules.items():
-            for week_num, courses_by_timeslot in weeks.items():
-                setup_visual_sheet(group_name, "Group", week_num, courses_by_timeslot)
-        
-        # Process teacher schedules - organize by teacher, week, day, and timeslot
-        teacher_schedules = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
-        for course in self.courses:
-            teacher_name = f"{course.teacher.last_name}_{course.teacher.first_name}"
-            date = course.timeslot.day
-            week_num = get_week_number(date)
-            day_idx = date.weekday()
-            
-            time_idx = None
-            for i, (start, end) in enumerate(self.university.time_ranges):
-                if course.timeslot.start == start and course.timeslot.end == end:
-                    time_idx = i
-                    break
-            
-            if time_idx is not None:
-                teacher_schedules[teacher_name][week_num][(day_idx, time_idx)].append(course)
-        
-        # Create visual timetable for each teacher and week
-        for teacher_name, weeks in teacher_schedules.items():
-            for week_num, courses_by_timeslot in weeks.items():
-                setup_visual_sheet(teacher_name, "Teacher", week_num, courses_by_timeslot)
-        
-        # Process room schedules - organize by room, week, day, and timeslot
-        room_schedules = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
+        wanted = set(entities) if entities is not None else None
+
+        # Courses by entity type, entity, week and (day, time range)
+        schedules = {entity_type: {} for entity_type in self.VISUAL_ENTITIES}
         for course in self.courses:
+            time_idx = time_index.get((course.timeslot.start, course.timeslot.end))
+            if time_idx is None:
+                continue
             date = course.timeslot.day
-            week_num = get_week_number(date)
-            day_idx = date.weekday()
-            
-            time_idx = None
-            for i, (start, end) in enumerate(self.university.time_ranges):
-                if course.timeslot.start == start and course.timeslot.end == end:
-                    time_idx = i
-                    break
-            
-            if time_idx is not None:
-                room_schedules[course.room.name][week_num][(day_idx, time_idx)].append(course)
-        
-        # Create visual timetable for each room and week
-        for room_name, weeks in room_schedules.items():
-            for week_num, courses_by_timeslot in weeks.items():
-                setup_visual_sheet(room_name, "Room", week_num, courses_by_timeslot)
-        
-        # Now build the index page with three separate columns
-        index = wb.worksheets[0]  # Get the index sheet we created earlier
-        
-        # Set up column widths
-        index.column_dimensions['A'].width = 25
-        index.column_dimensions['B'].width = 10
-        index.column_dimensions['C'].width = 5  # Spacer
-        index.column_dimensions['D'].width = 25
-        index.column_dimensions['E'].width = 10
-        index.column_dimensions['F'].width = 5  # Spacer
-        index.column_dimensions['G'].width = 25
-        index.column_dimensions['H'].width = 10
-        
-        # Add title
-        index.merge_cells('A1:H1')
-        title_cell = index.cell(row=1, column=1)
-        title_cell.value = "VISUAL TIMETABLE INDEX"
-        title_cell.font = Font(bold=True, size=16)
-        title_cell.alignment = Alignment(horizontal='center')
-        title_cell.fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        title_cell.font = Font(bold=True, size=16, color="FFFFFF")
-        
-        # Add section headers (row 2)
-        section_headers = ["GROUPS", "", "", "TEACHERS", "", "", "ROOMS", ""]
-        section_colors = ["9BC2E6", "", "", "A9D08E", "", "", "FFD966", ""]
-        
-        for i, header in enumerate(section_headers):
-            cell = index.cell(row=2, column=i+1)
-            cell.value = header
-            if header:  # Only style non-empty headers
-                cell.font = Font(bold=True, size=12)
-                cell.alignment = Alignment(horizontal='center')
-                cell.fill = PatternFill(start_color=section_colors[i], end_color=section_colors[i], fill_type="solid")
-        
-        # Add column headers for each section (row 3)
-        col_headers = ["Group Name", "Week", "", "Teacher Name", "Week", "", "Room Name", "Week"]
-        
-        for i, header in enumerate(col_headers):
-            cell = index.cell(row=3, column=i+1)
-            cell.value = header
-            if header:  # Only style non-empty headers
-                cell.font = Font(bold=True)
-                cell.alignment = Alignment(horizontal='center')
-                cell.fill = PatternFill(start_color="E0E0E0", end_color="E0E0E0", fill_type="solid")
-                cell.border = thin_border
-        
-        # Sort entries by name and then by week
-        for category in ['Groups', 'Teachers', 'Rooms']:
-            sheet_info[category].sort(key=lambda x: (x['name'], x['week']))
-        
-        # Add entries for groups
-        row = 4
-        for entry in sheet_info['Groups']:
-            index.cell(row=row, column=1).value = entry['name']
-            index.cell(row=row, column=1).alignment = Alignment(horizontal='left', vertical='center')
-            index.cell(row=row, column=1).border = thin_border
-            
-            index.cell(row=row, column=2).value = f"Week {entry['week']}"
-            index.cell(row=row, column=2).alignment = Alignment(horizontal='center', vertical='center')
-            index.cell(row=row, column=2).border = thin_border
-            
-            # Add hyperlink to the sheet
-            index.cell(row=row, column=1).hyperlink = f"#{entry['sheet_name']}!A1"
-            index.cell(row=row, column=1).font = Font(color="0563C1", underline="single")
-            row += 1
-        
-        # Add entries for teachers (start at the same row as groups)
-        row = 4
-        for entry in sheet_info['Teachers']:
-            index.cell(row=row, column=4).value = entry['name']
-            index.cell(row=row, column=4).alignment = Alignment(horizontal='left', vertical='center')
-            index.cell(row=row, column=4).border = thin_border
-            
-            index.cell(row=row, column=5).value = f"Week {entry['week']}"
-            index.cell(row=row, column=5).alignment = Alignment(horizontal='center', vertical='center')
-            index.cell(row=row, column=5).border = thin_border
-            
-            # Add hyperlink to the sheet
-            index.cell(row=row, column=4).hyperlink = f"#{entry['sheet_name']}!A1"
-            index.cell(row=row, column=4).font = Font(color="0563C1", underline="single")
-            row += 1
-        
-        # Add entries for rooms (start at the same row as groups)
-        row = 4
-        for entry in sheet_info['Rooms']:
-            index.cell(row=row, column=7).value = entry['name']
-            index.cell(row=row, column=7).alignment = Alignment(horizontal='left', vertical='center')
-            index.cell(row=row, column=7).border = thin_border
-            
-            index.cell(row=row, column=8).value = f"Week {entry['week']}"
-            index.cell(row=row, column=8).alignment = Alignment(horizontal='center', vertical='center')
-            index.cell(row=row, column=8).border = thin_border
-            
-            # Add hyperlink to the sheet
-            index.cell(row=row, column=7).hyperlink = f"#{entry['sheet_name']}!A1"
-            index.cell(row=row, column=7).font = Font(color="0563C1", underline="single")
-            row += 1
-        
-        # Add instructions at the bottom
-        max_row = max(
-            4 + len(sheet_info['Groups']),
-            4 + len(sheet_info['Teachers']),
-            4 + len(sheet_info['Rooms'])
-        ) + 2
-        
-        index.merge_cells(f'A{max_row}:H{max_row}')
-        index.cell(row=max_row, column=1).value = "Click on any name to view the corresponding timetable"
-        index.cell(row=max_row, column=1).font = Font(italic=True)
-        index.cell(row=max_row, column=1).alignment = Alignment(horizontal='center')
-        
-        # Add university name and generation date
-        max_row += 2
-        index.merge_cells(f'A{max_row}:H{max_row}')
+            week_num = (date - start_date).days // 7
+            for entity_type, entity_name in self.VISUAL_ENTITIES.items():
+                name = entity_name(course)
+                if wanted is not None and entity_type not in wanted and f"{entity_type}:{name}" not in wanted:
+                    continue
+                weeks = schedules[entity_type].setdefault(name, {})
+                weeks.setdefault(week_num, defaultdict(list))[date.weekday(), time_idx].append(course)
+
+        if wanted is not None:
+            for selector in wanted:
+                entity_type, _, name = selector.partition(':')
+                if entity_type not in self.VISUAL_ENTITIES or (name and name not in schedules[entity_type]):
+                    print(f"No visual timetable for {selector}: unknown entity or no course")
+
+        plan = []
+        for entity_type, entity_schedules in schedules.items():
+            for name, weeks in entity_schedules.items():
+                first_weeks = {}
+                for week_num, courses_by_timeslot in sorted(weeks.items()):
+                    cells = self.visual_cells(courses_by_timeslot)
+                    sheet = {'type': entity_type, 'name': name, 'week': week_num, 'cells': cells, 'same_as': None, 'also': []}
+                    if dedupe_weeks:
+                        signature = tuple(sorted(cells.items()))
+                        if signature in first_weeks:
+                            sheet['same_as'] = first_weeks[signature]
+                            first_weeks[signature]['also'].append(week_num)
+                        else:
+                            first_weeks[signature] = sheet
+                    plan.append(sheet)
+        return plan
+
+    def write_visual_workbook(self, path: str, sheets: List[dict]):
+        """
+        Streams one visual timetable workbook: the index, then one sheet per entity and week.\n
+        Parameters:\n
+        - path : str | Path of the .xlsx file
+        - sheets : [dict] | Part of the plan_visual_sheets() plan, including the weeks deduplicated to their earlier sheet
+        """
+        wb = Workbook(write_only=True)
+        for name, components in self.visual_style_components().items():
+            wb.add_named_style(NamedStyle(name=name, **components))
+
+        # Sheet titles are known before anything is written, so that the index can link to them
+        used_titles = set()
+        for sheet in sheets:
+            if sheet['same_as'] is None:
+                suffix = f"_W{sheet['week'] + 1}"
+                title = f"{sheet['type']}_{sheet['name']}{suffix}"
+                # Truncate the name (Excel limit is 31 chars) but keep the week
+                if len(title) > 31:
+                    title = title[:28 - len(suffix)] + "..." + suffix
+                base, copy = title, 2
+                while title.lower() in used_titles:
+                    title = f"{base[:31 - len(str(copy)) - 1]}~{copy}"
+                    copy += 1
+                used_titles.add(title.lower())
+                sheet['title'] = title
+        for sheet in sheets:
+            if sheet['same_as'] is not None:
+                sheet['title'] = sheet['same_as']['title']
+
+        self.write_visual_index(wb, sheets)
+        for sheet in sheets:
+            if sheet['same_as'] is None:
+                self.write_visual_sheet(wb, sheet)
+
+        wb.save(path)
+        print(f"\nVisual timetable saved to {path}")
+
+    def write_visual_sheet(self, wb, sheet: dict):
+        """Streams the grid (days as columns, time ranges as rows) of one entity and week."""
+        ws = wb.create_sheet(title=sheet['title'])
+        time_range_labels = [f"{self.format_time(start)} - {self.format_time(end)}" for start, end in self.university.time_ranges]
+
+        # Column widths: time column, 7 days, back button
+        for col in range(1, 9):
+            ws.column_dimensions[get_column_letter(col)].width = 20 if col == 1 else 25
+        for row in range(1, len(time_range_labels) + 3):
+            ws.row_dimensions[row].height = 60
+
+        # Entity and week information, merged over the days
+        start_date, end_date = self.university.timeslots[0].day, self.university.timeslots[-1].day
+        week_start = start_date + dt.timedelta(days=sheet['week'] * 7)
+        week_end = min(week_start + dt.timedelta(days=6), end_date)
+        header = (f"{sheet['type']}: {sheet['name']} - Week {sheet['week'] + 1}: "
+                  f"{week_start.strftime('%d/%m/%Y')} - {week_end.strftime('%d/%m/%Y')}")
+        if sheet['also']:
+            header += f" (same as week{'s' if len(sheet['also']) > 1 else ''} {', '.join(str(w + 1) for w in sheet['also'])})"
+        back = self.styled(ws, "Back to Index", 'visual_back')
+        back.hyperlink = "#Index!A1"
+        ws.merged_cells.add('A1:G1')
+        ws.append([self.styled(ws, header, 'visual_title')] + [None] * 6 + [back])
+
+        # Day headers, then one row per time range
+        ws.append([self.styled(ws, "Time Slot", 'visual_day')] + [self.styled(ws, day, 'visual_day') for day in self.DAY_NAMES])
+        for time_idx, time_label in enumerate(time_range_labels):
+            row = [self.styled(ws, time_label, 'visual_time')]
+            for day_idx in range(7):
+                text, style = sheet['cells'].get((day_idx, time_idx), (None, 'visual_empty'))
+                row.append(self.styled(ws, text, style))
+            ws.append(row)
+
+    def write_visual_index(self, wb, sheets: List[dict]):
+        """Streams the index sheet: one column of links per entity type, sorted by name and week."""
+        ws = wb.create_sheet(title="Index")
+        for col, width in zip('ABCDEFGH', [25, 10, 5, 25, 10, 5, 25, 10]):  # C and F are spacers
+            ws.column_dimensions[col].width = width
+
+        ws.merged_cells.add('A1:H1')
+        ws.append([self.styled(ws, "VISUAL TIMETABLE INDEX", 'index_title')])
+
+        section_row, header_row, columns = [], [], []
+        for entity_type, (section, _) in self.INDEX_SECTIONS.items():
+            section_row += [self.styled(ws, section.upper(), f'index_{section.lower()}'), None, None]
+            header_row += [self.styled(ws, f"{entity_type} Name", 'index_header'), self.styled(ws, "Week", 'index_header'), None]
+            columns.append(sorted((sheet for sheet in sheets if sheet['type'] == entity_type),
+                                  key=lambda sheet: (sheet['name'], sheet['week'])))
+        ws.append(section_row[:-1])
+        ws.append(header_row[:-1])
+
+        # Hyperlinks are attached to the cells they are written with, so link cells are not reused
+        for i in range(max(map(len, columns))):
+            row = []
+            for column in columns:
+                if i < len(column):
+                    sheet = column[i]
+                    name = self.styled(ws, sheet['name'], 'index_link')
+                    name.hyperlink = f"#{sheet['title']}!A1"
+                    week = f"Week {sheet['week'] + 1}"
+                    if sheet['same_as'] is not None:
+                        week += f" (same as week {sheet['same_as']['week'] + 1})"
+                    row += [name, self.styled(ws, week, 'index_week'), None]
+                else:
+                    row += [None, None, None]
+            ws.append(row[:-1])
+
+        # Instructions, university name and generation date at the bottom
+        ws.append([])
+        ws.append([])
+        note_row = 4 + max(map(len, columns)) + 2
+        ws.merged_cells.add(f'A{note_row}:H{note_row}')
+        ws.append([self.styled(ws, "Click on any name to view the corresponding timetable", 'index_note')])
+        ws.append([])
+        ws.merged_cells.add(f'A{note_row + 2}:H{note_row + 2}')
         generation_date = dt.datetime.now().strftime("%d/%m/%Y %H:%M")
-        index.cell(row=max_row, column=1).value = f"{self.university.name} - Generated on {generation_date}"
-        index.cell(row=max_row, column=1).font = Font(italic=True)
-        index.cell(row=max_row, column=1).alignment = Alignment(horizontal='center')
-        
-        # Save the workbook
-        wb.save(output_path)
-        print(f"\nVisual timetable saved to {output_path}")
\ No newline at end of file
+        ws.append([self.styled(ws, f"{self.university.name} - Generated on {generation_date}", 'index_note')])
+
+    @classmethod
+    def visual_workbook_path(cls, output_path: str, shard: str, entity_type: str, name: str) -> str:
+        """Workbook of the visual timetable holding the sheets of an entity (see create_visual_timetable)."""
+        root, ext = os.path.splitext(output_path)
+        if shard == 'type':
+            return f"{root}_{cls.INDEX_SECTIONS[entity_type][0].lower()}{ext}"
+        if shard == 'entity':
+            return os.path.join(root, re.sub(r'[^\w.-]', '_', f"{entity_type}_{name}") + ext)
+        return output_path
+
+    def create_visual_timetable(self, output_path="./Outputs/excel/visual_timetable.xlsx", dedupe_weeks: bool = False,
+                                shard: str = None, entities: List[str] = None) -> List[str]:
+        """
+        Creates a visual Excel timetable with days as columns and timeslots as rows.\n
+        Each entity (group, teacher, room) gets one sheet per week, and each workbook an index page with separate columns
+        for groups, teachers, and rooms. The workbooks are streamed (write-only) with named styles.\n
+        Parameters:\n
+        - output_path : str | Path to save the Excel file
+        - dedupe_weeks : bool | Write a week identical to an earlier week of the same entity only once; the index links it
+          to that week ("same as week k")
+        - shard : str | None for a single workbook, "type" for one workbook per entity type (<name>_groups.xlsx...), or
+          "entity" for one workbook per entity in a <name>/ folder
+        - entities : [str] | Only render these entities ("Group:A1", "Teacher:Lovelace_Ada", "Room:L101", or a whole type such as "Room")
+        Returns:\n
+        - [str] | Paths of the workbooks written
+        """
+        if shard not in self.VISUAL_SHARDS:
+            raise ValueError(f"Unknown shard '{shard}', expected one of {', '.join(map(str, self.VISUAL_SHARDS))}")
+        plan = self.plan_visual_sheets(dedupe_weeks, entities)
+
+        workbooks = {output_path: []} if shard is None else {}
+        for sheet in plan:
+            workbooks.setdefault(self.visual_workbook_path(output_path, shard, sheet['type'], sheet['name']), []).append(sheet)
+
+        for path, sheets in workbooks.items():
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.write_visual_workbook(path, sheets)
+        return list(workbooks)
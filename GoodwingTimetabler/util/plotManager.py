@@ -0,0 +1,140 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+from csp.objects import Course
+
+# matplotlib is imported by the renderer, to keep it out of the application start-up
+
+DAYS_ORDER = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+PLOT_FORMATS = ('png', 'svg')
+
+
+def schedule_columns(courses: List[Course]) -> Dict[str, list]:
+    """
+    Columns of the blocks of a weekly schedule plot.\n
+    Courses given on the same weekday, hours, subject, teacher and room (e.g. every week of the semester) are one block.\n
+    Returns:\n
+    - {str: list} | day (0 for Monday), start and end (hours as floats), color (hex, without #) and label of each block
+    """
+    blocks = dict.fromkeys(
+        (course.timeslot.day.weekday(),
+         course.timeslot.start.hour + course.timeslot.start.minute / 60,
+         course.timeslot.end.hour + course.timeslot.end.minute / 60,
+         course.subject.color,
+         f"{course.subject.name}\n{course.teacher.first_name} {course.teacher.last_name}\n({course.room.name})")
+        for course in courses
+    )
+    day, start, end, color, label = zip(*blocks) if blocks else ((), (), (), (), ())
+    return {'day': list(day), 'start': list(start), 'end': list(end), 'color': list(color), 'label': list(label)}
+
+
+class ScheduleRenderer:
+    """
+    Draws weekly schedules (hours from 8:00 to 22:00, one row per day) on a single Agg figure.\n
+    The axes are drawn once; rendering a schedule only replaces its blocks, so one renderer can write many files.\n
+    Parameters:\n
+    - dpi : int | Resolution of the raster images
+    - figsize : (float, float) | Size of the figure in inches
+    """
+    def __init__(self, dpi: int = 300, figsize=(10, 6)):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.dpi = dpi
+        # A figure outside of pyplot: not tracked by its figure manager, freed with the renderer
+        self.figure = Figure(figsize=figsize)
+        FigureCanvasAgg(self.figure)
+        ax = self.ax = self.figure.add_subplot()
+        ax.set_yticks(range(len(DAYS_ORDER)))
+        ax.set_yticklabels(DAYS_ORDER)
+        ax.set_xticks(range(8, 22, 1))  # Time from 8:00 to 22:00
+        ax.set_xticklabels([f"{h}:00" for h in range(8, 22)])
+        ax.grid(True, linestyle='--', alpha=0.5)
+        ax.set_ylim(-0.5, len(DAYS_ORDER) - 0.5)
+        ax.set_xlim(8, 22)
+        ax.set_xlabel("Time")
+        ax.set_ylabel("Day of the Week")
+        ax.set_title("Weekly Schedule")
+        self.blocks = []
+
+    def draw(self, columns: Dict[str, list]):
+        """Replaces the blocks of the figure by those of columns (see schedule_columns)."""
+        from matplotlib.collections import PatchCollection
+        from matplotlib.patches import Rectangle
+
+        for artist in self.blocks:
+            artist.remove()
+        rectangles = [Rectangle((start, day), end - start, 0.8)
+                      for day, start, end in zip(columns['day'], columns['start'], columns['end'])]
+        colors = ["#" + color for color in columns['color']]
+        patches = PatchCollection(rectangles, facecolors=colors, edgecolors=colors, alpha=0.8)
+        self.blocks = [self.ax.add_collection(patches)]
+        for day, start, label in zip(columns['day'], columns['start'], columns['label']):
+            # Text inside the block
+            self.blocks.append(self.ax.text(start + 0.1, day + 0.4, label, fontsize=6, color='white', va='center', ha='left',
+                                            weight='bold'))
+
+    def render(self, courses: List[Course], path: str, format: str = None):
+        """
+        Draws the weekly schedule of courses and saves it.\n
+        Parameters:\n
+        - courses : [Course] | Courses to draw, or the columns of schedule_columns
+        - path : str | Image file
+        - format : str | 'png' or 'svg' (vector, dpi is ignored); guessed from the extension of path if None
+        """
+        self.draw(courses if isinstance(courses, dict) else schedule_columns(courses))
+        self.figure.savefig(path, dpi=self.dpi, bbox_inches='tight', format=format)
+
+    def close(self):
+        """Removes the blocks and the axes (the renderer can't be used afterwards)."""
+        self.figure.clear()
+        self.blocks = []
+
+
+# Renderer of a pool worker, created once per worker
+_worker_renderer = {}
+
+
+def _render_worker(args) -> str:
+    columns, path, format, dpi = args
+    renderer = _worker_renderer.get(dpi)
+    if renderer is None:
+        renderer = _worker_renderer[dpi] = ScheduleRenderer(dpi)
+    renderer.render(columns, path, format)
+    return path
+
+
+def render_schedules(courses: List[Course], output_dir: str = './Outputs/png/', dpi: int = 300, format: str = 'png',
+                     workers: int = None) -> List[str]:
+    """
+    Renders the weekly schedule of every group, the groups being shared between a pool of processes.\n
+    Parameters:\n
+    - courses : [Course] | Courses of the solution
+    - output_dir : str | Folder receiving one <group>.<format> file per group
+    - dpi : int | Resolution of the PNG files
+    - format : str | 'png' or 'svg'
+    - workers : int | Rendering processes (defaults to the number of cores; 1 to render in this process)
+    Returns:\n
+    - [str] | Paths of the images, in order of first appearance of the groups
+    """
+    if format not in PLOT_FORMATS:
+        raise ValueError(f"Unknown plot format '{format}', expected one of {', '.join(PLOT_FORMATS)}")
+    by_group = {}
+    for course in courses:
+        by_group.setdefault(course.group.name, []).append(course)
+    os.makedirs(output_dir, exist_ok=True)
+    # Only the columns of the blocks are sent to the workers
+    jobs = [(schedule_columns(group_courses), os.path.join(output_dir, re.sub(r'[^\w.-]', '_', group) + f'.{format}'), format, dpi)
+            for group, group_courses in by_group.items()]
+
+    workers = max(1, min(len(jobs), workers or os.cpu_count() or 1))
+    if workers == 1:
+        renderer = ScheduleRenderer(dpi)
+        for columns, path, _, _ in jobs:
+            renderer.render(columns, path, format)
+        renderer.close()
+        return [path for _, path, _, _ in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_render_worker, jobs, chunksize=max(1, len(jobs) // (4 * workers))))
@@ -1,32 +1,41 @@
-from csp import *
-import yaml
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
+from typing import List
+from csp.objects import Course
 import datetime as dt
 
-def append_courses_to_yaml_file(courses: List[Course], file_path, groupName: str = 'NoName'):
+# yaml and matplotlib are imported by the functions using them, to keep them out of the application start-up
+
+def courses_to_yaml(courses: List[Course]) -> str:
+    """YAML representation of a list of Course objects (one entry per course, see Course.to_yaml_entry)."""
+    import yaml
+
+    return yaml.dump([course.to_yaml_entry() for course in courses], default_flow_style=False)
+
+
+def append_courses_to_yaml_file(courses: List[Course], file_path, groupName: str = 'NoName', png_path: str = None):
     """
     Appends the YAML representation of a list of Course objects to a .yml file.\n
     Parameters:\n
     - courses: List[Course] | A list of Course objects.
     - file_path: str | The path to the .yml file.
     - groupName: str | The group's name
+    - png_path: str | Where to plot the schedule (defaults to ./Outputs/png/<groupName>.png)
     """
-    yaml_entries = []
-    
-    for course in courses:
-        entry = course.to_yaml_entry()
-        yaml_entries.append(entry)
-
-    yaml_content = yaml.dump(yaml_entries, default_flow_style=False)
+    from .plotManager import ScheduleRenderer
 
     with open(file_path, 'w') as file:
-        file.write(yaml_content)
+        file.write(courses_to_yaml(courses))
 
-    plot_schedule(yaml_content, f'./Outputs/png/{groupName}.png')
+    # Drawn from the courses directly, without reading the YAML back
+    renderer = ScheduleRenderer()
+    renderer.render(courses, png_path or f'./Outputs/png/{groupName}.png')
+    renderer.close()
 
 
 def plot_schedule(yaml_data, save_path=None):
+    import yaml
+    import matplotlib.pyplot as plt
+    import matplotlib.patches as mpatches
+
     # Load YAML
     schedule = yaml.safe_load(yaml_data)
     
@@ -75,5 +84,6 @@ def plot_schedule(yaml_data, save_path=None):
     # Save or show plot
     if save_path:
         plt.savefig(save_path, dpi=300, bbox_inches='tight')
+        plt.close(fig)
     else:
         plt.show()